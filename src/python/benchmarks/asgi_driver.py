@@ -0,0 +1,40 @@
+"""Drives requests straight through an ASGI app, without a server or HTTP client."""
+
+import time
+
+from starlette.types import ASGIApp
+
+
+def http_scope(path: str, method: str = "GET") -> dict:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench"), (b"user-agent", b"bench"), (b"accept", b"*/*")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("bench", 80),
+    }
+
+
+async def drive(app: ASGIApp, requests: int, path: str, warmup: int = 100) -> float:
+    """Send `requests` GET requests to `path` one after another, return seconds per request."""
+    scope = http_scope(path)
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(_message):
+        pass
+
+    for _ in range(warmup):
+        await app(dict(scope), receive, send)
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - started) / requests
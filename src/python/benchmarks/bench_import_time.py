@@ -0,0 +1,99 @@
+"""
+Cold-start benchmark: import time of the application module and time until a fresh
+uvicorn process answers the startup probe.
+
+Imports are measured with `python -X importtime` in a new interpreter, without OTLP
+export configured, and compared against the budget in `import_budget.json`. The
+test suite checks that the lazy modules stay lazy, and the import time relative to
+FastAPI's, which does not depend on the machine the way wall-clock time does.
+
+    uv run python benchmarks/bench_import_time.py [--runs 5] [--serve]
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+BUDGET = json.loads((Path(__file__).parent / "import_budget.json").read_text())
+
+
+def clean_env() -> dict[str, str]:
+    # Exporters are only imported when OTLP export is configured.
+    return {key: value for key, value in os.environ.items() if not key.startswith("OTEL_")}
+
+
+def import_times(module: str) -> dict[str, int]:
+    """Cumulative import time in microseconds of every module imported by `module`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=clean_env(),
+    )
+    times: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def time_to_first_probe(timeout: float = 60.0) -> float:
+    """Seconds from starting uvicorn until `/health/startup` answers."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", BUDGET["module"] + ":app", "--port", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        env=clean_env(),
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health/startup", timeout=1):
+                    return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError("The server did not answer the startup probe")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to list")
+    parser.add_argument("--serve", action="store_true", help="Also time the first probe")
+    args = parser.parse_args()
+
+    module = BUDGET["module"]
+    runs = [import_times(module) for _ in range(args.runs)]
+    best = min(runs, key=lambda times: times[module])
+    total_ms = best[module] / 1000
+    print(f"{module}: {total_ms:.0f} ms (best of {args.runs}, budget {BUDGET['budget_ms']} ms)")
+    for name, cumulative in sorted(best.items(), key=lambda item: -item[1])[1 : args.top + 1]:
+        print(f"  {cumulative / 1000:8.0f} ms  {name}")
+
+    eager = [name for name in BUDGET["lazy_modules"] if name in best]
+    if eager:
+        print(f"Imported eagerly, but should be lazy: {', '.join(eager)}")
+    if args.serve:
+        print(f"First startup probe answered after {time_to_first_probe():.2f} s")
+    if eager or total_ms > BUDGET["budget_ms"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Load test of the application against the in-process Azure AI Agents fake.
+
+Closed-loop clients drive each scenario at every concurrency level for a fixed
+duration, through the whole application (middleware, routing, admission control,
+agent pool) but without a network or server in between. Every question is unique
+and skips the fast path, so it reaches the fake agent unless the result cache is
+enabled. Throughput and latency percentiles are printed and saved as JSON.
+
+    uv run python benchmarks/bench_load.py [--concurrency 1,8,32] [--duration 10]
+        [--scenarios count-letters,a2a,a2a-conversation,agent-card] [--turn-latency 0.2]
+        [--error-rate 0.01] [--tool-calls count_letters,calculate_square_root]
+        [--output results.json]
+
+Settings the application reads from the environment (AGENT_POOL_MAX_SIZE,
+AGENT_MAX_CONCURRENCY, ...) apply as usual. The result cache is disabled and the
+log level is WARNING, unless set otherwise.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+os.environ.setdefault("RESULT_CACHE_ENABLED", "false")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("AZURE_AI_MODEL_DEPLOYMENT_NAME", "fake-model")
+
+RECORDED_ENVIRONMENT = (
+    "AGENT_POOL_MAX_SIZE",
+    "AGENT_MAX_CONCURRENCY",
+    "AGENT_ADMISSION_QUEUE_SIZE",
+    "RESULT_CACHE_ENABLED",
+    "LOG_LEVEL",
+    "REQUEST_LOG_SAMPLE_RATE",
+    "OTEL_EXPORTER_OTLP_ENDPOINT",
+)
+
+_ids = itertools.count()
+
+
+def question() -> str:
+    # Numbered, so the questions are unique, and never answered by the fast path.
+    return f"[{next(_ids)}] How many times does the letter r appear in 'strawberry', and why?"
+
+
+def count_letters_request(client: httpx.AsyncClient):
+    return client.post("/agents/count-letters", json={"question": question()})
+
+
+def a2a_request(client: httpx.AsyncClient, context_id: str | None = None):
+    request_id = next(_ids)
+    message = {
+        "role": "user",
+        "messageId": f"bench-{request_id}",
+        "parts": [{"kind": "text", "text": question()}],
+    }
+    if context_id is not None:
+        message["contextId"] = context_id
+    return client.post(
+        "/agents/count-letters-a2a",
+        json={
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "method": "message/send",
+            "params": {"message": message},
+        },
+    )
+
+
+def a2a_conversation_request(client: httpx.AsyncClient):
+    # Follow-ups in one of 64 conversations, each continues the thread of its context.
+    return a2a_request(client, context_id=f"bench-context-{next(_ids) % 64}")
+
+
+def agent_card_request(client: httpx.AsyncClient):
+    return client.get("/agents/count-letters/.well-known/agent-card.json")
+
+
+SCENARIOS: dict[str, Callable[[httpx.AsyncClient], Any]] = {
+    "count-letters": count_letters_request,
+    "a2a": a2a_request,
+    "a2a-conversation": a2a_conversation_request,
+    "agent-card": agent_card_request,
+}
+
+
+def is_success(response: httpx.Response) -> bool:
+    if response.status_code != 200:
+        return False
+    # JSON-RPC errors come back with 200.
+    return not (response.request.url.path.endswith("-a2a") and "error" in response.json())
+
+
+async def run_level(
+    client: httpx.AsyncClient,
+    send: Callable[[httpx.AsyncClient], Any],
+    concurrency: int,
+    duration: float,
+) -> dict[str, Any]:
+    from aspire_backend_service.bulk import LatencyReservoir
+
+    latencies = LatencyReservoir(capacity=1_000_000)
+    errors = 0
+    started = time.perf_counter()
+    deadline = started + duration
+
+    async def worker() -> None:
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            request_started = time.perf_counter()
+            try:
+                response = await send(client)
+                succeeded = is_success(response)
+            except httpx.HTTPError:
+                succeeded = False
+            if succeeded:
+                latencies.add(time.perf_counter() - request_started)
+            else:
+                errors += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "concurrency": concurrency,
+        "requests": latencies.count + errors,
+        "errors": errors,
+        "durationSeconds": round(elapsed, 3),
+        "rps": round(latencies.count / elapsed, 1),
+        "latencyMs": {
+            name: round(value * 1000, 1)
+            for name, value in (
+                ("p50", latencies.percentile(50)),
+                ("p95", latencies.percentile(95)),
+                ("p99", latencies.percentile(99)),
+                ("max", latencies.maximum),
+            )
+        },
+    }
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    from fake_agents import FakeAgentsClients, FakeAgentsSettings
+
+    from aspire_backend_service.main import app
+
+    settings = FakeAgentsSettings(
+        turn_latency=args.turn_latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        tool_calls=[name for name in args.tool_calls.split(",") if name],
+        control_latency=args.control_latency,
+        seed=args.seed,
+    )
+    results: dict[str, list[dict[str, Any]]] = {}
+    async with app.router.lifespan_context(app):
+        fake = FakeAgentsClients(settings)
+        app.state.azure_clients = fake
+        app.state.agent_pool.clients = fake
+        if app.state.conversations is not None:
+            app.state.conversations.clients = fake
+        # Failed requests count as errors, instead of raising in the load generator.
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for scenario in args.scenarios.split(","):
+                results[scenario] = []
+                for concurrency in args.concurrency:
+                    level = await run_level(client, SCENARIOS[scenario], concurrency, args.duration)
+                    results[scenario].append(level)
+                    latency = level["latencyMs"]
+                    print(
+                        f"{scenario:>16} c={concurrency:<4} {level['rps']:8.1f} rps"
+                        f"  p50 {latency['p50']:7.1f}  p95 {latency['p95']:7.1f}"
+                        f"  p99 {latency['p99']:7.1f} ms  errors {level['errors']}"
+                    )
+
+    return {
+        "startedAt": datetime.now(UTC).isoformat(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "fake": {
+            "turnLatency": settings.turn_latency,
+            "jitter": settings.jitter,
+            "errorRate": settings.error_rate,
+            "toolCalls": list(settings.tool_calls),
+            "controlLatency": settings.control_latency,
+        },
+        "environment": {
+            name: os.environ[name] for name in RECORDED_ENVIRONMENT if name in os.environ
+        },
+        "durationSeconds": args.duration,
+        "results": results,
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--concurrency",
+        type=lambda value: [int(level) for level in value.split(",")],
+        default=[1, 8, 32],
+    )
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per level")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--turn-latency", type=float, default=0.2, help="Seconds per LLM turn")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Relative latency jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Failure chance per LLM turn")
+    parser.add_argument("--tool-calls", default="count_letters,calculate_square_root")
+    parser.add_argument(
+        "--control-latency", type=float, default=0.05, help="Seconds per agent CRUD call"
+    )
+    parser.add_argument("--seed", type=int)
+    parser.add_argument(
+        "--output", type=Path, help="Defaults to benchmarks/results/load-<time>.json"
+    )
+    args = parser.parse_args()
+    unknown = set(args.scenarios.split(",")) - SCENARIOS.keys()
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    report = asyncio.run(run(args))
+    output = args.output or (
+        Path(__file__).parent / "results" / f"load-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"Results written to {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
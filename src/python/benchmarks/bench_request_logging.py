@@ -0,0 +1,73 @@
+"""
+Microbenchmark for per-request logging overhead.
+
+Compares the previous `@app.middleware("http")` request logging (BaseHTTPMiddleware,
+eager f-strings, handlers on the event loop) with `RequestLoggingMiddleware` behind
+the queued logging pipeline. Requests are driven straight through the ASGI app, so
+the numbers only contain framework and logging overhead.
+
+    uv run python benchmarks/bench_request_logging.py [--requests 5000]
+"""
+
+import argparse
+import asyncio
+import io
+import logging
+
+from asgi_driver import drive
+from fastapi import FastAPI, Request
+
+from aspire_backend_service.logging_setup import RequestLoggingMiddleware, start_queued_logging
+
+
+def create_app(mode: str) -> FastAPI:
+    app = FastAPI()
+    logger = logging.getLogger("bench")
+
+    @app.get("/health/ready")
+    async def ready():
+        return {"status": "ok"}
+
+    if mode == "base-http-middleware":
+
+        @app.middleware("http")
+        async def log_requests(request: Request, call_next):
+            logger.info(f"Incoming request: {request.method} {request.url.path}")
+            logger.debug(f"Headers: {dict(request.headers)}")
+            response = await call_next(request)
+            logger.info(f"Response status: {response.status_code}")
+            return response
+
+    elif mode == "asgi-middleware":
+        app.add_middleware(RequestLoggingMiddleware)
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    # Stands in for the console and exporter handlers.
+    root.addHandler(logging.StreamHandler(io.StringIO()))
+
+    results = {}
+    for mode in ("none", "base-http-middleware"):
+        results[mode] = asyncio.run(drive(create_app(mode), args.requests, "/health/ready"))
+    start_queued_logging()
+    results["asgi-middleware"] = asyncio.run(
+        drive(create_app("asgi-middleware"), args.requests, "/health/ready")
+    )
+
+    baseline = results["none"]
+    for mode, per_request in results.items():
+        print(
+            f"{mode:>22}: {per_request * 1e6:8.1f} us/request"
+            f"  (+{(per_request - baseline) * 1e6:.1f} us logging overhead)"
+        )
+
+
+if __name__ == "__main__":
+    main()
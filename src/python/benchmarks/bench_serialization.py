@@ -0,0 +1,135 @@
+"""
+Microbenchmark for JSON encoding and decoding on the A2A and JSON-RPC paths.
+
+Compares the previous path (a pydantic JSON-RPC envelope, `model_dump` and starlette's
+`JSONResponse`, requests parsed with `json.loads`) with the bytes-first encoding in
+`aspire_backend_service.serialization`, with orjson when it is installed and with the
+pydantic-core fallback.
+
+    uv run python benchmarks/bench_serialization.py [--iterations 20000]
+"""
+
+import argparse
+import json
+import timeit
+from typing import Any
+
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+from aspire_backend_service import serialization
+from aspire_backend_service.routers.agents import (
+    AgentCapabilities,
+    AgentCard,
+    AgentInterface,
+    AgentSkill,
+    _jsonrpc_result,
+)
+
+REQUEST = json.dumps(
+    {
+        "jsonrpc": "2.0",
+        "id": "b7c1",
+        "method": "message/send",
+        "params": {
+            "message": {
+                "role": "user",
+                "messageId": "9f2e",
+                "contextId": "c-42",
+                "parts": [{"kind": "text", "text": "How many r's are in strawberry?"}],
+            }
+        },
+    }
+).encode()
+
+RESULT = {
+    "kind": "message",
+    "role": "agent",
+    "messageId": "0d6a",
+    "contextId": "c-42",
+    "parts": [
+        {
+            "kind": "text",
+            "text": "There are 3 r's in strawberry. Counted s-t-r-a-w-b-e-r-r-y, "
+            "matching r at positions 3, 8 and 9.",
+        }
+    ],
+}
+
+
+class JsonRpcResponse(BaseModel):
+    # The envelope model the router used before.
+    jsonrpc: str = "2.0"
+    result: Any
+    id: int | str | None
+
+
+def agent_card() -> AgentCard:
+    url = "https://calculator.example.com/agents/count-letters-a2a"
+    return AgentCard(
+        name="CountLettersAgent",
+        description="Analyzes text to count letters.",
+        version="1.0.0",
+        url=url,
+        protocol_version="1.0",
+        supported_interfaces=[
+            AgentInterface(url=url, protocol_binding="HTTP+JSON", protocol_version="1.0")
+        ],
+        default_input_modes=["text/plain"],
+        default_output_modes=["text/plain"],
+        capabilities=AgentCapabilities(streaming=True, push_notifications=True),
+        skills=[
+            AgentSkill(
+                id="id_count_letters_agent",
+                name="CountLettersAgent",
+                description="Counts letters.",
+                tags=["calculator"],
+                examples=["How many letters are in the word 'hello'?"],
+            )
+        ],
+    )
+
+
+def scenarios() -> dict[str, Any]:
+    card = agent_card()
+
+    def encode_response_model() -> bytes:
+        return JSONResponse(JsonRpcResponse(result=RESULT, id="b7c1").model_dump()).body
+
+    def encode_response_dict() -> bytes:
+        return serialization.dumps(_jsonrpc_result(RESULT, "b7c1"))
+
+    def encode_card_model() -> bytes:
+        return JSONResponse(card.model_dump()).body
+
+    return {
+        "decode request: json.loads": lambda: json.loads(REQUEST),
+        "decode request: serialization.loads": lambda: serialization.loads(REQUEST),
+        "encode response: model + JSONResponse": encode_response_model,
+        "encode response: dict + serialization.dumps": encode_response_dict,
+        "encode agent card: model_dump + JSONResponse": encode_card_model,
+        "encode agent card: serialization.dumps": lambda: serialization.dumps(card),
+    }
+
+
+def run(iterations: int) -> None:
+    for name, scenario in scenarios().items():
+        seconds = min(timeit.repeat(scenario, number=iterations, repeat=5)) / iterations
+        print(f"{name:<48} {seconds * 1e6:8.2f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    backends = ["orjson", "pydantic-core"] if serialization.orjson else ["pydantic-core"]
+    for backend in backends:
+        if backend == "pydantic-core":
+            serialization.orjson = None
+        print(f"# {backend}")
+        run(args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark of the request overhead added by each telemetry mode.
+
+Each mode instruments its own FastAPI app with the providers `configure_telemetry`
+would install for it. Spans are exported to an exporter that discards them, so the
+numbers contain the instrumentation cost without a collector or network.
+
+    uv run python benchmarks/bench_telemetry.py [--requests 3000]
+"""
+
+import argparse
+import asyncio
+from collections.abc import Sequence
+
+from asgi_driver import drive
+from fastapi import FastAPI
+from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+from aspire_backend_service.telemetry import (
+    CountingBatchSpanProcessor,
+    TailSamplingSpanProcessor,
+    TelemetrySettings,
+    _sampler,
+)
+
+
+class DiscardingSpanExporter(SpanExporter):
+    def export(self, _spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        return SpanExportResult.SUCCESS
+
+
+MODES = {
+    "no-op (no endpoint)": None,
+    "metrics only": TelemetrySettings(endpoint="bench", traces_enabled=False),
+    "traces, ratio 1.0": TelemetrySettings(endpoint="bench"),
+    "traces, ratio 0.1": TelemetrySettings(endpoint="bench", sample_ratio=0.1),
+    "traces, tail 0.1": TelemetrySettings(endpoint="bench", sample_ratio=0.1, tail_sampling=True),
+}
+
+
+def create_app(settings: TelemetrySettings | None) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/health/ready")
+    async def ready():
+        return {"status": "ok"}
+
+    if settings is None:
+        return app
+
+    tracer_provider = None
+    if settings.exports_traces:
+        tracer_provider = TracerProvider(sampler=_sampler(settings))
+        processor = CountingBatchSpanProcessor(DiscardingSpanExporter())
+        if settings.tail_sampling:
+            processor = TailSamplingSpanProcessor(
+                processor, settings.sample_ratio, settings.slow_request_seconds
+            )
+        tracer_provider.add_span_processor(processor)
+    meter_provider = MeterProvider(metric_readers=[InMemoryMetricReader()])
+    FastAPIInstrumentor.instrument_app(
+        app, tracer_provider=tracer_provider, meter_provider=meter_provider
+    )
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=3000)
+    args = parser.parse_args()
+
+    results = {
+        mode: asyncio.run(drive(create_app(settings), args.requests, "/health/ready"))
+        for mode, settings in MODES.items()
+    }
+    baseline = results["no-op (no endpoint)"]
+    for mode, per_request in results.items():
+        print(
+            f"{mode:>20}: {per_request * 1e6:8.1f} us/request"
+            f"  (+{(per_request - baseline) * 1e6:.1f} us telemetry overhead)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+In-process stand-in for the Azure AI Agents surface the calculator uses: the
+`AgentsClient` control plane (create, get, list, delete agents, delete threads)
+and the agents returned by `AzureAIAgentsProvider.as_agent`.
+
+A fake agent run makes one simulated LLM turn per tool call plus a final one,
+sleeping `turn_latency` (with `jitter`) per turn, and invokes the real tool
+functions. The chat and function middleware passed to `as_agent` run around the
+turns and tools, so the instrumentation costs what it does in production. Runs on
+a thread continue it, and runs without one start a new thread, like the service.
+"""
+
+import asyncio
+import itertools
+import json
+import random
+from collections.abc import AsyncIterator, Awaitable, Callable, Sequence
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any
+
+from agent_framework import AgentResponseUpdate, ChatMiddleware, Content, FunctionMiddleware
+from azure.core.exceptions import ResourceNotFoundError, ServiceResponseError
+
+from aspire_backend_service.agents.calculator import (
+    calculate_square_root,
+    calculate_square_roots,
+    calculator_response,
+    count_characters,
+    count_letters,
+    count_letters_in_phrases,
+    square_root_of_count,
+)
+
+TOOLS: dict[str, Callable[..., Any]] = {
+    tool.__name__: tool
+    for tool in (
+        count_letters,
+        calculate_square_root,
+        count_characters,
+        square_root_of_count,
+        count_letters_in_phrases,
+        calculate_square_roots,
+    )
+}
+
+
+def _arguments(name: str, question: str, previous: Any) -> dict[str, Any]:
+    """Plausible arguments for a tool call, feeding the previous result into transforms."""
+    if name == "calculate_square_root":
+        return {"number": _number(previous) if previous is not None else 16}
+    if name == "calculate_square_roots":
+        return {"numbers": previous if isinstance(previous, list) else [16]}
+    if name == "count_characters":
+        return {"phrase": question, "characters": ["r", "s", "t"]}
+    if name == "count_letters_in_phrases":
+        return {"character": "r", "phrases": question.split()}
+    return {"character": "r", "phrase": question}
+
+
+def _number(result: Any) -> float:
+    if isinstance(result, dict):
+        return result.get("square_root", sum(result.values()))
+    if isinstance(result, list):
+        return sum(result)
+    return result
+
+
+class FakeServiceError(ServiceResponseError):
+    """A simulated transient upstream failure."""
+
+
+@dataclass
+class FakeAgentsSettings:
+    turn_latency: float = 0.2
+    jitter: float = 0.2
+    error_rate: float = 0.0
+    tool_calls: Sequence[str] = ("count_letters", "calculate_square_root")
+    control_latency: float = 0.05
+    input_tokens: int = 400
+    output_tokens: int = 120
+    seed: int | None = None
+    rng: random.Random = field(init=False, repr=False)
+
+    def __post_init__(self):
+        unknown = set(self.tool_calls) - TOOLS.keys()
+        if unknown:
+            raise ValueError(f"Unknown tools: {', '.join(sorted(unknown))}")
+        self.rng = random.Random(self.seed)
+
+    async def sleep(self, latency: float) -> None:
+        await asyncio.sleep(latency * self.rng.uniform(1 - self.jitter, 1 + self.jitter))
+
+
+class FakeAgent:
+    def __init__(
+        self,
+        agent_id: str,
+        settings: FakeAgentsSettings,
+        middleware: Sequence[Any],
+        threads: "FakeThreads",
+    ):
+        self.id = agent_id
+        self.settings = settings
+        self.threads = threads
+        self.chat_middleware = [m for m in middleware if isinstance(m, ChatMiddleware)]
+        self.function_middleware = [m for m in middleware if isinstance(m, FunctionMiddleware)]
+
+    def get_new_thread(self, service_thread_id: str | None = None) -> SimpleNamespace:
+        return SimpleNamespace(service_thread_id=service_thread_id)
+
+    async def run(
+        self, question: str, thread: SimpleNamespace | None = None, **_options: Any
+    ) -> SimpleNamespace:
+        self.threads.continue_thread(thread)
+        steps = [step async for step in self._steps(question)]
+        return SimpleNamespace(
+            value=self._final(question, steps),
+            usage_details={
+                "input_token_count": self.settings.input_tokens,
+                "output_token_count": self.settings.output_tokens,
+            },
+        )
+
+    async def run_stream(
+        self, question: str, thread: SimpleNamespace | None = None, **_options: Any
+    ) -> AsyncIterator[AgentResponseUpdate]:
+        self.threads.continue_thread(thread)
+        steps = []
+        async for call_id, name, arguments, result in self._steps(question):
+            steps.append((call_id, name, arguments, result))
+            yield AgentResponseUpdate(
+                contents=[Content.from_function_call(call_id, name, arguments=arguments)],
+                role="assistant",
+            )
+            yield AgentResponseUpdate(
+                contents=[Content.from_function_result(call_id, result=result)], role="tool"
+            )
+        final = self._final(question, steps)
+        yield AgentResponseUpdate(
+            contents=[Content.from_text(final.model_dump_json())], role="assistant"
+        )
+
+    async def _steps(self, question: str) -> AsyncIterator[tuple[str, str, dict[str, Any], Any]]:
+        result: Any = None
+        for index, name in enumerate(self.settings.tool_calls):
+            await self._turn()
+            arguments = _arguments(name, question, result)
+            result = await self._invoke_tool(name, arguments)
+            yield f"call-{index}", name, arguments, result
+        await self._turn()
+
+    def _final(
+        self, question: str, steps: Sequence[tuple[str, str, Any, Any]]
+    ) -> calculator_response:
+        chain = "; ".join(
+            f"{name}({json.dumps(arguments)}) = {result}" for _, name, arguments, result in steps
+        )
+        final_number = _number(steps[-1][3]) if steps else 0
+        return calculator_response(
+            final_number=final_number,
+            reasoning=f"Answered '{question}' with {len(steps)} tool call(s).",
+            chain_of_thought=chain,
+            answer=f"The answer is {final_number}.",
+        )
+
+    async def _turn(self) -> None:
+        async def call_model(_context: Any) -> None:
+            await self.settings.sleep(self.settings.turn_latency)
+            if self.settings.rng.random() < self.settings.error_rate:
+                raise FakeServiceError("Simulated upstream failure")
+
+        await _through(self.chat_middleware, SimpleNamespace(is_streaming=False), call_model)
+
+    async def _invoke_tool(self, name: str, arguments: dict[str, Any]) -> Any:
+        context = SimpleNamespace(
+            function=SimpleNamespace(name=name), arguments=arguments, result=None
+        )
+
+        async def call_tool(context: Any) -> None:
+            context.result = TOOLS[name](**arguments)
+
+        await _through(self.function_middleware, context, call_tool)
+        return context.result
+
+
+async def _through(
+    middleware: Sequence[Any], context: Any, handler: Callable[[Any], Awaitable[None]]
+) -> None:
+    """Run `handler` wrapped in `middleware`, outermost first, like the agent framework."""
+
+    async def call(index: int, context: Any) -> None:
+        if index == len(middleware):
+            await handler(context)
+        else:
+            await middleware[index].process(context, lambda context: call(index + 1, context))
+
+    await call(0, context)
+
+
+class FakeThreads:
+    def __init__(self, settings: FakeAgentsSettings):
+        self.settings = settings
+        self.active: set[str] = set()
+        self.created = 0
+        self.deleted = 0
+
+    def continue_thread(self, thread: SimpleNamespace | None) -> None:
+        if thread is None:
+            return
+        if thread.service_thread_id is None:
+            self.created += 1
+            thread.service_thread_id = f"thread_fake{self.created}"
+            self.active.add(thread.service_thread_id)
+        elif thread.service_thread_id not in self.active:
+            raise ResourceNotFoundError(f"Thread {thread.service_thread_id} not found")
+
+    async def delete(self, thread_id: str) -> None:
+        await self.settings.sleep(self.settings.control_latency)
+        self.active.discard(thread_id)
+        self.deleted += 1
+
+
+class FakeAgentsClient:
+    def __init__(self, settings: FakeAgentsSettings):
+        self.settings = settings
+        self.agents: dict[str, SimpleNamespace] = {}
+        self.threads = FakeThreads(settings)
+        self._ids = itertools.count()
+
+    async def create_agent(self, **kwargs: Any) -> SimpleNamespace:
+        await self.settings.sleep(self.settings.control_latency)
+        agent = SimpleNamespace(id=f"asst_fake{next(self._ids)}", **kwargs)
+        self.agents[agent.id] = agent
+        return agent
+
+    async def get_agent(self, agent_id: str) -> SimpleNamespace:
+        await self.settings.sleep(self.settings.control_latency)
+        if agent_id not in self.agents:
+            raise ResourceNotFoundError(f"Agent {agent_id} not found")
+        return self.agents[agent_id]
+
+    async def list_agents(self, **_kwargs: Any) -> AsyncIterator[SimpleNamespace]:
+        await self.settings.sleep(self.settings.control_latency)
+        for agent in list(self.agents.values()):
+            yield agent
+
+    async def delete_agent(self, agent_id: str) -> None:
+        await self.settings.sleep(self.settings.control_latency)
+        self.agents.pop(agent_id, None)
+
+
+class FakeProvider:
+    def __init__(self, settings: FakeAgentsSettings, threads: FakeThreads):
+        self.settings = settings
+        self.threads = threads
+
+    def as_agent(self, agent: Any, middleware: Any = None, **_kwargs: Any) -> FakeAgent:
+        return FakeAgent(agent.id, self.settings, middleware or [], self.threads)
+
+    async def close(self) -> None:
+        pass
+
+
+class FakeCredential:
+    async def get_token(self, *_scopes: str, **_kwargs: Any) -> SimpleNamespace:
+        return SimpleNamespace(token="fake", expires_on=2**31)
+
+    async def close(self) -> None:
+        pass
+
+
+class FakeAgentsClients:
+    """Drop-in for `AzureAgentsClients`, swap it into the application's agent pool."""
+
+    endpoint = "https://fake.services.ai.azure.com/api/projects/bench"
+
+    def __init__(self, settings: FakeAgentsSettings | None = None):
+        self.settings = settings or FakeAgentsSettings()
+        self.credential = FakeCredential()
+        self.agents_client = FakeAgentsClient(self.settings)
+        self.provider = FakeProvider(self.settings, self.agents_client.threads)
+
+    @property
+    def is_open(self) -> bool:
+        return True
+
+    async def open(self) -> "FakeAgentsClients":
+        return self
+
+    async def close(self) -> None:
+        pass
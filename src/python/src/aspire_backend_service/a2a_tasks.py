@@ -0,0 +1,404 @@
+import asyncio
+import ipaddress
+import logging
+import os
+import socket
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, Any
+from urllib.parse import urlsplit
+
+from .agents.answering import Answer, format_answer_text
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+SUBMITTED = "submitted"
+WORKING = "working"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELED = "canceled"
+TERMINAL_STATES = {COMPLETED, FAILED, CANCELED}
+
+
+class TaskQueueFullError(Exception):
+    """Raised when a task is submitted while the worker queue is full."""
+
+
+class TaskNotFoundError(KeyError):
+    """Raised for unknown (or already evicted) task ids."""
+
+
+class TaskNotCancelableError(Exception):
+    """Raised when canceling a task that already reached a terminal state."""
+
+
+class InvalidPushUrlError(ValueError):
+    """Raised when a push notification URL is not one this server may call."""
+
+
+def _is_public_address(address: str) -> bool:
+    return ipaddress.ip_address(address).is_global
+
+
+async def _resolve_public_address(host: str, port: int) -> str | None:
+    """An address of `host` to connect to, None when any of them is not public."""
+    addresses = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    resolved = [str(address[4][0]) for address in addresses]
+    if not resolved or not all(_is_public_address(address) for address in resolved):
+        return None
+    return resolved[0]
+
+
+def _pinned_url(url: str, address: str) -> str:
+    """`url` with its host replaced by `address`."""
+    parts = urlsplit(url)
+    host = f"[{address}]" if ":" in address else address
+    return parts._replace(netloc=f"{host}:{parts.port}" if parts.port else host).geturl()
+
+
+def agent_message(text: str, metadata: dict[str, Any] | None = None) -> dict[str, Any]:
+    """Build an A2A Message object sent by this agent."""
+    message: dict[str, Any] = {
+        "kind": "message",
+        "messageId": str(uuid.uuid4()),
+        "role": "Agent",  # .NET expects PascalCase role
+        "parts": [{"kind": "text", "text": text}],
+    }
+    if metadata:
+        message["metadata"] = metadata
+    return message
+
+
+@dataclass
+class TaskRecord:
+    """Server-side state of an A2A Task."""
+
+    question: str
+    context_id: str
+    # Whether the client named the context, the run then continues its conversation
+    continues_context: bool = False
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    state: str = SUBMITTED
+    message: dict[str, Any] | None = None
+    artifacts: list[dict[str, Any]] = field(default_factory=list)
+    push_url: str | None = None
+    push_token: str | None = None
+    updated_at: float = field(default_factory=time.time)
+    run: "asyncio.Task[Answer] | None" = None
+
+    @property
+    def is_terminal(self) -> bool:
+        return self.state in TERMINAL_STATES
+
+    def transition(self, state: str, message: dict[str, Any] | None = None) -> None:
+        self.state = state
+        self.message = message
+        self.updated_at = time.time()
+
+    def to_a2a(self) -> dict[str, Any]:
+        """The A2A Task object for this record."""
+        status: dict[str, Any] = {
+            "state": self.state,
+            "timestamp": datetime.fromtimestamp(self.updated_at, UTC).isoformat(),
+        }
+        if self.message is not None:
+            status["message"] = self.message
+        task: dict[str, Any] = {
+            "kind": "task",
+            "id": self.id,
+            "contextId": self.context_id,
+            "status": status,
+        }
+        if self.artifacts:
+            task["artifacts"] = self.artifacts
+        return task
+
+
+class TaskStore:
+    """
+    Keeps at most `max_tasks` tasks in memory. When full, the oldest tasks in a
+    terminal state are evicted first; active tasks are never evicted.
+    """
+
+    def __init__(self, max_tasks: int = 1000):
+        self.max_tasks = max_tasks
+        self._tasks: OrderedDict[str, TaskRecord] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def add(self, record: TaskRecord) -> None:
+        self._tasks[record.id] = record
+        if len(self._tasks) > self.max_tasks:
+            for task_id in [task_id for task_id, task in self._tasks.items() if task.is_terminal]:
+                del self._tasks[task_id]
+                if len(self._tasks) <= self.max_tasks:
+                    break
+
+    def get(self, task_id: str) -> TaskRecord:
+        try:
+            return self._tasks[task_id]
+        except KeyError:
+            raise TaskNotFoundError(task_id)
+
+
+class TaskManager:
+    """
+    Runs A2A tasks on a fixed number of background workers fed by a bounded queue,
+    so long agent runs do not hold on to HTTP connections. `runner` answers a question,
+    continuing the conversation of the context id it is passed, if any. On `close()` the queued and
+    running tasks get up to `drain_timeout` seconds to finish; the rest fail.
+    """
+
+    def __init__(
+        self,
+        runner: Callable[[str, str | None], Awaitable[Answer]],
+        *,
+        workers: int = 4,
+        queue_size: int = 100,
+        max_tasks: int = 1000,
+        push_notifications: bool = False,
+        push_timeout: float = 10.0,
+        push_allowed_hosts: Iterable[str] = (),
+        drain_timeout: float = 30.0,
+    ):
+        self.runner = runner
+        self.workers = workers
+        self.push_notifications = push_notifications
+        self.push_timeout = push_timeout
+        self.push_allowed_hosts = frozenset(host.lower() for host in push_allowed_hosts)
+        self.drain_timeout = drain_timeout
+        # Active tasks are never evicted, so the store must be able to hold all of them.
+        self.store = TaskStore(max(max_tasks, queue_size + workers))
+        self._queue: asyncio.Queue[TaskRecord] = asyncio.Queue(maxsize=queue_size)
+        self._workers: list[asyncio.Task] = []
+        self._notifications: set[asyncio.Task] = set()
+        self._http_client: httpx.AsyncClient | None = None
+        self._closing = False
+
+    @classmethod
+    def from_env(cls, runner: Callable[[str, str | None], Awaitable[Answer]]) -> "TaskManager":
+        return cls(
+            runner,
+            workers=int(os.getenv("A2A_TASK_WORKERS", "4")),
+            queue_size=int(os.getenv("A2A_TASK_QUEUE_SIZE", "100")),
+            max_tasks=int(os.getenv("A2A_TASK_STORE_MAX_TASKS", "1000")),
+            push_notifications=os.getenv("A2A_PUSH_NOTIFICATIONS_ENABLED", "false").lower()
+            == "true",
+            push_allowed_hosts=[
+                host.strip()
+                for host in os.getenv("A2A_PUSH_ALLOWED_HOSTS", "").split(",")
+                if host.strip()
+            ],
+            # By default as long as the server waits for the requests in flight.
+            drain_timeout=float(
+                os.getenv(
+                    "A2A_TASK_DRAIN_TIMEOUT_SECONDS",
+                    os.getenv("SERVER_GRACEFUL_SHUTDOWN_SECONDS", "30"),
+                )
+            ),
+        )
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    async def start(self) -> None:
+        self._workers = [
+            asyncio.create_task(self._work(), name=f"a2a-task-worker-{index}")
+            for index in range(self.workers)
+        ]
+
+    async def close(self) -> None:
+        """
+        Stop taking tasks and wait for the queued and running ones, up to `drain_timeout`
+        seconds. Tasks still unfinished then fail, which their push URLs are notified of.
+        """
+        self._closing = True
+        if self._workers:
+            try:
+                async with asyncio.timeout(self.drain_timeout):
+                    await self._queue.join()
+            except TimeoutError:
+                logger.warning(
+                    "A2A tasks did not finish within %.1fs of shutting down, failing them",
+                    self.drain_timeout,
+                )
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        while not self._queue.empty():
+            self._abandon(self._queue.get_nowait())
+        await asyncio.gather(*self._notifications, return_exceptions=True)
+        if self._http_client is not None:
+            await self._http_client.aclose()
+
+    def submit(
+        self,
+        question: str,
+        context_id: str | None,
+        push_url: str | None = None,
+        push_token: str | None = None,
+    ) -> TaskRecord:
+        """
+        Queue a question and return its task in the `submitted` state. Without a
+        `context_id` the task gets a new one. Raises InvalidPushUrlError for a push URL
+        this server may not call.
+        """
+        if self._closing:
+            raise TaskQueueFullError("Task manager is shutting down")
+        if not self.push_notifications:
+            push_url = None
+        elif push_url is not None:
+            self.check_push_url(push_url)
+        record = TaskRecord(
+            question=question,
+            context_id=context_id or str(uuid.uuid4()),
+            continues_context=context_id is not None,
+            push_url=push_url,
+            push_token=push_token,
+        )
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            raise TaskQueueFullError("Task queue is full")
+        self.store.add(record)
+        return record
+
+    def check_push_url(self, url: str) -> None:
+        """
+        Push URLs are supplied by clients and called by this server. Only http(s) URLs
+        are accepted, for the hosts in A2A_PUSH_ALLOWED_HOSTS when it is set. Otherwise
+        any host is, except loopback, private and link-local addresses; host names are
+        checked again for those when they are resolved, before each notification, which
+        then connects to the address that was checked.
+        """
+        try:
+            parts = urlsplit(url)
+            # Raises for ports that are not numbers, or out of range.
+            parts.port  # noqa: B018
+        except ValueError as e:
+            raise InvalidPushUrlError(f"Invalid push notification URL: {e}")
+        host = (parts.hostname or "").lower()
+        if parts.scheme not in ("http", "https") or not host:
+            raise InvalidPushUrlError("Push notification URL must be an absolute http(s) URL")
+        if self.push_allowed_hosts:
+            if host not in self.push_allowed_hosts:
+                raise InvalidPushUrlError(f"Push notifications to {host} are not allowed")
+            return
+        if host == "localhost" or host.endswith(".localhost"):
+            raise InvalidPushUrlError("Push notifications to local addresses are not allowed")
+        try:
+            is_public = _is_public_address(host)
+        except ValueError:
+            return  # A host name, checked when it is resolved.
+        if not is_public:
+            raise InvalidPushUrlError("Push notifications to local addresses are not allowed")
+
+    def get(self, task_id: str) -> TaskRecord:
+        return self.store.get(task_id)
+
+    def cancel(self, task_id: str) -> TaskRecord:
+        record = self.store.get(task_id)
+        if record.is_terminal:
+            raise TaskNotCancelableError(task_id)
+        record.transition(CANCELED)
+        if record.run is not None:
+            record.run.cancel()
+        self._notify(record)
+        return record
+
+    async def _work(self) -> None:
+        while True:
+            record = await self._queue.get()
+            try:
+                if record.state == SUBMITTED:
+                    await self._execute(record)
+            finally:
+                self._queue.task_done()
+
+    async def _execute(self, record: TaskRecord) -> None:
+        record.transition(WORKING)
+
+        async def run_question() -> Answer:
+            context_id = record.context_id if record.continues_context else None
+            return await self.runner(record.question, context_id)
+
+        record.run = asyncio.create_task(run_question())
+        try:
+            # `wait` does not raise when the run itself gets canceled through `cancel()`.
+            await asyncio.wait({record.run})
+        except asyncio.CancelledError:
+            record.run.cancel()
+            self._abandon(record)
+            raise
+        finally:
+            run, record.run = record.run, None
+
+        if run.cancelled() or record.state == CANCELED:
+            return
+        if (error := run.exception()) is not None:
+            logger.error("A2A task %s failed: %s", record.id, error)
+            record.transition(FAILED, agent_message(f"Internal error: {error}"))
+        else:
+            answer = run.result()
+            answer_text = format_answer_text(answer.response)
+            record.artifacts = [
+                {"artifactId": "answer", "parts": [{"kind": "text", "text": answer_text}]}
+            ]
+            record.transition(COMPLETED, agent_message(answer_text, {"servedBy": answer.served_by}))
+        self._notify(record)
+
+    def _abandon(self, record: TaskRecord) -> None:
+        """Fail a task the server shuts down before it could finish."""
+        if record.is_terminal:
+            return
+        record.transition(FAILED, agent_message("The server shut down before the task finished"))
+        self._notify(record)
+
+    def _notify(self, record: TaskRecord) -> None:
+        if record.push_url is None:
+            return
+        notification = asyncio.create_task(self._post_notification(record, record.push_url))
+        self._notifications.add(notification)
+        notification.add_done_callback(self._notifications.discard)
+
+    async def _post_notification(self, record: TaskRecord, url: str) -> None:
+        # Only needed once a client registers a webhook.
+        import httpx
+
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(timeout=self.push_timeout)
+        headers = {"X-A2A-Notification-Token": record.push_token} if record.push_token else {}
+        extensions: dict[str, Any] = {}
+        try:
+            if not self.push_allowed_hosts:
+                parts = urlsplit(url)
+                port = parts.port or (443 if parts.scheme == "https" else 80)
+                address = await _resolve_public_address(parts.hostname or "", port)
+                if address is None:
+                    logger.warning(
+                        "Push notification for task %s skipped: %s resolves to a local address",
+                        record.id,
+                        parts.hostname,
+                    )
+                    return
+                # Resolving the host name again could give another address (DNS rebinding),
+                # so the checked one is called. TLS still verifies the certificate by name.
+                url = _pinned_url(url, address)
+                headers["Host"] = parts.netloc.rpartition("@")[2]
+                extensions["sni_hostname"] = parts.hostname
+            response = await self._http_client.post(
+                url, json=record.to_a2a(), headers=headers, extensions=extensions
+            )
+            response.raise_for_status()
+        except (httpx.HTTPError, httpx.InvalidURL, OSError) as e:
+            logger.warning("Push notification for task %s failed: %s", record.id, e)
@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import os
+import time
+from collections.abc import AsyncIterator, Iterable
+from contextlib import asynccontextmanager
+
+from opentelemetry import metrics
+from opentelemetry.metrics import CallbackOptions, Observation
+
+logger = logging.getLogger(__name__)
+
+meter = metrics.get_meter(__name__)
+in_flight_counter = meter.create_up_down_counter(
+    "admission.in_flight", unit="{run}", description="Agent runs currently admitted"
+)
+wait_histogram = meter.create_histogram(
+    "admission.wait", unit="s", description="Time spent queued before an agent run was admitted"
+)
+rejections_counter = meter.create_counter(
+    "admission.rejections",
+    unit="{run}",
+    description="Agent runs shed because the wait queue was full or the wait timed out",
+)
+
+_controllers: list["AdmissionController"] = []
+
+
+def _observe_queue_depth(_options: CallbackOptions) -> Iterable[Observation]:
+    for controller in _controllers:
+        yield Observation(controller.waiting)
+
+
+meter.create_observable_gauge(
+    "admission.queue_depth",
+    callbacks=[_observe_queue_depth],
+    unit="{run}",
+    description="Agent runs waiting for admission",
+)
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when an agent run is shed. `retry_after` is the suggested back-off in seconds."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Server is saturated ({reason}), retry after {retry_after:g}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Limits how many agent runs are in flight at once. Up to `max_queue` further runs
+    wait at most `queue_timeout` seconds for a slot; everything beyond that is shed
+    immediately, so load spikes do not all end up at the upstream service.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_concurrency: int = 16,
+        max_queue: int = 64,
+        queue_timeout: float = 10.0,
+        retry_after: float = 1.0,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        _controllers.append(self)
+
+    @classmethod
+    def from_env(cls, pool_size: int | None = None) -> "AdmissionController":
+        """
+        Runs beyond the agent pool's size would only wait for a lease, so the limit
+        defaults to `pool_size` and is never larger than it.
+        """
+        max_concurrency = int(os.getenv("AGENT_MAX_CONCURRENCY", str(pool_size or 16)))
+        if pool_size is not None and max_concurrency > pool_size:
+            logger.warning(
+                "AGENT_MAX_CONCURRENCY=%d exceeds the agent pool size, admitting %d runs at once",
+                max_concurrency,
+                pool_size,
+            )
+            max_concurrency = pool_size
+        return cls(
+            max_concurrency=max_concurrency,
+            max_queue=int(os.getenv("AGENT_ADMISSION_QUEUE_SIZE", "64")),
+            queue_timeout=float(os.getenv("AGENT_ADMISSION_QUEUE_TIMEOUT_SECONDS", "10")),
+            retry_after=float(os.getenv("AGENT_ADMISSION_RETRY_AFTER_SECONDS", "1")),
+        )
+
+    @property
+    def saturated(self) -> bool:
+        """True while new runs would be shed because the wait queue is full."""
+        return self.waiting >= self.max_queue and self._semaphore.locked()
+
+    @asynccontextmanager
+    async def admit(self, *, wait: bool = True) -> AsyncIterator[None]:
+        """
+        Hold an agent run slot, raising `AdmissionRejectedError` when none can be had.
+        Without `wait` only a slot that is free right away is taken, e.g. for a hedge.
+        """
+        if not wait:
+            if self._semaphore.locked():
+                raise AdmissionRejectedError("no_free_slot", self.retry_after)
+            await self._semaphore.acquire()
+        else:
+            await self._wait_for_slot()
+
+        self.in_flight += 1
+        in_flight_counter.add(1)
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            in_flight_counter.add(-1)
+            self._semaphore.release()
+
+    async def _wait_for_slot(self) -> None:
+        if self.saturated:
+            self._reject("queue_full")
+
+        started = time.perf_counter()
+        self.waiting += 1
+        try:
+            async with asyncio.timeout(self.queue_timeout):
+                await self._semaphore.acquire()
+        except TimeoutError:
+            self._reject("timeout")
+        finally:
+            self.waiting -= 1
+        wait_histogram.record(time.perf_counter() - started)
+
+    def close(self) -> None:
+        if self in _controllers:
+            _controllers.remove(self)
+
+    def _reject(self, reason: str) -> None:
+        rejections_counter.add(1, {"reason": reason})
+        logger.warning("Shedding agent run: %s (%d waiting)", reason, self.waiting)
+        raise AdmissionRejectedError(reason, self.retry_after)
@@ -0,0 +1,115 @@
+import hashlib
+import os
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from opentelemetry import metrics
+from pydantic import BaseModel
+from starlette.requests import Request
+from starlette.responses import Response
+
+from .serialization import dumps
+
+meter = metrics.get_meter(__name__)
+card_requests_counter = meter.create_counter(
+    "agent_card.requests",
+    unit="{request}",
+    description="Agent card requests, by whether the card was built, cached or not modified",
+)
+
+# The card depends on the public URL, so shared caches must keep one copy per host
+VARY = "Host, X-Forwarded-Host, X-Forwarded-Proto"
+
+
+def base_url(request: Request) -> str:
+    """
+    The public base URL of the request, respecting proxy headers. Azure Container Apps
+    and other cloud platforms use reverse proxies.
+    """
+    scheme = request.headers.get("X-Forwarded-Proto", request.url.scheme)
+    host = request.headers.get("X-Forwarded-Host", request.url.netloc)
+    return f"{scheme}://{host}"
+
+
+@dataclass(frozen=True)
+class EncodedCard:
+    body: bytes
+    etag: str
+
+    @classmethod
+    def encode(cls, card: BaseModel) -> "EncodedCard":
+        body = dumps(card)
+        return cls(body=body, etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+
+    def matches(self, if_none_match: str | None) -> bool:
+        """Whether an `If-None-Match` header names this card, compared weakly per RFC 9110."""
+        if not if_none_match:
+            return False
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or self.etag in tags
+
+
+class AgentCardRegistry:
+    """
+    The agents published for discovery. A card is built and encoded once per agent and
+    base URL, then served from the cache with a strong ETag, so polling it costs a
+    dictionary lookup, and nothing at all for clients that send `If-None-Match`.
+
+    Base URLs come from the (client controlled) forwarded headers, so at most
+    `max_entries` encoded cards are kept, the least recently used are dropped beyond that.
+    """
+
+    def __init__(self, *, max_entries: int = 64, max_age: int = 300):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._builders: dict[str, Callable[[str], BaseModel]] = {}
+        self._cards: OrderedDict[tuple[str, str], EncodedCard] = OrderedDict()
+
+    @classmethod
+    def from_env(cls) -> "AgentCardRegistry":
+        return cls(
+            max_entries=int(os.getenv("AGENT_CARD_CACHE_MAX_ENTRIES", "64")),
+            max_age=int(os.getenv("AGENT_CARD_MAX_AGE_SECONDS", "300")),
+        )
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._builders
+
+    def __len__(self) -> int:
+        return len(self._cards)
+
+    def register(self, name: str, build: Callable[[str], BaseModel]) -> None:
+        """Publish an agent, `build` creates its card for a base URL."""
+        self._builders[name] = build
+        for key in [key for key in self._cards if key[0] == name]:
+            del self._cards[key]
+
+    def card(self, name: str, base_url: str) -> EncodedCard:
+        """The encoded card of a registered agent, raises a KeyError for unknown agents."""
+        key = (name, base_url)
+        card = self._cards.get(key)
+        if card is not None:
+            self._cards.move_to_end(key)
+            return card
+        card = EncodedCard.encode(self._builders[name](base_url))
+        self._cards[key] = card
+        while len(self._cards) > self.max_entries:
+            self._cards.popitem(last=False)
+        return card
+
+    def response(self, name: str, request: Request) -> Response:
+        """The card of a registered agent, or 304 when the client already has it."""
+        url = base_url(request)
+        cached = (name, url) in self._cards
+        card = self.card(name, url)
+        headers = {
+            "ETag": card.etag,
+            "Cache-Control": f"public, max-age={self.max_age}",
+            "Vary": VARY,
+        }
+        if card.matches(request.headers.get("If-None-Match")):
+            card_requests_counter.add(1, {"result": "not_modified"})
+            return Response(status_code=304, headers=headers)
+        card_requests_counter.add(1, {"result": "cached" if cached else "built"})
+        return Response(content=card.body, media_type="application/json", headers=headers)
@@ -0,0 +1,247 @@
+import asyncio
+import logging
+import os
+import time
+from collections.abc import AsyncIterator, Callable, Sequence
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from functools import partial
+from typing import TYPE_CHECKING, Any
+
+from opentelemetry import metrics
+
+from ..admission import AdmissionRejectedError
+from ..clients import AzureAgentsClients
+from ..instrumentation import agent_operation_histogram, measure
+from ..resilience import (
+    CREATE_AGENT,
+    DELETE_AGENT,
+    GET_AGENT,
+    UpstreamResilience,
+    UpstreamUnavailableError,
+)
+
+if TYPE_CHECKING:
+    from agent_framework import ChatAgent
+
+logger = logging.getLogger(__name__)
+
+meter = metrics.get_meter(__name__)
+pool_size_counter = meter.create_up_down_counter(
+    "agent_pool.size", unit="{agent}", description="Number of agents currently owned by the pool"
+)
+pool_in_use_counter = meter.create_up_down_counter(
+    "agent_pool.in_use", unit="{agent}", description="Number of agents currently leased out"
+)
+lease_counter = meter.create_counter(
+    "agent_pool.leases", unit="{lease}", description="Number of agent leases handed out"
+)
+lease_wait_histogram = meter.create_histogram(
+    "agent_pool.lease_wait", unit="s", description="Time spent waiting for an agent lease"
+)
+recreated_counter = meter.create_counter(
+    "agent_pool.recreated",
+    unit="{agent}",
+    description="Number of agents replaced after failing a health check",
+)
+
+
+class AgentPoolClosedError(RuntimeError):
+    """Raised when a lease is requested from a pool that has been closed."""
+
+
+@dataclass
+class _PooledAgent:
+    agent_id: str
+    agent: "ChatAgent[Any]"
+    last_checked: float = field(default_factory=time.monotonic)
+    suspect: bool = False
+
+
+class AgentPool:
+    """
+    Owns a bounded set of long-lived Azure AI agents and leases them to requests.
+
+    Agents are created lazily up to `max_size` (or eagerly up to `min_size` on
+    `start()`), health-checked before reuse and deleted again on `close()`.
+    `middleware_factory` is called when the first agent is created, so middleware
+    built on the agent framework does not have to be imported up front. Calls to the
+    service go through `resilience`, which also guards the runs of leased agents.
+    A lease that is not available within `lease_timeout` is shed with
+    `AdmissionRejectedError`, suggesting to retry after `retry_after` seconds.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        instructions: str,
+        tools: Sequence[Any],
+        clients: AzureAgentsClients,
+        *,
+        max_size: int = 4,
+        min_size: int = 0,
+        lease_timeout: float = 30.0,
+        health_check_interval: float = 60.0,
+        retry_after: float = 1.0,
+        middleware_factory: Callable[[], Sequence[Any]] | None = None,
+        resilience: UpstreamResilience | None = None,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.name = name
+        self.instructions = instructions
+        self.tools = list(tools)
+        self.middleware_factory = middleware_factory
+        self._middleware: list[Any] | None = None
+        self.max_size = max_size
+        self.min_size = min(min_size, max_size)
+        self.lease_timeout = lease_timeout
+        self.health_check_interval = health_check_interval
+        self.retry_after = retry_after
+        self.clients = clients
+        self.resilience = resilience or UpstreamResilience()
+
+        self._idle: list[_PooledAgent] = []
+        self._leased: set[str] = set()
+        self._size = 0
+        self._slots = asyncio.Semaphore(max_size)
+        self._closed = False
+
+    @property
+    def size(self) -> int:
+        """Number of agents currently owned by the pool (idle and leased)."""
+        return self._size
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    async def start(self) -> None:
+        """Pre-create `min_size` agents so the first requests do not pay for creation."""
+        while self._size < self.min_size:
+            self._idle.append(await self._create())
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator["ChatAgent[Any]"]:
+        """Lease an agent for the duration of the `async with` block."""
+        if self._closed:
+            raise AgentPoolClosedError("Agent pool is closed")
+
+        started = time.perf_counter()
+        try:
+            async with asyncio.timeout(self.lease_timeout):
+                await self._slots.acquire()
+        except TimeoutError:
+            logger.warning("No agent of pool '%s' could be leased in time", self.name)
+            raise AdmissionRejectedError("lease_timeout", self.retry_after) from None
+        lease_wait_histogram.record(time.perf_counter() - started, {"agent.name": self.name})
+
+        try:
+            pooled = self._idle.pop() if self._idle else await self._create()
+            pooled = await self._ensure_healthy(pooled)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        lease_counter.add(1, {"agent.name": self.name})
+        pool_in_use_counter.add(1, {"agent.name": self.name})
+        self._leased.add(pooled.agent_id)
+        try:
+            yield pooled.agent
+        except BaseException:
+            # The failure (or a run cancelled halfway) may or may not have affected the
+            # agent itself, verify it before reuse.
+            pooled.suspect = True
+            raise
+        finally:
+            self._leased.discard(pooled.agent_id)
+            pool_in_use_counter.add(-1, {"agent.name": self.name})
+            self._idle.append(pooled)
+            self._slots.release()
+
+    async def close(self) -> None:
+        """Wait for outstanding leases and delete all agents owned by the pool."""
+        self._closed = True
+        try:
+            async with asyncio.timeout(self.lease_timeout):
+                for _ in range(self.max_size):
+                    await self._slots.acquire()
+        except TimeoutError:
+            logger.warning(
+                "Closing agent pool '%s' with %d agent(s) still leased",
+                self.name,
+                len(self._leased),
+            )
+
+        idle, self._idle = self._idle, []
+        await asyncio.gather(*(self._delete(pooled) for pooled in idle))
+
+    async def _create(self) -> _PooledAgent:
+        clients = await self.clients.open()
+        with measure("agent.create", agent_operation_histogram, self._attributes("create")):
+            created_agent = await self.resilience.call(
+                CREATE_AGENT,
+                partial(
+                    clients.agents_client.create_agent,
+                    model=os.environ["AZURE_AI_MODEL_DEPLOYMENT_NAME"],
+                    name=self.name,
+                    instructions=self.instructions,
+                    # Adding tools over here yields in a `Object of type FunctionTool is not JSON serializable`-error.
+                    # The function tools are attached to the local ChatAgent wrapper instead.
+                ),
+            )
+        if self._middleware is None:
+            self._middleware = list(self.middleware_factory()) if self.middleware_factory else []
+        # `as_agent` wraps the created agent without another round trip to the service.
+        agent = clients.provider.as_agent(
+            created_agent, tools=self.tools, middleware=self._middleware or None
+        )
+        self._size += 1
+        pool_size_counter.add(1, {"agent.name": self.name})
+        logger.info("Created pooled agent %s (%d/%d)", created_agent.id, self._size, self.max_size)
+        return _PooledAgent(agent_id=created_agent.id, agent=agent)
+
+    async def _ensure_healthy(self, pooled: _PooledAgent) -> _PooledAgent:
+        now = time.monotonic()
+        if not pooled.suspect and now - pooled.last_checked < self.health_check_interval:
+            return pooled
+
+        clients = await self.clients.open()
+        try:
+            with measure("agent.lookup", agent_operation_histogram, self._attributes("lookup")):
+                await self.resilience.call(
+                    GET_AGENT, partial(clients.agents_client.get_agent, pooled.agent_id), hedge=True
+                )
+        except UpstreamUnavailableError:
+            # The service is unavailable, not the agent: keep it for when it is back.
+            self._idle.append(pooled)
+            raise
+        except Exception as e:
+            logger.warning("Pooled agent %s failed its health check: %s", pooled.agent_id, e)
+            await self._delete(pooled)
+            recreated_counter.add(1, {"agent.name": self.name})
+            return await self._create()
+        except BaseException:
+            # Cancelled halfway through the check: keep the agent, the next lease checks it.
+            pooled.suspect = True
+            self._idle.append(pooled)
+            raise
+
+        pooled.last_checked = now
+        pooled.suspect = False
+        return pooled
+
+    async def _delete(self, pooled: _PooledAgent) -> None:
+        self._size -= 1
+        pool_size_counter.add(-1, {"agent.name": self.name})
+        try:
+            clients = await self.clients.open()
+            with measure("agent.delete", agent_operation_histogram, self._attributes("delete")):
+                await self.resilience.call(
+                    DELETE_AGENT, partial(clients.agents_client.delete_agent, pooled.agent_id)
+                )
+        except Exception as e:
+            logger.warning("Failed to delete pooled agent %s: %s", pooled.agent_id, e)
+
+    def _attributes(self, operation: str) -> dict[str, Any]:
+        return {"agent.name": self.name, "agent.operation": operation}
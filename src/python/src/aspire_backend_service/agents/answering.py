@@ -0,0 +1,143 @@
+import logging
+import time
+from collections.abc import AsyncIterator, Iterable
+from dataclasses import dataclass
+
+from opentelemetry import metrics
+from opentelemetry.metrics import CallbackOptions, Observation
+
+from ..conversations import Conversation
+from ..result_cache import HIT, ResultCache, normalize_key
+from .calculator import CalculatorUpdate, calculator, calculator_response
+from .fast_path import try_fast_path
+
+logger = logging.getLogger(__name__)
+
+FAST_PATH = "fast-path"
+CACHE = "cache"
+AGENT = "agent"
+
+meter = metrics.get_meter(__name__)
+answers_counter = meter.create_counter(
+    "calculator.answers",
+    unit="{answer}",
+    description="Number of questions answered, by the path that served them",
+)
+answer_duration_histogram = meter.create_histogram(
+    "calculator.answer.duration",
+    unit="s",
+    description="Time spent answering a question, by the path that served it",
+)
+
+_served = {FAST_PATH: 0, CACHE: 0, AGENT: 0}
+
+
+def _observe_fast_path_hit_ratio(_options: CallbackOptions) -> Iterable[Observation]:
+    total = sum(_served.values())
+    if total:
+        yield Observation(_served[FAST_PATH] / total)
+
+
+meter.create_observable_gauge(
+    "calculator.fast_path.hit_ratio",
+    callbacks=[_observe_fast_path_hit_ratio],
+    unit="1",
+    description="Share of questions answered by the local fast path",
+)
+
+
+@dataclass
+class Answer:
+    response: calculator_response | None
+    served_by: str
+
+
+def format_answer_text(results: calculator_response | None) -> str:
+    """Format the calculator results as a text response combining all information"""
+    if results is None:
+        logger.warning("Calculator returned None results")
+        return "I couldn't process the question."
+    return (
+        f"Answer: {results.answer}\n"
+        f"Final Number: {results.final_number}\n"
+        f"Reasoning: {results.reasoning}\n"
+        f"Chain of Thought: {results.chain_of_thought}"
+    )
+
+
+def _record(served_by: str, started: float) -> None:
+    _served[served_by] += 1
+    attributes = {"calculator.path": served_by}
+    answers_counter.add(1, attributes)
+    answer_duration_histogram.record(time.perf_counter() - started, attributes)
+
+
+async def answer_question(
+    question: str,
+    subject: calculator,
+    cache: ResultCache[calculator_response] | None = None,
+    conversation: Conversation | None = None,
+) -> Answer:
+    """
+    Answer a question through the cheapest path that can serve it: the local
+    fast path for recognized questions, then the result cache, and the calculator
+    agent for everything else. Identical questions in flight share one agent run.
+
+    Messages in a `conversation` may refer to earlier ones, so they are not answered
+    from the cache but by the agent, on the conversation's thread. Fast path questions
+    are self-contained and still answered locally.
+    """
+    started = time.perf_counter()
+
+    response = try_fast_path(question)
+    if response is not None:
+        logger.debug("Question answered by the fast path")
+        _record(FAST_PATH, started)
+        return Answer(response=response, served_by=FAST_PATH)
+
+    if conversation is not None:
+        response = await subject.run(question, conversation)
+        served_by = AGENT
+    elif cache is None:
+        response = await subject.run(question)
+        served_by = AGENT
+    else:
+        response, outcome = await cache.get_or_compute(
+            normalize_key(question), lambda: subject.run(question)
+        )
+        served_by = CACHE if outcome == HIT else AGENT
+
+    _record(served_by, started)
+    return Answer(response=response, served_by=served_by)
+
+
+async def stream_answer(
+    question: str,
+    subject: calculator,
+    cache: ResultCache[calculator_response] | None = None,
+    conversation: Conversation | None = None,
+) -> AsyncIterator[CalculatorUpdate]:
+    """
+    Streaming variant of `answer_question`. Fast path and cache hits yield only the
+    final update, agent runs also yield their tool calls and answer text on the way.
+    """
+    started = time.perf_counter()
+
+    response = try_fast_path(question)
+    if response is None and cache is not None and conversation is None:
+        response = await cache.get(normalize_key(question))
+        served_by = CACHE
+    else:
+        served_by = FAST_PATH
+    if response is not None:
+        _record(served_by, started)
+        yield CalculatorUpdate(kind="final", response=response, served_by=served_by)
+        return
+
+    async for update in subject.run_stream(question, conversation):
+        if update.kind == "final":
+            if cache is not None and conversation is None and update.response is not None:
+                await cache.set(normalize_key(question), update.response)
+            _record(AGENT, started)
+            update.served_by = AGENT
+        yield update
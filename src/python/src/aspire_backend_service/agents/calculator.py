@@ -1,13 +1,24 @@
 import os
+from collections import Counter
+from collections.abc import AsyncGenerator, AsyncIterator
+from contextlib import AbstractAsyncContextManager, nullcontext
+from dataclasses import dataclass
+from functools import partial
 from math import sqrt
-from typing import Annotated
+from typing import TYPE_CHECKING, Annotated, Any
 
-from agent_framework import tool
-from agent_framework.azure import AzureAIAgentsProvider
-from azure.ai.agents.aio import AgentsClient
-from azure.identity.aio import AzureCliCredential
 from pydantic import BaseModel, ConfigDict, Field
 
+from ..admission import AdmissionController
+from ..clients import AzureAgentsClients
+from ..conversations import Conversation
+from ..instrumentation import RunUsage, measure, parse_histogram
+from ..resilience import NO_RETRY, RUN, UpstreamResilience
+from .agent_pool import AgentPool
+
+if TYPE_CHECKING:
+    from agent_framework import AgentResponseUpdate, AgentThread, ChatAgent
+
 
 class calculator_response(BaseModel):
     """Structured calculator response"""
@@ -19,54 +30,182 @@ class calculator_response(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
 
+@dataclass
+class CalculatorUpdate:
+    """A progress update from a streamed calculator run."""
+
+    kind: str  # "tool_call", "tool_result", "text" or "final"
+    text: str | None = None
+    tool_name: str | None = None
+    arguments: Any = None
+    result: Any = None
+    response: calculator_response | None = None
+    served_by: str | None = None
+
+
+agent_instructions = """You are a calculator agent with access to the following tools:
+1. count_characters(phrase, characters, case_sensitive) - Counts several characters, or every character, of a phrase in one call
+2. square_root_of_count(character, phrase) - Counts a character in a phrase and returns the count together with its square root
+3. count_letters_in_phrases(character, phrases) - Counts a character in each of a list of phrases
+4. calculate_square_roots(numbers) - Calculates the square roots of a list of numbers
+5. count_letters(character, phrase) - Counts how many times a specific character appears in a word or phrase
+6. calculate_square_root(number) - Calculates the square root of a number
+
+IMPORTANT: You MUST use these tools to solve problems. Every tool call costs a round trip, so
+answer with as few calls as possible. Follow these rules:
+- When asked for the square root of a character count, call square_root_of_count once
+- When asked to count more than one character in a phrase (or all of its characters), call
+  count_characters once with all of them, instead of count_letters per character
+- When the same character has to be counted in several phrases, call count_letters_in_phrases once
+- When several square roots are needed, call calculate_square_roots once with all numbers
+- Only use count_letters and calculate_square_root for a single count or a single square root
+- Independent tool calls that are still needed can be requested in parallel, in one turn
+- NEVER guess or manually calculate - always use the provided tools
+- In your final response, explain which tools you used and show the chain of calculations
+"""
+
+
 class calculator:
-    async def run(self, question: str) -> calculator_response | None:
-        async with (
-            AzureCliCredential() as credential,
-            AgentsClient(
-                endpoint=os.environ["AZURE_AI_PROJECT_ENDPOINT"], credential=credential
-            ) as agents_client,
-            AzureAIAgentsProvider(credential=credential) as provider,
-        ):
-            agent_instructions = """You are a calculator agent with access to the following tools:
-            1. count_letters(character, phrase) - Counts how many times a specific character appears in a word or phrase
-            2. calculate_square_root(number) - Calculates the square root of a number
-            
-            IMPORTANT: You MUST use these tools to solve problems. Follow these rules:
-            - When asked to count characters/letters in a word or phrase, ALWAYS call the count_letters tool
-            - When asked to calculate square roots, ALWAYS call the calculate_square_root tool
-            - If a question requires multiple steps (e.g., "find the square root of the count"), call the tools in sequence:
-              * First, call count_letters to get the count
-              * Then, call calculate_square_root with the result from count_letters
-            - NEVER guess or manually calculate - always use the provided tools
-            - In your final response, explain which tools you used and show the chain of calculations
-            """
-
-            calculator_agent = await agents_client.create_agent(
-                model=os.environ["AZURE_AI_MODEL_DEPLOYMENT_NAME"],
-                name="CalculatorAgent",
-                instructions=agent_instructions,
-                # Adding this yields in an error `TypeError: ClientSession._request() got an unexpected keyword argument 'default_options'`.
-                # default_options={"response_format": calculator_response},
-                # Adding tools over here yields in a `Object of type FunctionTool is not JSON serializable`-error.
-                # tools= [count_letters]
+    def __init__(self, agent_pool: AgentPool, admission: AdmissionController | None = None):
+        self.agent_pool = agent_pool
+        self.admission = admission
+
+    def _admit(self, wait: bool = True) -> AbstractAsyncContextManager[None]:
+        return self.admission.admit(wait=wait) if self.admission is not None else nullcontext()
+
+    async def run(
+        self, question: str, conversation: Conversation | None = None
+    ) -> calculator_response | None:
+        # A stateless run can be hedged and retried. Running again on a conversation's
+        # thread would add the question to it twice.
+        async with self._admit():
+            return await self.agent_pool.resilience.call(
+                RUN,
+                partial(self._run, question, conversation),
+                hedge=conversation is None,
+                hedge_attempt=partial(self._hedge, question),
+                retry=NO_RETRY if conversation is not None else None,
             )
 
-            try:
-                agent = await provider.get_agent(
-                    calculator_agent.id, tools=[count_letters, calculate_square_root]
-                )
+    async def _hedge(self, question: str) -> calculator_response | None:
+        # A hedge is another run upstream, it is only sent when a slot is free right away.
+        async with self._admit(wait=False):
+            return await self._run(question, None)
 
-                answer = await agent.run(question, options={"response_format": calculator_response})
+    async def _run(
+        self, question: str, conversation: Conversation | None
+    ) -> calculator_response | None:
+        # Adding `default_options={"response_format": calculator_response}` when creating the agent
+        # yields in an error `TypeError: ClientSession._request() got an unexpected keyword argument
+        # 'default_options'`, so the response format is passed per run instead.
+        async with self.agent_pool.lease() as agent:
+            thread = _thread(agent, conversation)
+            with RunUsage().active() as usage:
+                answer = await agent.run(
+                    question, thread=thread, options={"response_format": calculator_response}
+                )
+            _remember_thread(conversation, thread)
+            usage.record(answer.usage_details)
+            with measure("calculator.parse_output", parse_histogram):
                 return answer.value
 
-            finally:
-                await agents_client.delete_agent(calculator_agent.id)
+    async def run_stream(
+        self, question: str, conversation: Conversation | None = None
+    ) -> AsyncIterator[CalculatorUpdate]:
+        """
+        Run the agent and yield tool calls and answer text as they are produced. A failed
+        run is only retried when it had not produced anything yet, and not on a conversation.
+        """
+        async with self._admit():
+            async for update in self.agent_pool.resilience.stream(
+                RUN,
+                partial(self._run_stream, question, conversation),
+                retry=NO_RETRY if conversation is not None else None,
+            ):
+                yield update
+
+    async def _run_stream(
+        self, question: str, conversation: Conversation | None
+    ) -> AsyncGenerator[CalculatorUpdate]:
+        async with self.agent_pool.lease() as agent:
+            thread = _thread(agent, conversation)
+            updates: list[AgentResponseUpdate] = []
+            usage = RunUsage()
+            async for update in usage.tracking(
+                agent.run_stream(
+                    question, thread=thread, options={"response_format": calculator_response}
+                )
+            ):
+                updates.append(update)
+                for content in update.contents:
+                    if content.type == "function_call":
+                        yield CalculatorUpdate(
+                            kind="tool_call", tool_name=content.name, arguments=content.arguments
+                        )
+                    elif content.type == "function_result":
+                        yield CalculatorUpdate(kind="tool_result", result=content.result)
+                if update.text:
+                    yield CalculatorUpdate(kind="text", text=update.text)
+
+            from agent_framework import AgentResponse
+
+            with measure("calculator.parse_output", parse_histogram):
+                answer = AgentResponse.from_agent_run_response_updates(
+                    updates, output_format_type=calculator_response
+                )
+                value = answer.value
+            _remember_thread(conversation, thread)
+            usage.record(answer.usage_details)
+            yield CalculatorUpdate(kind="final", response=value)
 
+
+def _thread(agent: "ChatAgent", conversation: Conversation | None) -> "AgentThread | None":
+    """
+    The thread that continues a conversation. Without one, or for its first message,
+    the service starts a new thread for the run.
+    """
+    if conversation is None:
         return None
+    return agent.get_new_thread(service_thread_id=conversation.thread_id)
+
+
+def _remember_thread(conversation: Conversation | None, thread: "AgentThread | None") -> None:
+    if conversation is not None and thread is not None:
+        conversation.thread_id = thread.service_thread_id
+
+
+def _agent_middleware() -> list[Any]:
+    from .middleware import LlmTurnMiddleware, ToolInvocationMiddleware
+
+    return [LlmTurnMiddleware(), ToolInvocationMiddleware()]
+
+
+def create_agent_pool(clients: AzureAgentsClients) -> AgentPool:
+    """Create the calculator agent pool, sized from the environment."""
+    return AgentPool(
+        name="CalculatorAgent",
+        instructions=agent_instructions,
+        # Plain functions are turned into tools, that never require approval, by the agent
+        # framework. Decorating them here would import the framework with this module.
+        tools=[
+            count_characters,
+            square_root_of_count,
+            count_letters_in_phrases,
+            calculate_square_roots,
+            count_letters,
+            calculate_square_root,
+        ],
+        clients=clients,
+        max_size=int(os.getenv("AGENT_POOL_MAX_SIZE", "4")),
+        min_size=int(os.getenv("AGENT_POOL_MIN_SIZE", "0")),
+        lease_timeout=float(os.getenv("AGENT_POOL_LEASE_TIMEOUT_SECONDS", "30")),
+        health_check_interval=float(os.getenv("AGENT_POOL_HEALTH_CHECK_INTERVAL_SECONDS", "60")),
+        retry_after=float(os.getenv("AGENT_ADMISSION_RETRY_AFTER_SECONDS", "1")),
+        middleware_factory=_agent_middleware,
+        resilience=UpstreamResilience.from_env(),
+    )
 
 
-@tool(approval_mode="never_require")
 def count_letters(
     character: Annotated[
         str, Field(description="The character that needs to be counted in the string.")
@@ -80,7 +219,6 @@ def count_letters(
     return counted_characters
 
 
-@tool(approval_mode="never_require")
 def calculate_square_root(
     number: Annotated[
         float, Field(description="The number you want the square root to be calculated for.")
@@ -89,3 +227,61 @@ def calculate_square_root(
     """Calculate the square root of the provided number and return it."""
     square_root = sqrt(number)
     return square_root
+
+
+def count_characters(
+    phrase: Annotated[str, Field(description="The word or phrase to count characters in.")],
+    characters: Annotated[
+        list[str] | None,
+        Field(description="The characters to count. Leave empty to count every character."),
+    ] = None,
+    case_sensitive: Annotated[
+        bool, Field(description="Whether 'A' and 'a' are counted separately.")
+    ] = True,
+) -> dict[str, int]:
+    """Count several characters, or all characters, of a word or phrase in a single pass"""
+    if not case_sensitive:
+        phrase = phrase.lower()
+    histogram = Counter(phrase)
+    if not characters:
+        return dict(histogram)
+    counts: dict[str, int] = {}
+    for character in characters:
+        key = character if case_sensitive else character.lower()
+        # Multi-character strings fall back to a substring count, like `count_letters`.
+        counts[character] = histogram[key] if len(key) == 1 else phrase.count(key)
+    return counts
+
+
+def square_root_of_count(
+    character: Annotated[
+        str, Field(description="The character that needs to be counted in the string.")
+    ],
+    phrase: Annotated[
+        str, Field(description="The word or phrase that needs its characters counted.")
+    ],
+) -> dict[str, float]:
+    """Count a character in a word or phrase and calculate the square root of that count"""
+    count = count_letters(character, phrase)
+    return {"count": count, "square_root": calculate_square_root(count)}
+
+
+def count_letters_in_phrases(
+    character: Annotated[
+        str, Field(description="The character that needs to be counted in every phrase.")
+    ],
+    phrases: Annotated[
+        list[str], Field(description="The words or phrases that need their characters counted.")
+    ],
+) -> list[int]:
+    """Count the number of specified characters in each of several words or phrases"""
+    return [count_letters(character, phrase) for phrase in phrases]
+
+
+def calculate_square_roots(
+    numbers: Annotated[
+        list[float], Field(description="The numbers you want the square roots calculated for.")
+    ],
+) -> list[float]:
+    """Calculate the square root of each of the provided numbers and return them in order."""
+    return [calculate_square_root(number) for number in numbers]
@@ -0,0 +1,128 @@
+import re
+from dataclasses import dataclass
+from enum import StrEnum
+
+from .calculator import calculate_square_root, calculator_response, count_letters
+
+
+class QuestionKind(StrEnum):
+    COUNT_LETTERS = "count_letters"
+    SQUARE_ROOT_OF_COUNT = "square_root_of_count"
+    SQUARE_ROOT = "square_root"
+
+
+@dataclass(frozen=True)
+class ClassifiedQuestion:
+    kind: QuestionKind
+    character: str | None = None
+    phrase: str | None = None
+    number: float | None = None
+
+
+# A single character, optionally quoted, optionally followed by a plural "s" / "'s".
+_CHARACTER = r"""(?:the\s+)?(?:letters?\s+|characters?\s+)?(?P<q1>['"]?)(?P<character>[^\s'"])(?P=q1)(?:'s|s)?"""
+# The phrase must be quoted, or a single word, so we never have to guess where it ends.
+_PHRASE = r"""(?:the\s+)?(?:word|phrase|string|sentence|text)?\s*(?:(?P<q2>['"])(?P<quoted>[^'"]+)(?P=q2)|(?P<word>[^\s'"?.!,]+))"""
+_COUNT_FORMS = (
+    rf"how\s+many\s+(?:times\s+)?(?:does\s+|do\s+|is\s+|are\s+)?{_CHARACTER}"
+    rf"\s+(?:are\s+|is\s+|does\s+)?(?:there\s+)?(?:appear\s+|occur\s+|show\s+up\s+)?in\s+{_PHRASE}",
+    rf"count\s+(?:the\s+)?(?:number\s+of\s+)?{_CHARACTER}\s+in\s+{_PHRASE}",
+)
+_THEN_SQUARE_ROOT = (
+    r"\s*[?.,]?\s*(?:and|then|and\s+then)\s+"
+    r"(?:what\s+is\s+|calculate\s+|take\s+|find\s+|give\s+me\s+)?the\s+square\s+root"
+    r"(?:\s+of\s+(?:that|it|the\s+count|the\s+result|that\s+number))?"
+)
+_END = r"\s*[?.!]?\s*$"
+
+_COUNT_RES = [re.compile(rf"^\s*{form}{_END}", re.IGNORECASE) for form in _COUNT_FORMS]
+_COUNT_THEN_SQUARE_ROOT_RES = [
+    re.compile(rf"^\s*{form}{_THEN_SQUARE_ROOT}{_END}", re.IGNORECASE) for form in _COUNT_FORMS
+]
+_SQUARE_ROOT_OF_COUNT_RE = re.compile(
+    rf"^\s*(?:what\s+is\s+|what's\s+|calculate\s+|find\s+)?the\s+square\s+root\s+of\s+"
+    rf"(?:the\s+)?(?:number|count|amount)\s+of\s+{_CHARACTER}\s+in\s+{_PHRASE}{_END}",
+    re.IGNORECASE,
+)
+_SQUARE_ROOT_RE = re.compile(
+    rf"^\s*(?:what\s+is\s+|what's\s+|calculate\s+|find\s+)?the\s+square\s+root\s+of\s+"
+    rf"(?P<number>\d+(?:\.\d+)?){_END}",
+    re.IGNORECASE,
+)
+
+
+def _count_question(kind: QuestionKind, match: re.Match[str]) -> ClassifiedQuestion | None:
+    character = match.group("character")
+    phrase = match.group("quoted") or match.group("word")
+    # `count_letters` is case-sensitive. When the other case also occurs in the phrase the
+    # intended answer is ambiguous, so leave the interpretation to the agent.
+    if character.swapcase() != character and character.swapcase() in phrase:
+        return None
+    return ClassifiedQuestion(kind=kind, character=character, phrase=phrase)
+
+
+def classify_question(question: str) -> ClassifiedQuestion | None:
+    """
+    Recognize the question shapes the calculator tools can answer on their own.
+    Returns None for anything that is not an exact match, those go to the agent.
+    """
+    for pattern in _COUNT_RES:
+        if match := pattern.match(question):
+            return _count_question(QuestionKind.COUNT_LETTERS, match)
+    for pattern in (_SQUARE_ROOT_OF_COUNT_RE, *_COUNT_THEN_SQUARE_ROOT_RES):
+        if match := pattern.match(question):
+            return _count_question(QuestionKind.SQUARE_ROOT_OF_COUNT, match)
+    if match := _SQUARE_ROOT_RE.match(question):
+        return ClassifiedQuestion(
+            kind=QuestionKind.SQUARE_ROOT, number=float(match.group("number"))
+        )
+    return None
+
+
+def solve(classified: ClassifiedQuestion) -> calculator_response:
+    """Run the calculator tools directly for a classified question."""
+    if classified.kind == QuestionKind.SQUARE_ROOT:
+        number = classified.number
+        if number is None:
+            raise ValueError("A square root question needs a number")
+        square_root = calculate_square_root(number)
+        return calculator_response(
+            final_number=square_root,
+            reasoning="The question asks for the square root of a number, "
+            "so I called calculate_square_root.",
+            chain_of_thought=f"calculate_square_root(number={number:g}) = {square_root}",
+            answer=f"The square root of {number:g} is {square_root}.",
+        )
+
+    character, phrase = classified.character, classified.phrase
+    if character is None or phrase is None:
+        raise ValueError("A letter counting question needs a character and a phrase")
+    count = count_letters(character, phrase)
+    count_step = f"count_letters(character='{character}', phrase='{phrase}') = {count}"
+    if classified.kind == QuestionKind.COUNT_LETTERS:
+        return calculator_response(
+            final_number=count,
+            reasoning=f"The question asks how often '{character}' appears in "
+            f"'{phrase}', so I called count_letters.",
+            chain_of_thought=count_step,
+            answer=f"'{character}' appears {count} time(s) in '{phrase}'.",
+        )
+
+    square_root = calculate_square_root(count)
+    return calculator_response(
+        final_number=square_root,
+        reasoning=f"The question asks for the square root of how often '{character}' "
+        f"appears in '{phrase}', so I called count_letters and then "
+        "calculate_square_root with its result.",
+        chain_of_thought=f"{count_step}; calculate_square_root(number={count}) = {square_root}",
+        answer=f"'{character}' appears {count} time(s) in '{phrase}', "
+        f"and the square root of {count} is {square_root}.",
+    )
+
+
+def try_fast_path(question: str) -> calculator_response | None:
+    """Answer the question locally when it is recognized, otherwise return None."""
+    classified = classify_question(question)
+    if classified is None:
+        return None
+    return solve(classified)
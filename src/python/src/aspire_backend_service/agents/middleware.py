@@ -0,0 +1,71 @@
+import time
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable
+from typing import Any
+
+from agent_framework import (
+    ChatContext,
+    ChatMiddleware,
+    FunctionInvocationContext,
+    FunctionMiddleware,
+)
+from opentelemetry.trace import Span, Status, StatusCode
+
+from ..instrumentation import RunUsage, llm_turn_histogram, measure, tool_histogram, tracer
+
+
+class LlmTurnMiddleware(ChatMiddleware):
+    """Times every chat client call, which is one LLM turn of the function-calling loop."""
+
+    async def process(
+        self, context: ChatContext, next: Callable[[ChatContext], Awaitable[None]]
+    ) -> None:
+        if (usage := RunUsage.current()) is not None:
+            usage.turns += 1
+        if not context.is_streaming:
+            with measure(
+                "calculator.llm_turn", llm_turn_histogram, {"calculator.streaming": False}
+            ):
+                await next(context)
+            return
+
+        started = time.perf_counter()
+        span = tracer.start_span("calculator.llm_turn")
+        try:
+            await next(context)
+        except Exception:
+            span.end()
+            raise
+        if isinstance(context.result, AsyncIterable):
+            context.result = self._measure_stream(context.result, span, started)
+        else:
+            span.end()
+
+    @staticmethod
+    async def _measure_stream(
+        updates: AsyncIterable[Any], span: Span, started: float
+    ) -> AsyncIterator[Any]:
+        # A streamed turn lasts until its updates have been consumed.
+        attributes: dict[str, Any] = {"calculator.streaming": True}
+        try:
+            async for update in updates:
+                yield update
+        except Exception as e:
+            attributes["error.type"] = type(e).__name__
+            span.set_status(Status(StatusCode.ERROR, str(e)))
+            raise
+        finally:
+            span.set_attributes(attributes)
+            span.end()
+            llm_turn_histogram.record(time.perf_counter() - started, attributes)
+
+
+class ToolInvocationMiddleware(FunctionMiddleware):
+    """Times every tool invocation requested by the agent."""
+
+    async def process(
+        self,
+        context: FunctionInvocationContext,
+        next: Callable[[FunctionInvocationContext], Awaitable[None]],
+    ) -> None:
+        with measure("calculator.tool", tool_histogram, {"tool.name": context.function.name}):
+            await next(context)
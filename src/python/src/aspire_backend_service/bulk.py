@@ -0,0 +1,273 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from .agents.answering import Answer
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BulkResult:
+    """Outcome of one question in a bulk run. `index` is its position in the input."""
+
+    index: int
+    answer: Answer | None = None
+    error: str | None = None
+    timed_out: bool = False
+    duration: float = 0.0
+
+
+class LatencyReservoir:
+    """
+    Latency sample of bounded size (reservoir sampling), so percentiles stay exact
+    for runs up to `capacity` items and memory stays flat for larger ones.
+    """
+
+    def __init__(self, capacity: int = 10_000):
+        self.capacity = capacity
+        self.count = 0
+        self.maximum = 0.0
+        self._samples: list[float] = []
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.maximum = max(self.maximum, value)
+        if len(self._samples) < self.capacity:
+            self._samples.append(value)
+        elif (slot := random.randrange(self.count)) < self.capacity:
+            self._samples[slot] = value
+
+    def percentile(self, percent: float) -> float:
+        """Nearest-rank percentile of the sampled latencies, 0 when nothing was recorded."""
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        rank = max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered)) - 1))
+        return ordered[rank]
+
+
+@dataclass
+class BulkSummary:
+    total: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    timed_out: int = 0
+    duration: float = 0.0
+    latencies: LatencyReservoir = field(default_factory=LatencyReservoir)
+
+    def add(self, result: BulkResult) -> None:
+        self.total += 1
+        if result.timed_out:
+            self.timed_out += 1
+        elif result.error is not None:
+            self.failed += 1
+        else:
+            self.succeeded += 1
+            self.latencies.add(result.duration)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "total": self.total,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "timedOut": self.timed_out,
+            "durationSeconds": round(self.duration, 3),
+            "throughputPerSecond": round(self.total / self.duration, 3) if self.duration else 0.0,
+            "latencyMs": {
+                "p50": round(self.latencies.percentile(50) * 1000, 1),
+                "p90": round(self.latencies.percentile(90) * 1000, 1),
+                "p99": round(self.latencies.percentile(99) * 1000, 1),
+                "max": round(self.latencies.maximum * 1000, 1),
+            },
+        }
+
+
+def _decode_line(line: bytes) -> str | ValueError:
+    try:
+        return line.decode()
+    except UnicodeDecodeError as e:
+        return ValueError(f"Invalid request line: not UTF-8 ({e.reason})")
+
+
+async def iter_ndjson_lines(
+    chunks: AsyncIterable[bytes], max_line_bytes: int = 64 * 1024
+) -> AsyncIterator[str | ValueError]:
+    """
+    Split a byte stream into its non-empty lines, without reading it all first.
+    Lines that are not valid UTF-8, or longer than `max_line_bytes`, come out as a
+    `ValueError`, the other lines still count. Only one line is buffered at a time.
+    """
+    buffer = bytearray()
+    # The rest of a line that is too long is skipped up to its newline.
+    skipping = False
+    async for chunk in chunks:
+        view = memoryview(chunk)
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            piece = view[start:] if end == -1 else view[start:end]
+            if not skipping:
+                if len(buffer) + len(piece) > max_line_bytes:
+                    buffer.clear()
+                    skipping = True
+                    yield ValueError(f"Invalid request line: longer than {max_line_bytes} bytes")
+                else:
+                    buffer += piece
+            if end == -1:
+                break
+            if not skipping and buffer.strip():
+                yield _decode_line(bytes(buffer))
+            buffer.clear()
+            skipping = False
+            start = end + 1
+    if not skipping and buffer.strip():
+        yield _decode_line(bytes(buffer))
+
+
+class BulkRunner:
+    """
+    Answers a stream of questions with at most `concurrency` in flight, yielding
+    each result as soon as it finishes. Input is only read when a slot frees up,
+    so memory does not grow with the size of the input.
+    """
+
+    def __init__(self, *, concurrency: int = 8, item_timeout: float = 120.0):
+        self.concurrency = concurrency
+        self.item_timeout = item_timeout
+
+    @classmethod
+    def from_env(cls) -> "BulkRunner":
+        return cls(
+            concurrency=int(os.getenv("BULK_CONCURRENCY", "8")),
+            item_timeout=float(os.getenv("BULK_ITEM_TIMEOUT_SECONDS", "120")),
+        )
+
+    async def run(
+        self,
+        questions: AsyncIterable[str | ValueError],
+        answer: Callable[[str], Awaitable[Answer]],
+        summary: BulkSummary,
+    ) -> AsyncIterator[BulkResult]:
+        """
+        Yield a result per question, in completion order. Inputs that could not be
+        parsed are passed in as a `ValueError` and come back as failed results.
+        `summary` is filled in along the way.
+        """
+        started = time.perf_counter()
+        pending: set[asyncio.Task[BulkResult]] = set()
+        source = aiter(questions)
+        index = 0
+        exhausted = False
+        try:
+            while not exhausted or pending:
+                while not exhausted and len(pending) < self.concurrency:
+                    try:
+                        question = await anext(source)
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    if isinstance(question, ValueError):
+                        result = BulkResult(index=index, error=str(question))
+                        summary.add(result)
+                        yield result
+                    else:
+                        pending.add(asyncio.create_task(self._answer(index, question, answer)))
+                    index += 1
+
+                if not pending:
+                    continue
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    summary.add(result)
+                    yield result
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            summary.duration = time.perf_counter() - started
+
+    async def _answer(
+        self, index: int, question: str, answer: Callable[[str], Awaitable[Answer]]
+    ) -> BulkResult:
+        started = time.perf_counter()
+        try:
+            async with asyncio.timeout(self.item_timeout):
+                result = BulkResult(index=index, answer=await answer(question))
+        except TimeoutError:
+            result = BulkResult(index=index, error="Timed out", timed_out=True)
+        except Exception as e:
+            logger.warning("Bulk question %d failed: %s", index, e)
+            result = BulkResult(index=index, error=str(e))
+        result.duration = time.perf_counter() - started
+        return result
+
+
+class DuplexNdjsonResponse(Response):
+    """
+    NDJSON response that keeps reading the request body while results stream out.
+    Starlette's StreamingResponse reads `receive` itself to notice disconnects, which
+    races with reading an upload, so this response owns `receive` and handles both:
+    body chunks go through a small bounded queue, a disconnect stops the writer.
+    """
+
+    media_type = "application/x-ndjson"
+
+    def __init__(
+        self,
+        lines: Callable[[AsyncIterator[bytes]], AsyncIterator[bytes]],
+        max_buffered_chunks: int = 8,
+    ):
+        self.lines = lines
+        self.max_buffered_chunks = max_buffered_chunks
+        self.status_code = 200
+        self.background = None
+        self.init_headers()
+
+    async def __call__(self, _scope: Scope, receive: Receive, send: Send) -> None:
+        chunks: asyncio.Queue[bytes | None] = asyncio.Queue(maxsize=self.max_buffered_chunks)
+        writer = asyncio.create_task(self._write(send, self._body(chunks)))
+        reader = asyncio.create_task(self._read(receive, chunks, writer))
+        try:
+            await asyncio.wait({writer})
+        finally:
+            reader.cancel()
+            writer.cancel()
+            await asyncio.gather(reader, writer, return_exceptions=True)
+        if not writer.cancelled():
+            writer.result()
+
+    async def _read(
+        self, receive: Receive, chunks: asyncio.Queue[bytes | None], writer: asyncio.Task
+    ) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                logger.info("Client disconnected, stopping the bulk run")
+                writer.cancel()
+                return
+            await chunks.put(message.get("body", b""))
+            if not message.get("more_body", False):
+                await chunks.put(None)
+
+    @staticmethod
+    async def _body(chunks: asyncio.Queue[bytes | None]) -> AsyncIterator[bytes]:
+        while (chunk := await chunks.get()) is not None:
+            yield chunk
+
+    async def _write(self, send: Send, body: AsyncIterator[bytes]) -> None:
+        await send(
+            {"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers}
+        )
+        async for line in self.lines(body):
+            await send({"type": "http.response.body", "body": line, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
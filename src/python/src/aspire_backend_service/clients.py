@@ -0,0 +1,231 @@
+import asyncio
+import contextlib
+import logging
+import os
+import time
+from typing import TYPE_CHECKING, Any
+
+from azure.core.credentials import AccessToken
+from azure.core.credentials_async import AsyncTokenCredential
+
+from .instrumentation import measure, token_duration_histogram
+
+if TYPE_CHECKING:
+    import aiohttp
+    from agent_framework.azure import AzureAIAgentsProvider
+    from azure.ai.agents.aio import AgentsClient
+
+logger = logging.getLogger(__name__)
+
+# The scope `AgentsClient` requests tokens for, so a token acquired up front is reused.
+AGENTS_CREDENTIAL_SCOPE = "https://ai.azure.com/.default"
+# Imported by `AzureAgentsClients.open()`, and ahead of time by the warm-up.
+SDK_MODULES = (
+    "aiohttp",
+    "agent_framework.azure",
+    "azure.ai.agents.aio",
+    "azure.core.pipeline.transport",
+    "azure.identity.aio",
+)
+
+
+class CachedTokenCredential(AsyncTokenCredential):
+    """
+    Wraps an async credential and keeps its access tokens in process.
+
+    Tokens are served from the cache until they get within `refresh_margin` seconds of
+    their expiry. A background task refreshes them before that happens, so requests never
+    wait for the wrapped credential (for `AzureCliCredential` a shell-out to `az`).
+    """
+
+    def __init__(self, credential: AsyncTokenCredential, refresh_margin: float = 300.0):
+        self._credential = credential
+        self.refresh_margin = refresh_margin
+        self._tokens: dict[tuple[str, ...], AccessToken] = {}
+        self._lock = asyncio.Lock()
+        self._refresh_task: asyncio.Task | None = None
+
+    async def get_token(
+        self,
+        *scopes: str,
+        claims: str | None = None,
+        tenant_id: str | None = None,
+        enable_cae: bool = False,
+        **kwargs: Any,
+    ) -> AccessToken:
+        attributes: dict[str, Any] = {"credential.cached": False}
+        with measure("credential.get_token", token_duration_histogram, attributes):
+            if claims or tenant_id or enable_cae:
+                # Claims challenges and tenant overrides always need a fresh token.
+                return await self._credential.get_token(
+                    *scopes, claims=claims, tenant_id=tenant_id, enable_cae=enable_cae, **kwargs
+                )
+
+            token = self._tokens.get(scopes)
+            if token is not None and not self._expires_soon(token):
+                attributes["credential.cached"] = True
+                return token
+
+            async with self._lock:
+                token = self._tokens.get(scopes)
+                if token is None or self._expires_soon(token):
+                    token = await self._credential.get_token(*scopes, **kwargs)
+                    self._tokens[scopes] = token
+                else:
+                    attributes["credential.cached"] = True
+        self._ensure_refreshing()
+        return token
+
+    async def close(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._refresh_task
+            self._refresh_task = None
+        await self._credential.close()
+
+    async def __aenter__(self) -> "CachedTokenCredential":
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.close()
+
+    def _expires_soon(self, token: AccessToken) -> bool:
+        return token.expires_on - time.time() <= self.refresh_margin
+
+    def _ensure_refreshing(self) -> None:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def _refresh_loop(self) -> None:
+        while self._tokens:
+            # Wake up a little before the earliest token enters its refresh margin.
+            next_expiry = min(token.expires_on for token in self._tokens.values())
+            delay = next_expiry - self.refresh_margin * 1.5 - time.time()
+            await asyncio.sleep(max(delay, 10.0))
+
+            for scopes, token in list(self._tokens.items()):
+                if token.expires_on - time.time() > self.refresh_margin * 1.5:
+                    continue
+                try:
+                    async with self._lock:
+                        self._tokens[scopes] = await self._credential.get_token(*scopes)
+                    logger.debug("Refreshed access token for scopes %s", scopes)
+                except Exception as e:
+                    # Requests fall back to acquiring the token themselves once it expires.
+                    logger.warning("Background token refresh failed for %s: %s", scopes, e)
+
+
+def _opened[T](client: T | None) -> T:
+    if client is None:
+        raise RuntimeError("The Azure AI Agents clients are not open, call open() first")
+    return client
+
+
+class AzureAgentsClients:
+    """
+    Application-scoped credential, `AgentsClient` and `AzureAIAgentsProvider`.
+
+    All upstream calls share one pooled aiohttp session with keep-alive, and a single
+    cached credential. The clients, and the SDKs behind them, are only imported and
+    opened on first use and closed by the application lifespan.
+    """
+
+    def __init__(
+        self,
+        endpoint: str | None = None,
+        *,
+        connection_limit: int = 100,
+        connection_limit_per_host: int = 0,
+        keepalive_timeout: float = 30.0,
+        token_refresh_margin: float = 300.0,
+    ):
+        self.endpoint = endpoint
+        self.connection_limit = connection_limit
+        self.connection_limit_per_host = connection_limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.token_refresh_margin = token_refresh_margin
+
+        self._credential: CachedTokenCredential | None = None
+        self._agents_client: AgentsClient | None = None
+        self._provider: AzureAIAgentsProvider | None = None
+        self._session: aiohttp.ClientSession | None = None
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def from_env(cls) -> "AzureAgentsClients":
+        return cls(
+            endpoint=os.getenv("AZURE_AI_PROJECT_ENDPOINT"),
+            connection_limit=int(os.getenv("AZURE_HTTP_CONNECTION_LIMIT", "100")),
+            connection_limit_per_host=int(os.getenv("AZURE_HTTP_CONNECTION_LIMIT_PER_HOST", "0")),
+            keepalive_timeout=float(os.getenv("AZURE_HTTP_KEEPALIVE_SECONDS", "30")),
+            token_refresh_margin=float(os.getenv("AZURE_TOKEN_REFRESH_MARGIN_SECONDS", "300")),
+        )
+
+    @property
+    def is_open(self) -> bool:
+        return self._agents_client is not None
+
+    @property
+    def credential(self) -> CachedTokenCredential:
+        return _opened(self._credential)
+
+    @property
+    def agents_client(self) -> "AgentsClient":
+        return _opened(self._agents_client)
+
+    @property
+    def provider(self) -> "AzureAIAgentsProvider":
+        return _opened(self._provider)
+
+    async def open(self) -> "AzureAgentsClients":
+        """Create the shared session and clients if that has not happened yet."""
+        if self.is_open:
+            return self
+
+        async with self._lock:
+            if self.is_open:
+                return self
+            if not self.endpoint:
+                raise RuntimeError("AZURE_AI_PROJECT_ENDPOINT is not configured")
+
+            # These take seconds to import, keep them off the application's startup path.
+            import aiohttp
+            from agent_framework.azure import AzureAIAgentsProvider
+            from azure.ai.agents.aio import AgentsClient
+            from azure.core.pipeline.transport import AioHttpTransport
+            from azure.identity.aio import AzureCliCredential
+
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.connection_limit,
+                    limit_per_host=self.connection_limit_per_host,
+                    keepalive_timeout=self.keepalive_timeout,
+                )
+            )
+            self._credential = CachedTokenCredential(
+                AzureCliCredential(), refresh_margin=self.token_refresh_margin
+            )
+            self._agents_client = AgentsClient(
+                endpoint=self.endpoint,
+                credential=self._credential,
+                transport=AioHttpTransport(session=self._session, session_owner=False),
+            )
+            self._provider = AzureAIAgentsProvider(agents_client=self._agents_client)
+            logger.info(
+                "Opened Azure AI Agents clients (connection limit %d, keep-alive %.0fs)",
+                self.connection_limit,
+                self.keepalive_timeout,
+            )
+        return self
+
+    async def close(self) -> None:
+        if self._provider is not None:
+            await self._provider.close()
+        if self._agents_client is not None:
+            await self._agents_client.close()
+        if self._credential is not None:
+            await self._credential.close()
+        if self._session is not None:
+            await self._session.close()
+        self._provider = self._agents_client = self._credential = self._session = None
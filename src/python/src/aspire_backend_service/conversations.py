@@ -0,0 +1,267 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from contextlib import AbstractAsyncContextManager, asynccontextmanager, nullcontext
+from dataclasses import dataclass, field
+
+from opentelemetry import metrics
+
+from .clients import AzureAgentsClients
+from .instrumentation import agent_operation_histogram, measure
+
+logger = logging.getLogger(__name__)
+
+# Rough per-entry cost of the map, the entry, its lock and the OrderedDict links, in bytes
+ENTRY_OVERHEAD = 600
+
+meter = metrics.get_meter(__name__)
+conversations_counter = meter.create_up_down_counter(
+    "conversations.size", unit="{conversation}", description="Conversations currently tracked"
+)
+lookups_counter = meter.create_counter(
+    "conversations.lookups",
+    unit="{lookup}",
+    description="Messages carrying a context, by whether they continued an existing thread",
+)
+evictions_counter = meter.create_counter(
+    "conversations.evictions",
+    unit="{conversation}",
+    description="Conversations forgotten, by reason",
+)
+cleanup_dropped_counter = meter.create_counter(
+    "conversations.cleanup_dropped",
+    unit="{thread}",
+    description="Evicted threads left upstream because the cleanup queue was full",
+)
+
+
+@dataclass(eq=False)
+class Conversation:
+    """An A2A context and the upstream agent thread that holds its history."""
+
+    context_id: str
+    thread_id: str | None = None
+    last_used: float = field(default_factory=time.monotonic)
+    users: int = 0
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+    @property
+    def size(self) -> int:
+        """Approximate memory held by the entry, in bytes."""
+        return ENTRY_OVERHEAD + len(self.context_id) + len(self.thread_id or "")
+
+
+class ConversationStore:
+    """
+    Maps A2A context ids to the agent threads that continue them, so a follow-up
+    message only sends itself upstream instead of starting a new thread.
+
+    Runs in one conversation are serialized, the service does not allow concurrent
+    runs on a thread. Conversations are forgotten when they have been idle for
+    `idle_ttl` seconds, and the least recently used ones when there are more than
+    `max_entries` or they hold more than `max_bytes`; conversations in use are never
+    evicted. The threads of forgotten conversations are deleted upstream by a
+    background worker, off the request path.
+    """
+
+    def __init__(
+        self,
+        clients: AzureAgentsClients,
+        *,
+        max_entries: int = 10_000,
+        max_bytes: int = 16 * 1024 * 1024,
+        idle_ttl: float = 1800.0,
+        sweep_interval: float = 60.0,
+        cleanup_queue_size: int = 1000,
+        close_timeout: float = 10.0,
+    ):
+        self.clients = clients
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self.sweep_interval = sweep_interval
+        self.close_timeout = close_timeout
+        self._entries: OrderedDict[str, Conversation] = OrderedDict()
+        self._bytes = 0
+        self._cleanup: asyncio.Queue[str] = asyncio.Queue(maxsize=cleanup_queue_size)
+        self._tasks: list[asyncio.Task] = []
+
+    @classmethod
+    def from_env(cls, clients: AzureAgentsClients) -> "ConversationStore | None":
+        """Create the store from the environment, or None when context reuse is disabled."""
+        if os.getenv("A2A_CONTEXT_REUSE_ENABLED", "true").lower() != "true":
+            return None
+        return cls(
+            clients,
+            max_entries=int(os.getenv("A2A_CONTEXT_MAX_ENTRIES", "10000")),
+            max_bytes=int(os.getenv("A2A_CONTEXT_MAX_BYTES", str(16 * 1024 * 1024))),
+            idle_ttl=float(os.getenv("A2A_CONTEXT_IDLE_TTL_SECONDS", "1800")),
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def bytes(self) -> int:
+        """Approximate memory held by the tracked conversations, in bytes."""
+        return self._bytes
+
+    @property
+    def pending_cleanup(self) -> int:
+        return self._cleanup.qsize()
+
+    def start(self) -> None:
+        self._tasks = [
+            asyncio.create_task(self._sweep(), name="conversation-sweeper"),
+            asyncio.create_task(self._clean_up(), name="conversation-cleanup"),
+        ]
+
+    async def close(self) -> None:
+        """
+        Forget all conversations and delete their threads upstream, for up to
+        `close_timeout` seconds. The map does not survive a restart, so the threads
+        could not be continued anyway.
+        """
+        for conversation in list(self._entries.values()):
+            self._evict(conversation, "shutdown")
+        if self._tasks:
+            try:
+                async with asyncio.timeout(self.close_timeout):
+                    await self._cleanup.join()
+            except TimeoutError:
+                logger.warning(
+                    "Closing with %d conversation thread(s) not deleted", self._cleanup.qsize()
+                )
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    @asynccontextmanager
+    async def use(self, context_id: str) -> AsyncIterator[Conversation]:
+        """
+        The conversation of a context, held exclusively for the `async with` block. Set
+        its `thread_id` to the thread the run used. A failed run leaves the thread in an
+        unknown state, so the conversation is forgotten and the next message starts over.
+        """
+        conversation = await self._acquire(context_id)
+        thread_id, size = conversation.thread_id, conversation.size
+        failed = False
+        try:
+            yield conversation
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            conversation.last_used = time.monotonic()
+            conversation.users -= 1
+            conversation.lock.release()
+            if self._entries.get(context_id) is conversation:
+                self._bytes += conversation.size - size
+                if failed:
+                    self._evict(conversation, "failed")
+            elif conversation.thread_id != thread_id:
+                # Forgotten on shutdown while the run created its thread.
+                self._discard_thread(conversation.thread_id)
+        self._evict_over_capacity()
+
+    async def _acquire(self, context_id: str) -> Conversation:
+        while True:
+            conversation = self._lookup(context_id)
+            conversation.users += 1
+            try:
+                await conversation.lock.acquire()
+            except BaseException:
+                conversation.users -= 1
+                raise
+            if self._entries.get(context_id) is conversation:
+                return conversation
+            # The previous run failed and the conversation was forgotten while waiting.
+            conversation.users -= 1
+            conversation.lock.release()
+
+    def _lookup(self, context_id: str) -> Conversation:
+        conversation = self._entries.get(context_id)
+        if conversation is not None and self._is_idle(conversation, time.monotonic()):
+            self._evict(conversation, "idle")
+            conversation = None
+        if conversation is not None:
+            self._entries.move_to_end(context_id)
+            lookups_counter.add(1, {"conversation.reused": conversation.thread_id is not None})
+            return conversation
+
+        lookups_counter.add(1, {"conversation.reused": False})
+        conversation = Conversation(context_id)
+        self._entries[context_id] = conversation
+        self._bytes += conversation.size
+        conversations_counter.add(1)
+        return conversation
+
+    def _is_idle(self, conversation: Conversation, now: float) -> bool:
+        return conversation.users == 0 and now - conversation.last_used >= self.idle_ttl
+
+    def _evict_over_capacity(self) -> None:
+        for conversation in list(self._entries.values()):
+            if len(self._entries) <= self.max_entries and self._bytes <= self.max_bytes:
+                return
+            if conversation.users == 0:
+                reason = "capacity" if len(self._entries) > self.max_entries else "memory"
+                self._evict(conversation, reason)
+
+    def _evict(self, conversation: Conversation, reason: str) -> None:
+        if self._entries.get(conversation.context_id) is not conversation:
+            return
+        del self._entries[conversation.context_id]
+        self._bytes -= conversation.size
+        conversations_counter.add(-1)
+        evictions_counter.add(1, {"reason": reason})
+        self._discard_thread(conversation.thread_id)
+
+    def _discard_thread(self, thread_id: str | None) -> None:
+        if thread_id is None:
+            return
+        try:
+            self._cleanup.put_nowait(thread_id)
+        except asyncio.QueueFull:
+            cleanup_dropped_counter.add(1)
+            logger.warning("Cleanup queue is full, thread %s is left upstream", thread_id)
+
+    async def _sweep(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            now = time.monotonic()
+            for conversation in list(self._entries.values()):
+                if self._is_idle(conversation, now):
+                    self._evict(conversation, "idle")
+
+    async def _clean_up(self) -> None:
+        while True:
+            thread_id = await self._cleanup.get()
+            try:
+                await self._delete_thread(thread_id)
+            finally:
+                self._cleanup.task_done()
+
+    async def _delete_thread(self, thread_id: str) -> None:
+        try:
+            clients = await self.clients.open()
+            with measure(
+                "agent.thread.delete",
+                agent_operation_histogram,
+                {"agent.operation": "delete_thread"},
+            ):
+                await clients.agents_client.threads.delete(thread_id)
+        except Exception as e:
+            logger.warning("Failed to delete conversation thread %s: %s", thread_id, e)
+
+
+def use_conversation(
+    conversations: ConversationStore | None, context_id: str | None
+) -> AbstractAsyncContextManager[Conversation | None]:
+    """The conversation a message continues, when it names a context and reuse is enabled."""
+    if conversations is None or context_id is None:
+        return nullcontext()
+    return conversations.use(context_id)
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import math
+import os
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable
+from dataclasses import dataclass
+from typing import Any
+
+from opentelemetry import metrics
+from starlette.requests import Request
+
+logger = logging.getLogger(__name__)
+
+# Request header carrying the client's timeout in seconds
+TIMEOUT_HEADER = "X-Request-Timeout"
+# A2A `message/send` and `message/stream` metadata key with the same meaning
+TIMEOUT_METADATA_KEY = "timeoutSeconds"
+
+DEADLINE = "deadline"
+DISCONNECT = "disconnect"
+
+meter = metrics.get_meter(__name__)
+cancelled_counter = meter.create_counter(
+    "requests.cancelled",
+    unit="{request}",
+    description="Answers abandoned before they finished, by reason (deadline or disconnect)",
+)
+
+
+class RequestCancelledError(Exception):
+    """Raised when work is cancelled because its deadline passed or its client went away."""
+
+    def __init__(self, reason: str):
+        self.reason = reason
+        message = "Deadline exceeded" if reason == DEADLINE else "Client disconnected"
+        super().__init__(message)
+
+
+def record_cancelled(reason: str, route: str) -> None:
+    cancelled_counter.add(1, {"cancel.reason": reason, "http.route": route})
+    logger.info("Cancelled %s: %s", route, reason)
+
+
+@dataclass
+class DeadlinePolicy:
+    """
+    How long a request may take. Clients ask for less (or more) with a timeout in
+    seconds, which is capped at `max_timeout`; `default_timeout` applies otherwise.
+    """
+
+    default_timeout: float = 120.0
+    max_timeout: float = 600.0
+
+    @classmethod
+    def from_env(cls) -> "DeadlinePolicy":
+        return cls(
+            default_timeout=float(os.getenv("REQUEST_TIMEOUT_SECONDS", "120")),
+            max_timeout=float(os.getenv("REQUEST_MAX_TIMEOUT_SECONDS", "600")),
+        )
+
+    def timeout(self, requested: Any = None) -> float:
+        """The timeout for a requested one, ignoring values that are not positive numbers."""
+        try:
+            timeout = float(requested)
+        except (TypeError, ValueError):
+            return self.default_timeout
+        if not math.isfinite(timeout) or timeout <= 0:
+            return self.default_timeout
+        return min(timeout, self.max_timeout)
+
+    def deadline(self, requested: Any = None, *, not_after: float | None = None) -> float:
+        """The event loop time work has to finish by, at the latest `not_after`."""
+        deadline = asyncio.get_running_loop().time() + self.timeout(requested)
+        return deadline if not_after is None else min(deadline, not_after)
+
+
+async def _wait_for_disconnect(request: Request) -> None:
+    # Only used once the body has been read, so any other message can be skipped.
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+
+def _retrieve_result(task: asyncio.Future) -> None:
+    if not task.cancelled():
+        task.exception()
+
+
+async def run_cancellable[T](
+    work: Awaitable[T], request: Request, route: str, deadline: float | None = None
+) -> T:
+    """
+    Await `work` until it completes, the `deadline` (in event loop time) passes, or the
+    client disconnects, whichever comes first. In the latter two cases the work is
+    cancelled and unwinds in the background (releasing its agent lease and conversation),
+    and RequestCancelledError is raised right away. The request body must have been read.
+    """
+    run = asyncio.ensure_future(work)
+    disconnected = asyncio.create_task(_wait_for_disconnect(request))
+    timeout = None if deadline is None else max(0.0, deadline - asyncio.get_running_loop().time())
+    try:
+        done, _ = await asyncio.wait(
+            {run, disconnected}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+        )
+    finally:
+        disconnected.cancel()
+        if not run.done():
+            run.cancel()
+            run.add_done_callback(_retrieve_result)
+
+    if run in done:
+        return run.result()
+    reason = DISCONNECT if disconnected in done else DEADLINE
+    record_cancelled(reason, route)
+    raise RequestCancelledError(reason)
+
+
+async def iterate_until[T](deadline: float, updates: AsyncIterable[T]) -> AsyncIterator[T]:
+    """
+    Iterate `updates`, raising TimeoutError when the `deadline` (in event loop time)
+    passes while waiting for the next one. The time spent by the consumer between
+    updates counts, but it is not interrupted.
+    """
+    iterator = aiter(updates)
+    try:
+        while True:
+            async with asyncio.timeout_at(deadline):
+                try:
+                    update = await anext(iterator)
+                except StopAsyncIteration:
+                    return
+            yield update
+    finally:
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
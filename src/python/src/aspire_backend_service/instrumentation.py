@@ -0,0 +1,109 @@
+import time
+from collections.abc import AsyncIterable, AsyncIterator, Iterator, Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+from opentelemetry import metrics, trace
+from opentelemetry.metrics import Histogram
+from opentelemetry.trace import Span
+
+T = TypeVar("T")
+
+tracer = trace.get_tracer(__name__)
+meter = metrics.get_meter(__name__)
+
+token_duration_histogram = meter.create_histogram(
+    "credential.token.duration", unit="s", description="Time spent acquiring access tokens"
+)
+agent_operation_histogram = meter.create_histogram(
+    "agent.operation.duration",
+    unit="s",
+    description="Time spent creating, looking up and deleting agents in the service",
+)
+llm_turn_histogram = meter.create_histogram(
+    "calculator.llm_turn.duration", unit="s", description="Duration of a single LLM turn"
+)
+tool_histogram = meter.create_histogram(
+    "calculator.tool.duration", unit="s", description="Duration of a tool invocation"
+)
+parse_histogram = meter.create_histogram(
+    "calculator.parse.duration",
+    unit="s",
+    description="Time spent parsing the structured output of an agent run",
+)
+turns_histogram = meter.create_histogram(
+    "calculator.turns", unit="{turn}", description="LLM turns per agent run"
+)
+tokens_histogram = meter.create_histogram(
+    "calculator.tokens", unit="{token}", description="Tokens used per agent run, by token type"
+)
+
+
+@contextmanager
+def measure(
+    name: str, histogram: Histogram, attributes: dict[str, Any] | None = None
+) -> Iterator[Span]:
+    """
+    Run the block in a span and record its duration. `attributes` may still be changed
+    inside the block, they are applied to the span and the measurement at the end.
+    """
+    attributes = attributes if attributes is not None else {}
+    started = time.perf_counter()
+    with tracer.start_as_current_span(name) as span:
+        try:
+            yield span
+        except Exception as e:
+            attributes["error.type"] = type(e).__name__
+            raise
+        finally:
+            span.set_attributes(attributes)
+            histogram.record(time.perf_counter() - started, attributes)
+
+
+_run_usage: ContextVar["RunUsage | None"] = ContextVar("calculator_run_usage", default=None)
+
+
+@dataclass
+class RunUsage:
+    """LLM turns counted for one agent run, by `LlmTurnMiddleware`."""
+
+    turns: int = 0
+
+    @staticmethod
+    def current() -> "RunUsage | None":
+        """The run whose LLM turns are being counted in the current context, if any."""
+        return _run_usage.get()
+
+    @contextmanager
+    def active(self) -> Iterator["RunUsage"]:
+        """Count the LLM turns made inside the block towards this run."""
+        token = _run_usage.set(self)
+        try:
+            yield self
+        finally:
+            _run_usage.reset(token)
+
+    async def tracking(self, updates: AsyncIterable[T]) -> AsyncIterator[T]:
+        """Iterate a streamed run, counting the LLM turns made while producing its updates."""
+        iterator = aiter(updates)
+        while True:
+            # Activated per step, the consumer's context may differ between steps.
+            with self.active():
+                try:
+                    update = await anext(iterator)
+                except StopAsyncIteration:
+                    return
+            yield update
+
+    def record(self, usage_details: Mapping[str, Any] | None) -> None:
+        """Record the turns and the token usage reported for the run."""
+        span = trace.get_current_span()
+        turns_histogram.record(self.turns)
+        span.set_attribute("calculator.turns", self.turns)
+        for token_type, key in (("input", "input_token_count"), ("output", "output_token_count")):
+            count = (usage_details or {}).get(key)
+            if count is not None:
+                tokens_histogram.record(count, {"token.type": token_type})
+                span.set_attribute(f"gen_ai.usage.{token_type}_tokens", count)
@@ -0,0 +1,159 @@
+import atexit
+import logging
+import queue
+import random
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from opentelemetry import context
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread and drops records,
+    rather than blocking or raising, when the queue is full.
+
+    Records are queued as they are, so `%s` arguments are only turned into text on
+    the listener thread. Log values that are not mutated afterwards. The OpenTelemetry
+    context is queued with the record, so handlers can still tell the active span.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.otel_context = context.get_current()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class ContextQueueListener(QueueListener):
+    """QueueListener that handles each record in the OpenTelemetry context it was logged in."""
+
+    def handle(self, record: logging.LogRecord) -> None:
+        otel_context = getattr(record, "otel_context", None)
+        if otel_context is None:
+            super().handle(record)
+            return
+        token = context.attach(otel_context)
+        try:
+            super().handle(record)
+        finally:
+            context.detach(token)
+
+
+def start_queued_logging(max_queue_size: int = 10_000) -> QueueListener:
+    """
+    Move the handlers currently on the root logger (console, OpenTelemetry) behind a
+    QueueHandler, so handler I/O runs on a QueueListener thread instead of the event loop.
+    Calling it again returns the listener that is already running.
+    """
+    root = logging.getLogger()
+    for handler in root.handlers:
+        if isinstance(handler, DroppingQueueHandler) and handler.listener is not None:
+            return handler.listener
+
+    handlers = list(root.handlers)
+    log_queue: queue.Queue[logging.LogRecord] = queue.Queue(maxsize=max_queue_size)
+    queue_handler = DroppingQueueHandler(log_queue)
+    listener = ContextQueueListener(log_queue, *handlers, respect_handler_level=True)
+    queue_handler.listener = listener
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+def parse_route_levels(value: str) -> dict[str, int]:
+    """Parse `REQUEST_LOG_ROUTE_LEVELS`, e.g. "/health=DEBUG,/agents=INFO"."""
+    route_levels: dict[str, int] = {}
+    for entry in value.split(","):
+        if not entry.strip():
+            continue
+        prefix, _, level = entry.partition("=")
+        route_levels[prefix.strip()] = logging.getLevelNamesMapping()[level.strip().upper()]
+    return route_levels
+
+
+class RequestLoggingMiddleware:
+    """
+    Pure ASGI middleware that logs one line per request once the response has started.
+
+    Successful requests are logged at the level configured for the longest matching
+    route prefix, for a `sample_rate` share of requests. Server errors are always
+    logged, as warnings. Headers are only collected when DEBUG is enabled.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        sample_rate: float = 1.0,
+        route_levels: dict[str, int] | None = None,
+        default_level: int = logging.INFO,
+    ):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.default_level = default_level
+        # Longest prefix first, so the most specific route wins.
+        self.route_levels = sorted(
+            (route_levels or {}).items(), key=lambda item: len(item[0]), reverse=True
+        )
+
+    def level_for(self, path: str) -> int:
+        for prefix, level in self.route_levels:
+            if path.startswith(prefix):
+                return level
+        return self.default_level
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self._log(scope, status_code, time.perf_counter() - started)
+
+    def _log(self, scope: Scope, status_code: int, duration: float) -> None:
+        if status_code >= 500:
+            level = logging.WARNING
+        else:
+            level = self.level_for(scope["path"])
+            if not logger.isEnabledFor(level):
+                return
+            if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+                return
+        logger.log(
+            level,
+            "%s %s -> %d (%.1f ms)",
+            scope["method"],
+            scope["path"],
+            status_code,
+            duration * 1000,
+        )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Headers: %s", {key.decode(): value.decode() for key, value in scope["headers"]}
+            )
@@ -1,19 +1,96 @@
 import logging
-import json
+import math
+import os
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request, status
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 
+from .a2a_tasks import TaskManager
+from .admission import AdmissionController, AdmissionRejectedError
+from .agents.answering import Answer, answer_question
+from .agents.calculator import calculator, calculator_response, create_agent_pool
+from .bulk import BulkRunner
+from .clients import AzureAgentsClients
+from .conversations import ConversationStore, use_conversation
+from .deadlines import DEADLINE, DeadlinePolicy, RequestCancelledError
+from .logging_setup import RequestLoggingMiddleware, parse_route_levels, start_queued_logging
+from .profiling import ProfilingMiddleware, ProfilingPolicy
+from .resilience import UpstreamUnavailableError
+from .result_cache import ResultCache
+from .routers.agents import create_agent_cards
 from .routers.agents import router as agents_router
 from .telemetry import configure_telemetry
-
-logging.basicConfig(level=logging.INFO)
-app = FastAPI()
+from .warmup import Warmup
+
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Owns the resources shared by all requests for the lifetime of the application."""
+    clients = AzureAgentsClients.from_env()
+    agent_pool = create_agent_pool(clients)
+    admission = AdmissionController.from_env(agent_pool.max_size)
+    result_cache = ResultCache.from_env(calculator_response)
+    conversations = ConversationStore.from_env(clients)
+
+    async def run_task(question: str, context_id: str | None) -> Answer:
+        # A task continues the conversation of its context, like a blocking message.
+        async with use_conversation(conversations, context_id) as conversation:
+            subject = calculator(agent_pool, admission)
+            return await answer_question(question, subject, result_cache, conversation)
+
+    task_manager = TaskManager.from_env(run_task)
+    app.state.azure_clients = clients
+    app.state.agent_pool = agent_pool
+    app.state.admission = admission
+    app.state.result_cache = result_cache
+    app.state.task_manager = task_manager
+    app.state.conversations = conversations
+    app.state.bulk_runner = BulkRunner.from_env()
+    app.state.deadlines = DeadlinePolicy.from_env()
+    app.state.agent_cards = create_agent_cards(task_manager)
+    # Runs in the background, readiness reports its progress.
+    warmup = Warmup.from_env(
+        clients, agent_pool, lambda question: calculator(agent_pool).run(question)
+    )
+    app.state.warmup = warmup
+    try:
+        warmup.start()
+        await task_manager.start()
+        if conversations is not None:
+            conversations.start()
+        yield
+    finally:
+        await warmup.close()
+        await task_manager.close()
+        if conversations is not None:
+            await conversations.close()
+        await agent_pool.close()
+        await clients.close()
+        admission.close()
+        if result_cache is not None:
+            result_cache.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 tracer = configure_telemetry(app, service_name="weather-api")
+start_queued_logging()
 logger = logging.getLogger(__name__)
 
+app.add_middleware(
+    RequestLoggingMiddleware,
+    sample_rate=float(os.getenv("REQUEST_LOG_SAMPLE_RATE", "1.0")),
+    route_levels=parse_route_levels(os.getenv("REQUEST_LOG_ROUTE_LEVELS", "")),
+)
+# Outermost, so profiles include the logging and the other middleware.
+profiling = ProfilingPolicy.from_env()
+if profiling is not None:
+    app.add_middleware(ProfilingMiddleware, policy=profiling)
+
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -22,13 +99,13 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     body = b""
     try:
         body = await request.body()
-        logger.error(f"Validation error on {request.method} {request.url.path}")
-        logger.error(f"Request body (raw bytes): {body}")
-        logger.error(f"Request body (decoded): {body.decode('utf-8', errors='replace')}")
-        logger.error(f"Content-Type header: {request.headers.get('content-type')}")
-        logger.error(f"Validation errors: {exc.errors()}")
+        logger.error("Validation error on %s %s", request.method, request.url.path)
+        logger.error("Request body (raw bytes): %s", body)
+        logger.error("Request body (decoded): %s", body.decode("utf-8", errors="replace"))
+        logger.error("Content-Type header: %s", request.headers.get("content-type"))
+        logger.error("Validation errors: %s", exc.errors())
     except Exception as e:
-        logger.error(f"Error reading request body: {e}")
+        logger.error("Error reading request body: %s", e)
 
     return JSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
@@ -39,16 +116,31 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     )
 
 
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    """Log all incoming requests"""
-    logger.info(f"Incoming request: {request.method} {request.url.path}")
-    logger.debug(f"Headers: {dict(request.headers)}")
+@app.exception_handler(AdmissionRejectedError)
+async def admission_rejected_handler(_request: Request, exc: AdmissionRejectedError):
+    """Shed load quickly with 429 when the agent runs are saturated"""
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
+
+
+@app.exception_handler(UpstreamUnavailableError)
+async def upstream_unavailable_handler(_request: Request, exc: UpstreamUnavailableError):
+    """503 while the agent service keeps failing, or its circuit is open"""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
 
-    response = await call_next(request)
 
-    logger.info(f"Response status: {response.status_code}")
-    return response
+@app.exception_handler(RequestCancelledError)
+async def request_cancelled_handler(_request: Request, exc: RequestCancelledError):
+    """504 when the agent run exceeded its deadline, 499 when the client went away"""
+    status_code = status.HTTP_504_GATEWAY_TIMEOUT if exc.reason == DEADLINE else 499
+    return JSONResponse(status_code=status_code, content={"detail": str(exc)})
 
 
 app.include_router(agents_router)
@@ -75,8 +167,24 @@ async def liveness():
 
 
 @app.get("/health/ready")
-async def readiness():
+async def readiness(request: Request):
     """Readiness probe - checks if app is ready to handle requests"""
-    # Add custom logic to check dependencies (database, services, etc.)
     logger.info("Ready check called")
+    if getattr(request.app.state, "draining", False):
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "not ready", "reason": "draining"},
+        )
+    warmup = getattr(request.app.state, "warmup", None)
+    if warmup is not None and not warmup.ready:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "not ready", "reason": "warming up", "checks": warmup.to_dict()},
+        )
+    admission = getattr(request.app.state, "admission", None)
+    if admission is not None and admission.saturated:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "not ready", "reason": "saturated"},
+        )
     return {"status": "ok"}
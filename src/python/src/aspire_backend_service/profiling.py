@@ -0,0 +1,222 @@
+import asyncio
+import importlib.util
+import logging
+import os
+import random
+import re
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from opentelemetry import metrics
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# Request header asking for a profile, honoured only when `header_enabled` is set
+PROFILE_HEADER = "X-Profile"
+# Response header with the path of the saved profile
+PROFILE_FILE_HEADER = "X-Profile-File"
+_PROFILE_HEADER_KEY = PROFILE_HEADER.lower().encode()
+
+SPEEDSCOPE = "speedscope"
+PSTATS = "pstats"
+_SUFFIXES = {SPEEDSCOPE: ".speedscope.json", PSTATS: ".pstats"}
+
+meter = metrics.get_meter(__name__)
+profiles_counter = meter.create_counter(
+    "profiling.profiles",
+    unit="{profile}",
+    description="Requests selected for profiling, by whether the profile was saved or skipped",
+)
+
+
+def _has_pyinstrument() -> bool:
+    return importlib.util.find_spec("pyinstrument") is not None
+
+
+def _default_format() -> str:
+    return SPEEDSCOPE if _has_pyinstrument() else PSTATS
+
+
+@dataclass
+class ProfilingPolicy:
+    """
+    Which requests are profiled, and where their profiles are kept. Requests below
+    `path_prefix` are profiled when they send `X-Profile: 1` (if `header_enabled`),
+    or for a `sample_rate` share of them. Only the newest `max_files` profiles are kept.
+
+    Profiles are written in speedscope format when pyinstrument is installed, which
+    samples the request's own task and shows the time spent awaiting. Otherwise cProfile
+    writes pstats files; it traces everything on the event loop while the request runs,
+    other requests included, and profiles one request at a time.
+    """
+
+    directory: Path = field(default_factory=lambda: Path(tempfile.gettempdir()) / "aspire-profiles")
+    header_enabled: bool = False
+    sample_rate: float = 0.0
+    path_prefix: str = "/agents"
+    max_files: int = 50
+    max_concurrent: int = 4
+    interval: float = 0.001
+    format: str = field(default_factory=_default_format)
+
+    @classmethod
+    def from_env(cls) -> "ProfilingPolicy | None":
+        """Create the policy from the environment, or None when profiling is off."""
+        header_enabled = os.getenv("PROFILE_HEADER_ENABLED", "false").lower() == "true"
+        sample_rate = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+        if not header_enabled and sample_rate <= 0:
+            return None
+        options: dict[str, Any] = {}
+        if directory := os.getenv("PROFILE_DIR"):
+            options["directory"] = Path(directory)
+        if profile_format := os.getenv("PROFILE_FORMAT"):
+            options["format"] = profile_format.lower()
+        elif not _has_pyinstrument():
+            logger.warning(
+                "Profiling is enabled but pyinstrument is not installed, falling back to "
+                "cProfile, which profiles one request at a time. Install the 'profiling' extra."
+            )
+        return cls(
+            header_enabled=header_enabled,
+            sample_rate=sample_rate,
+            path_prefix=os.getenv("PROFILE_PATH_PREFIX", "/agents"),
+            max_files=int(os.getenv("PROFILE_MAX_FILES", "50")),
+            interval=float(os.getenv("PROFILE_INTERVAL_SECONDS", "0.001")),
+            **options,
+        )
+
+    def __post_init__(self):
+        if self.format not in _SUFFIXES:
+            raise ValueError(f"Unknown profile format: {self.format}")
+        if self.format == SPEEDSCOPE and not _has_pyinstrument():
+            raise ValueError("Speedscope profiles require pyinstrument to be installed")
+
+    def wants(self, scope: Scope) -> bool:
+        if not scope["path"].startswith(self.path_prefix):
+            return False
+        if self.header_enabled:
+            for name, value in scope["headers"]:
+                if name == _PROFILE_HEADER_KEY:
+                    return value.lower() in (b"1", b"true")
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+
+class _SpeedscopeProfile:
+    def __init__(self, interval: float):
+        from pyinstrument import Profiler
+
+        self._profiler = Profiler(interval=interval, async_mode="enabled")
+
+    def start(self) -> None:
+        self._profiler.start()
+
+    def stop(self) -> None:
+        self._profiler.stop()
+
+    def save(self, path: Path) -> None:
+        from pyinstrument.renderers import SpeedscopeRenderer
+
+        path.write_text(self._profiler.output(SpeedscopeRenderer()), encoding="utf-8")
+
+
+class _PstatsProfile:
+    def __init__(self, _interval: float):
+        import cProfile
+
+        # The default timer is wall-clock time, so time spent awaiting shows up as well.
+        self._profiler = cProfile.Profile()
+
+    def start(self) -> None:
+        self._profiler.enable()
+
+    def stop(self) -> None:
+        self._profiler.disable()
+
+    def save(self, path: Path) -> None:
+        self._profiler.dump_stats(path)
+
+
+class ProfilingMiddleware:
+    """
+    Pure ASGI middleware that profiles the requests its policy selects, and answers
+    them with an `X-Profile-File` header naming the profile. The profile covers the
+    whole response, so the file is written right after the last body chunk is sent.
+
+    Only added to the application when profiling is enabled, so it costs nothing
+    otherwise. Requests beyond `max_concurrent` profiles are served unprofiled.
+    """
+
+    def __init__(self, app: ASGIApp, *, policy: ProfilingPolicy):
+        self.app = app
+        self.policy = policy
+        self._profile_type = _SpeedscopeProfile if policy.format == SPEEDSCOPE else _PstatsProfile
+        # cProfile cannot trace the event loop twice at once.
+        self._max_active = policy.max_concurrent if policy.format == SPEEDSCOPE else 1
+        self._active = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.policy.wants(scope):
+            await self.app(scope, receive, send)
+            return
+        profile = self._start() if self._active < self._max_active else None
+        if profile is None:
+            profiles_counter.add(1, {"result": "skipped"})
+            await self.app(scope, receive, send)
+            return
+
+        path = self.policy.directory / _file_name(scope, self.policy.format)
+
+        async def send_with_profile(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append(PROFILE_FILE_HEADER, str(path))
+            await send(message)
+
+        self._active += 1
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            profile.stop()
+            self._active -= 1
+        await self._save(profile, path)
+
+    def _start(self) -> Any:
+        profile = self._profile_type(self.policy.interval)
+        try:
+            profile.start()
+        except (RuntimeError, ValueError) as e:
+            # Another profiler (or debugger, or coverage tool) owns the hook.
+            logger.debug("Could not start profiling: %s", e)
+            return None
+        return profile
+
+    async def _save(self, profile: Any, path: Path) -> None:
+        try:
+            await asyncio.to_thread(_write, profile, path, self.policy.max_files)
+        except Exception as e:
+            profiles_counter.add(1, {"result": "failed"})
+            logger.warning("Failed to save profile %s: %s", path, e)
+            return
+        profiles_counter.add(1, {"result": "saved"})
+        logger.info("Saved profile %s", path)
+
+
+def _file_name(scope: Scope, profile_format: str) -> str:
+    route = re.sub(r"[^A-Za-z0-9]+", "-", scope["path"]).strip("-")[:60] or "root"
+    stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+    suffix = _SUFFIXES[profile_format]
+    return f"profile-{stamp}-{scope['method'].lower()}-{route}-{uuid.uuid4().hex[:8]}{suffix}"
+
+
+def _write(profile: Any, path: Path, max_files: int) -> None:
+    """Save a profile, then delete the oldest ones beyond `max_files`."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    profile.save(path)
+    profiles = sorted(path.parent.glob("profile-*"), key=lambda p: p.stat().st_mtime)
+    for stale in profiles[: max(0, len(profiles) - max_files)]:
+        stale.unlink(missing_ok=True)
@@ -0,0 +1,501 @@
+import asyncio
+import logging
+import os
+import random
+import re
+import time
+from collections import deque
+from collections.abc import (
+    AsyncGenerator,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Iterator,
+    Mapping,
+)
+from contextlib import aclosing, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+
+from azure.core.exceptions import HttpResponseError, ServiceRequestError, ServiceResponseError
+from opentelemetry import metrics
+from opentelemetry.metrics import CallbackOptions, Observation
+
+logger = logging.getLogger(__name__)
+
+# Upstream operations with their own retry policy
+CREATE_AGENT = "create_agent"
+GET_AGENT = "get_agent"
+DELETE_AGENT = "delete_agent"
+RUN = "run"
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+TRANSIENT_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+# Failed runs only carry the service's message, e.g. "Rate limit is exceeded. Try again in 20 seconds."
+_TRANSIENT_RUN_ERROR = re.compile(r"rate limit|server error|timed? ?out|try again", re.IGNORECASE)
+_TRY_AGAIN_IN = re.compile(r"try again in (\d+(?:\.\d+)?) seconds?", re.IGNORECASE)
+
+meter = metrics.get_meter(__name__)
+retries_counter = meter.create_counter(
+    "upstream.retries", unit="{retry}", description="Upstream calls retried, by operation"
+)
+hedges_counter = meter.create_counter(
+    "upstream.hedges",
+    unit="{hedge}",
+    description="Hedged upstream calls, by operation and whether the hedge won",
+)
+rejected_counter = meter.create_counter(
+    "upstream.circuit.rejected",
+    unit="{call}",
+    description="Upstream calls failed fast because the circuit was open",
+)
+
+_breakers: list["CircuitBreaker"] = []
+# Breakers admitting the calls the current one is part of, e.g. the run leasing an agent
+_held: ContextVar[frozenset["CircuitBreaker"]] = ContextVar("held_breakers", default=frozenset())
+
+
+def _observe_circuit_state(_options: CallbackOptions) -> Iterable[Observation]:
+    for breaker in _breakers:
+        yield Observation(_STATE_VALUES[breaker.state], {"upstream.circuit": breaker.name})
+
+
+meter.create_observable_gauge(
+    "upstream.circuit.state",
+    callbacks=[_observe_circuit_state],
+    unit="1",
+    description="Circuit breaker state: 0 closed, 1 half open, 2 open",
+)
+
+
+class UpstreamUnavailableError(Exception):
+    """Raised when an upstream call keeps failing with transient errors, or is not attempted."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(UpstreamUnavailableError):
+    """Raised instead of calling an upstream whose circuit is open."""
+
+
+def _causes(error: BaseException) -> Iterable[BaseException]:
+    seen: set[int] = set()
+    current: BaseException | None = error
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        yield current
+        current = current.__cause__ or current.__context__
+
+
+def is_transient(error: BaseException) -> bool:
+    """Whether an upstream error, or one of its causes, is worth retrying."""
+    for cause in _causes(error):
+        if isinstance(cause, UpstreamUnavailableError):
+            # Already retried (or failed fast) by the call that raised it.
+            return False
+        if isinstance(cause, HttpResponseError) and cause.status_code is not None:
+            return cause.status_code in TRANSIENT_STATUS_CODES
+        if isinstance(cause, ServiceRequestError | ServiceResponseError | ConnectionError):
+            return True
+        # The agent framework is imported lazily, so its exception is matched by name.
+        if type(cause).__name__ == "ServiceResponseException" and _TRANSIENT_RUN_ERROR.search(
+            str(cause)
+        ):
+            return True
+    return False
+
+
+def answered_by_service(error: BaseException) -> bool:
+    """Whether the service itself produced an error, or one of its causes."""
+    for cause in _causes(error):
+        if (
+            isinstance(cause, HttpResponseError)
+            or type(cause).__name__ == "ServiceResponseException"
+        ):
+            return True
+    return False
+
+
+def _outcome(error: BaseException) -> bool | None:
+    """What a failed attempt tells the circuit breaker about the service, see `release`."""
+    if is_transient(error):
+        return False
+    # The service answered, if not as hoped. Local errors tell nothing about it.
+    return True if answered_by_service(error) else None
+
+
+def retry_after(error: BaseException) -> float | None:
+    """Seconds the service asked to wait before retrying, if it said so."""
+    for cause in _causes(error):
+        response = getattr(cause, "response", None)
+        headers: Mapping[str, str] = getattr(response, "headers", None) or {}
+        for name, scale in (("retry-after-ms", 0.001), ("x-ms-retry-after-ms", 0.001)):
+            if headers.get(name):
+                try:
+                    return float(headers[name]) * scale
+                except ValueError:
+                    pass
+        value = headers.get("Retry-After")
+        if value:
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                try:
+                    return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+        match = _TRY_AGAIN_IN.search(str(cause))
+        if match:
+            return float(match.group(1))
+    return None
+
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff with full jitter, waiting as long as the service asks for."""
+
+    attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 10.0
+
+    def delay(self, attempt: int, requested: float | None = None) -> float | None:
+        """
+        Seconds to wait after failed attempt number `attempt` (from 1), or None to give
+        up: when the attempts are used up, or the service asks to wait over `max_delay`.
+        """
+        if attempt >= self.attempts:
+            return None
+        if requested is not None:
+            return requested if requested <= self.max_delay else None
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+# For attempts that must not be repeated, e.g. a run that adds a message to a thread
+NO_RETRY = RetryPolicy(attempts=1)
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive transient failures, failing calls fast
+    for `reset_timeout` seconds. Then a single probe call is let through (half open):
+    its success closes the circuit again, its failure opens it for another period.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+        _breakers.append(self)
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return CLOSED
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return OPEN
+
+    @property
+    def retry_after(self) -> float:
+        """Seconds until the circuit lets a probe through."""
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def acquire(self) -> None:
+        """Admit a call, raise CircuitOpenError while the circuit is open or probing."""
+        state = self.state
+        if state == CLOSED:
+            return
+        if state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return
+        rejected_counter.add(1, {"upstream.circuit": self.name})
+        raise CircuitOpenError(f"Upstream '{self.name}' is unavailable", max(self.retry_after, 1.0))
+
+    def release(self, succeeded: bool | None) -> None:
+        """
+        Report the outcome of an admitted call: True when the service answered, False
+        for a transient failure, None when the call was cancelled before it could tell.
+        """
+        probing, self._probing = self._probing, False
+        if succeeded is None:
+            return
+        if succeeded:
+            if self._opened_at is not None:
+                logger.info("Circuit '%s' closed", self.name)
+            self._failures = 0
+            self._opened_at = None
+            return
+        self._failures += 1
+        if probing or self._failures >= self.failure_threshold:
+            if self._opened_at is None or probing:
+                logger.warning("Circuit '%s' opened after %d failure(s)", self.name, self._failures)
+            self._opened_at = time.monotonic()
+
+
+@dataclass
+class HedgePolicy:
+    """
+    Sends a second attempt when the first takes longer than `percentile` of the last
+    `window` successful attempts, once `min_samples` of them were measured.
+    """
+
+    percentile: float = 95.0
+    min_samples: int = 20
+    window: int = 500
+    # Recomputing a percentile sorts the sample, so it is refreshed every so many calls.
+    refresh_every: int = 50
+
+
+class UpstreamResilience:
+    """
+    Retries, circuit breaking and hedging for the calls to one upstream service.
+
+    Transient failures (throttling, 5xx, connection errors, failed runs the service
+    blames on itself) are retried per operation with `RetryPolicy`, and counted by the
+    circuit breaker. Other errors are raised unchanged. Calls that are given up on raise
+    UpstreamUnavailableError, so they can be answered with 503 and `Retry-After`.
+    """
+
+    def __init__(
+        self,
+        name: str = "azure-ai-agents",
+        *,
+        retries: dict[str, RetryPolicy] | None = None,
+        default_retry: RetryPolicy | None = None,
+        breaker: CircuitBreaker | None = None,
+        hedging: HedgePolicy | None = None,
+    ):
+        self.name = name
+        self.retries = retries or {}
+        self.default_retry = default_retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker(name)
+        self.hedging = hedging
+        self._latencies: dict[str, deque[float]] = {}
+        self._recorded: dict[str, int] = {}
+        self._hedge_delays: dict[str, float] = {}
+
+    @classmethod
+    def from_env(cls, name: str = "azure-ai-agents") -> "UpstreamResilience":
+        control_plane = RetryPolicy(
+            attempts=int(os.getenv("UPSTREAM_RETRY_ATTEMPTS", "3")),
+            base_delay=float(os.getenv("UPSTREAM_RETRY_BASE_DELAY_SECONDS", "0.5")),
+            max_delay=float(os.getenv("UPSTREAM_RETRY_MAX_DELAY_SECONDS", "10")),
+        )
+        run = RetryPolicy(
+            attempts=int(os.getenv("UPSTREAM_RUN_RETRY_ATTEMPTS", "2")),
+            base_delay=control_plane.base_delay,
+            max_delay=control_plane.max_delay,
+        )
+        hedging = None
+        if os.getenv("UPSTREAM_HEDGE_ENABLED", "false").lower() == "true":
+            hedging = HedgePolicy(percentile=float(os.getenv("UPSTREAM_HEDGE_PERCENTILE", "95")))
+        return cls(
+            name,
+            retries={RUN: run},
+            default_retry=control_plane,
+            breaker=CircuitBreaker(
+                name,
+                failure_threshold=int(os.getenv("UPSTREAM_CIRCUIT_FAILURE_THRESHOLD", "5")),
+                reset_timeout=float(os.getenv("UPSTREAM_CIRCUIT_RESET_SECONDS", "30")),
+            ),
+            hedging=hedging,
+        )
+
+    async def call[T](
+        self,
+        operation: str,
+        attempt: Callable[[], Awaitable[T]],
+        *,
+        hedge: bool = False,
+        hedge_attempt: Callable[[], Awaitable[T]] | None = None,
+        retry: RetryPolicy | None = None,
+    ) -> T:
+        """
+        Call `attempt` until it succeeds or is given up on. Pass `hedge` only for
+        idempotent attempts, a hedged call may run two of them at once. The second one is
+        `hedge_attempt` when given, e.g. to take a slot of its own; when it fails, the
+        first attempt is waited for. `retry` replaces the operation's retry policy, e.g.
+        NO_RETRY for attempts that must not be repeated.
+
+        Calls made by `attempt` itself (creating the agent a run leases) are not admitted
+        by the circuit breaker again, the outer call holds it; they do report their outcome.
+        """
+        number = 0
+        while True:
+            number += 1
+            outer = self._admit()
+            started = time.perf_counter()
+            try:
+                with self._holding(outer):
+                    if hedge and self.hedging is not None:
+                        result = await self._hedged(operation, attempt, hedge_attempt or attempt)
+                    else:
+                        result = await attempt()
+            except UpstreamUnavailableError:
+                # Given up on by a call inside this one, which reported it to the breaker.
+                self._release(outer, None)
+                raise
+            except Exception as e:
+                delay = self._failed(operation, number, e, outer, retry)
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                self._release(outer, None)
+                raise
+            self.breaker.release(True)
+            self._record_latency(operation, time.perf_counter() - started)
+            return result
+
+    async def stream[T](
+        self,
+        operation: str,
+        attempt: Callable[[], AsyncGenerator[T]],
+        *,
+        retry: RetryPolicy | None = None,
+    ) -> AsyncIterator[T]:
+        """Like `call` for a stream; it is only retried when it failed before its first item."""
+        number = 0
+        while True:
+            number += 1
+            outer = self._admit()
+            produced = False
+            try:
+                with self._holding(outer):
+                    async with aclosing(attempt()) as items:
+                        async for item in items:
+                            produced = True
+                            yield item
+            except UpstreamUnavailableError:
+                self._release(outer, None)
+                raise
+            except Exception as e:
+                if produced:
+                    self._release(outer, _outcome(e))
+                    raise
+                delay = self._failed(operation, number, e, outer, retry)
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                self._release(outer, None)
+                raise
+            self.breaker.release(True)
+            return
+
+    def _admit(self) -> bool:
+        """
+        Admit an attempt through the circuit breaker, raising CircuitOpenError while it
+        is open. Returns False when a call the attempt is part of was admitted already.
+        """
+        if self.breaker in _held.get():
+            return False
+        self.breaker.acquire()
+        return True
+
+    @contextmanager
+    def _holding(self, outer: bool) -> Iterator[None]:
+        if not outer:
+            yield
+            return
+        token = _held.set(_held.get() | {self.breaker})
+        try:
+            yield
+        finally:
+            _held.reset(token)
+
+    def _release(self, outer: bool, succeeded: bool | None) -> None:
+        # Only the outer call gives back the probe it may hold.
+        if outer or succeeded is not None:
+            self.breaker.release(succeeded)
+
+    def _failed(
+        self,
+        operation: str,
+        number: int,
+        error: Exception,
+        outer: bool,
+        retry: RetryPolicy | None = None,
+    ) -> float:
+        """Report a failed attempt, and return the delay before the next or raise."""
+        outcome = _outcome(error)
+        if outcome is not False:
+            self._release(outer, outcome)
+            raise error
+        self.breaker.release(False)
+        requested = retry_after(error)
+        policy = retry or self.retries.get(operation, self.default_retry)
+        delay = policy.delay(number, requested)
+        if delay is None or self.breaker.state != CLOSED:
+            raise UpstreamUnavailableError(
+                f"Upstream '{self.name}' failed to {operation}: {error}",
+                max(requested or 0.0, self.breaker.retry_after, 1.0),
+            ) from error
+        retries_counter.add(1, {"upstream.operation": operation})
+        logger.warning(
+            "Retrying %s in %.2fs after attempt %d failed: %s", operation, delay, number, error
+        )
+        return delay
+
+    def _record_latency(self, operation: str, seconds: float) -> None:
+        if self.hedging is None:
+            return
+        latencies = self._latencies.setdefault(operation, deque(maxlen=self.hedging.window))
+        latencies.append(seconds)
+        recorded = self._recorded[operation] = self._recorded.get(operation, 0) + 1
+        if len(latencies) >= self.hedging.min_samples and (
+            operation not in self._hedge_delays or recorded % self.hedging.refresh_every == 0
+        ):
+            ordered = sorted(latencies)
+            rank = round(self.hedging.percentile / 100 * len(ordered)) - 1
+            self._hedge_delays[operation] = ordered[max(0, min(len(ordered) - 1, rank))]
+
+    async def _hedged[T](
+        self,
+        operation: str,
+        attempt: Callable[[], Awaitable[T]],
+        hedge_attempt: Callable[[], Awaitable[T]],
+    ) -> T:
+        delay = self._hedge_delays.get(operation)
+        if delay is None:
+            return await attempt()
+
+        first = asyncio.ensure_future(attempt())
+        attempts = {first}
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=delay)
+            hedged = not done
+            if hedged:
+                attempts.add(asyncio.ensure_future(hedge_attempt()))
+            error: BaseException | None = None
+            while attempts:
+                done, attempts = await asyncio.wait(attempts, return_when=asyncio.FIRST_COMPLETED)
+                for finished in done:
+                    if finished.exception() is None:
+                        if hedged:
+                            outcome = "lost" if finished is first else "won"
+                            hedges_counter.add(
+                                1, {"upstream.operation": operation, "hedge.outcome": outcome}
+                            )
+                        return finished.result()
+                    # The first attempt's error wins, the hedge may have failed to start.
+                    if error is None or finished is first:
+                        error = finished.exception()
+            assert error is not None
+            raise error
+        finally:
+            for pending in attempts:
+                pending.cancel()
+            if attempts:
+                await asyncio.gather(*attempts, return_exceptions=True)
@@ -0,0 +1,249 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from opentelemetry import metrics
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+HIT = "hit"
+MISS = "miss"
+COALESCED = "coalesced"
+
+meter = metrics.get_meter(__name__)
+hits_counter = meter.create_counter(
+    "result_cache.hits", unit="{lookup}", description="Lookups answered from the result cache"
+)
+misses_counter = meter.create_counter(
+    "result_cache.misses", unit="{lookup}", description="Lookups that had to compute the result"
+)
+coalesced_counter = meter.create_counter(
+    "result_cache.coalesced",
+    unit="{lookup}",
+    description="Lookups that waited for an identical in-flight computation",
+)
+evictions_counter = meter.create_counter(
+    "result_cache.evictions", unit="{entry}", description="Entries removed from the result cache"
+)
+
+
+def normalize_key(question: str) -> str:
+    """
+    Collapse whitespace so trivially different spellings share an entry.
+    Case is kept, because `count_letters` is case-sensitive.
+    """
+    return " ".join(question.split())
+
+
+class SqliteCacheBackend:
+    """On-disk store so warm entries survive restarts. Values are stored as JSON."""
+
+    def __init__(self, path: str, max_entries: int = 10_000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._connection.commit()
+
+    def get(self, key: str) -> tuple[str, float] | None:
+        """The stored value and when it expires, in seconds since the epoch."""
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, expires_at FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._connection.execute("DELETE FROM results WHERE key = ?", (key,))
+                self._connection.commit()
+                return None
+            self._connection.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+            self._connection.commit()
+            value: str = row[0]
+            expires_at: float = row[1]
+            return value, expires_at
+
+    def set(self, key: str, value: str, ttl: float) -> int:
+        """Store a value and return the number of entries pruned to stay within bounds."""
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO results (key, value, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl, now),
+            )
+            pruned = self._connection.execute(
+                "DELETE FROM results WHERE expires_at <= ?", (now,)
+            ).rowcount
+            pruned += self._connection.execute(
+                "DELETE FROM results WHERE key IN (SELECT key FROM results"
+                " ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+            self._connection.commit()
+            return pruned
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+@dataclass(eq=False)
+class _Flight[M: BaseModel]:
+    """A computation shared by the lookups waiting for it."""
+
+    task: "asyncio.Task[M | None]"
+    waiters: int = 0
+
+
+class ResultCache[M: BaseModel]:
+    """
+    Bounded LRU cache with a TTL for structured results, with single-flight
+    deduplication: concurrent lookups for the same key share one computation.
+
+    The shared computation runs in a task of its own, so a lookup that is cancelled
+    (its deadline passed, or its client went away) leaves it running for the others.
+    It is only cancelled when the last lookup waiting for it is.
+    """
+
+    def __init__(
+        self,
+        model_type: type[M],
+        *,
+        max_entries: int = 1024,
+        ttl: float = 3600.0,
+        backend: SqliteCacheBackend | None = None,
+    ):
+        self.model_type = model_type
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.backend = backend
+        self._entries: OrderedDict[str, tuple[float, M]] = OrderedDict()
+        self._in_flight: dict[str, _Flight[M]] = {}
+
+    @classmethod
+    def from_env(cls, model_type: type[M]) -> "ResultCache[M] | None":
+        """Create the cache from the environment, or None when it is disabled."""
+        if os.getenv("RESULT_CACHE_ENABLED", "true").lower() != "true":
+            return None
+        sqlite_path = os.getenv("RESULT_CACHE_SQLITE_PATH")
+        backend = (
+            SqliteCacheBackend(
+                sqlite_path, max_entries=int(os.getenv("RESULT_CACHE_SQLITE_MAX_ENTRIES", "10000"))
+            )
+            if sqlite_path
+            else None
+        )
+        return cls(
+            model_type,
+            max_entries=int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1024")),
+            ttl=float(os.getenv("RESULT_CACHE_TTL_SECONDS", "3600")),
+            backend=backend,
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> M | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                return value
+            del self._entries[key]
+            evictions_counter.add(1, {"reason": "expired"})
+
+        if self.backend is not None:
+            stored = await asyncio.to_thread(self.backend.get, key)
+            if stored is not None:
+                payload, expires_at = stored
+                value = self.model_type.model_validate_json(payload)
+                # The entry keeps the expiry it was stored with, loading it is no refresh.
+                self._remember(key, value, expires_at - time.time())
+                return value
+        return None
+
+    async def set(self, key: str, value: M) -> None:
+        self._remember(key, value)
+        if self.backend is not None:
+            pruned = await asyncio.to_thread(
+                self.backend.set, key, value.model_dump_json(), self.ttl
+            )
+            if pruned:
+                evictions_counter.add(pruned, {"reason": "disk"})
+
+    async def get_or_compute(
+        self, key: str, compute: Callable[[], Awaitable[M | None]]
+    ) -> tuple[M | None, str]:
+        """
+        Return the cached value for `key`, or compute it. Returns the value together
+        with how it was obtained: `hit`, `miss` or `coalesced`.
+        Results of None and failed computations are not cached.
+        """
+        flight = self._in_flight.get(key)
+        if flight is None:
+            value = await self.get(key)
+            if value is not None:
+                hits_counter.add(1)
+                return value, HIT
+            # Looking in the on-disk backend yields to the loop, check again.
+            flight = self._in_flight.get(key)
+
+        if flight is not None:
+            coalesced_counter.add(1)
+            outcome = COALESCED
+        else:
+            misses_counter.add(1)
+            outcome = MISS
+            flight = self._start(key, compute)
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task), outcome
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody is waiting anymore, new lookups start over.
+                self._land(key, flight)
+                flight.task.cancel()
+
+    def _start(self, key: str, compute: Callable[[], Awaitable[M | None]]) -> _Flight[M]:
+        async def run() -> M | None:
+            value = await compute()
+            if value is not None:
+                await self.set(key, value)
+            return value
+
+        flight = _Flight(asyncio.create_task(run()))
+        flight.task.add_done_callback(lambda _: self._land(key, flight))
+        self._in_flight[key] = flight
+        return flight
+
+    def _land(self, key: str, flight: _Flight[M]) -> None:
+        if self._in_flight.get(key) is flight:
+            del self._in_flight[key]
+
+    def close(self) -> None:
+        if self.backend is not None:
+            self.backend.close()
+
+    def _remember(self, key: str, value: M, ttl: float | None = None) -> None:
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            evictions_counter.add(1, {"reason": "lru"})
@@ -1,17 +1,69 @@
-import json
+import asyncio
 import logging
+import math
+import os
+import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from functools import partial
 from typing import Any, Optional
 
-from fastapi import APIRouter, Request
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field, ValidationError
 
-from ..agents.calculator import calculator
+from ..a2a_tasks import (
+    InvalidPushUrlError,
+    TaskManager,
+    TaskNotCancelableError,
+    TaskNotFoundError,
+    TaskQueueFullError,
+    agent_message,
+)
+from ..admission import AdmissionRejectedError
+from ..agent_cards import AgentCardRegistry
+from ..agents.answering import answer_question, format_answer_text, stream_answer
+from ..agents.calculator import calculator, calculator_response
 from ..agents.hello import hello
+from ..bulk import (
+    BulkResult,
+    BulkRunner,
+    BulkSummary,
+    DuplexNdjsonResponse,
+    iter_ndjson_lines,
+)
+from ..conversations import ConversationStore, use_conversation
+from ..deadlines import (
+    DEADLINE,
+    DISCONNECT,
+    TIMEOUT_HEADER,
+    TIMEOUT_METADATA_KEY,
+    DeadlinePolicy,
+    RequestCancelledError,
+    iterate_until,
+    record_cancelled,
+    run_cancellable,
+)
+from ..resilience import UpstreamUnavailableError
+from ..result_cache import ResultCache
+from ..serialization import FastJSONResponse, dumps, loads
 from .request_models import CountLettersRequest
 
 logger = logging.getLogger(__name__)
 
+# Response header naming the path that served the answer ("fast-path", "cache" or "agent")
+SERVED_BY_HEADER = "X-Served-By"
+
+# A2A `message/stream` support, advertised through the agent card capabilities
+A2A_STREAMING_ENABLED = os.getenv("A2A_STREAMING_ENABLED", "true").lower() == "true"
+
+# JSON-RPC batch limits: maximum requests per batch, and how many of them run at once
+A2A_BATCH_MAX_SIZE = int(os.getenv("A2A_BATCH_MAX_SIZE", "100"))
+A2A_BATCH_CONCURRENCY = int(os.getenv("A2A_BATCH_CONCURRENCY", "8"))
+# Largest JSON array accepted by the bulk endpoint, and longest line of an NDJSON upload
+BULK_MAX_JSON_BYTES = int(os.getenv("BULK_MAX_JSON_BYTES", str(10 * 1024 * 1024)))
+BULK_MAX_LINE_BYTES = int(os.getenv("BULK_MAX_LINE_BYTES", str(64 * 1024)))
+
 
 # JSON-RPC 2.0 models
 class JsonRpcRequest(BaseModel):
@@ -21,28 +73,90 @@ class JsonRpcRequest(BaseModel):
     id: Optional[int | str] = None
 
 
-class JsonRpcResponse(BaseModel):
-    jsonrpc: str = Field(default="2.0")
-    result: Any
-    id: int | str | None = None
+def _jsonrpc_result(result: Any, request_id: int | str | None) -> dict[str, Any]:
+    # Responses are built as plain dicts and encoded straight to bytes, validating a
+    # model for them would only repeat the work.
+    return {"jsonrpc": "2.0", "result": result, "id": request_id}
 
 
-class JsonRpcError(BaseModel):
-    code: int
-    message: str
-    data: Any | None = None
+def get_calculator(request: Request) -> calculator:
+    """Create a calculator that leases its agent from the application's agent pool."""
+    return calculator(request.app.state.agent_pool, request.app.state.admission)
 
 
-class JsonRpcErrorResponse(BaseModel):
-    jsonrpc: str = Field(default="2.0")
-    error: JsonRpcError
-    id: int | str | None = None
+def get_result_cache(request: Request) -> ResultCache | None:
+    """The application's result cache, or None when caching is disabled."""
+    cache: ResultCache | None = request.app.state.result_cache
+    return cache
+
+
+def get_bulk_runner(request: Request) -> BulkRunner:
+    """The bulk runner holding the configured concurrency and per-item timeout."""
+    bulk_runner: BulkRunner = request.app.state.bulk_runner
+    return bulk_runner
+
+
+def get_task_manager(request: Request) -> TaskManager:
+    """The application's background worker pool for A2A tasks."""
+    task_manager: TaskManager = request.app.state.task_manager
+    return task_manager
+
+
+def get_conversations(request: Request) -> ConversationStore | None:
+    """The A2A context to agent thread map, or None when context reuse is disabled."""
+    conversations: ConversationStore | None = request.app.state.conversations
+    return conversations
+
+
+def get_deadline_policy(request: Request) -> DeadlinePolicy:
+    """The default and maximum time a request may take."""
+    deadlines: DeadlinePolicy = request.app.state.deadlines
+    return deadlines
+
+
+def get_agent_cards(request: Request) -> AgentCardRegistry:
+    """The agent cards published for discovery, encoded once and cached."""
+    agent_cards: AgentCardRegistry = request.app.state.agent_cards
+    return agent_cards
+
+
+@dataclass
+class _RpcOutcome:
+    """The JSON-RPC response for one request, with the HTTP status it would get on its own."""
+
+    payload: dict[str, Any]
+    status_code: int = 200
+    headers: dict[str, str] | None = None
+
+    def to_response(self) -> FastJSONResponse:
+        return FastJSONResponse(
+            content=self.payload, status_code=self.status_code, headers=self.headers
+        )
+
+
+def _jsonrpc_error(
+    request_id: int | str | None,
+    code: int,
+    message: str,
+    status_code: int,
+    data: Any | None = None,
+    headers: dict[str, str] | None = None,
+) -> _RpcOutcome:
+    error: dict[str, Any] = {"code": code, "message": message}
+    if data is not None:
+        error["data"] = data
+    return _RpcOutcome(
+        {"jsonrpc": "2.0", "error": error, "id": request_id},
+        status_code=status_code,
+        headers=headers,
+    )
 
 
 router = APIRouter(
     prefix="/agents",
     tags=["agents"],
     responses={404: {"description": "Not Found"}},
+    default_response_class=FastJSONResponse,
 )
 
 
@@ -61,12 +175,35 @@ class A2AMessage(BaseModel):
     role: str
     parts: list[A2AMessagePart]
     messageId: str
+    contextId: str | None = None
+
+
+class A2APushNotificationConfig(BaseModel):
+    """A2A push notification target for task updates"""
+
+    url: str
+    token: str | None = None
+
+
+class A2AMessageSendConfiguration(BaseModel):
+    """A2A SendMessage configuration"""
+
+    blocking: bool | None = None
+    pushNotificationConfig: A2APushNotificationConfig | None = None
 
 
 class A2ASendMessageParams(BaseModel):
     """A2A SendMessage parameters"""
 
     message: A2AMessage
+    configuration: A2AMessageSendConfiguration | None = None
+    metadata: dict[str, Any] | None = None
+
+
+class A2ATaskIdParams(BaseModel):
+    """A2A tasks/get and tasks/cancel parameters"""
+
+    id: str
 
 
 class A2AJsonRpcRequest(BaseModel):
@@ -133,6 +270,105 @@ class count_letters_response(BaseModel):
     answer: str
 
 
+def _sse_event(request_id: str | int, result: dict[str, Any]) -> bytes:
+    return b"data: " + dumps(_jsonrpc_result(result, request_id)) + b"\n\n"
+
+
+async def _stream_a2a_events(
+    request: "A2AJsonRpcRequest",
+    question: str,
+    subject: calculator,
+    cache: ResultCache | None,
+    conversations: ConversationStore | None,
+    deadline: float,
+) -> AsyncIterator[bytes]:
+    """
+    Server-Sent Events for A2A `message/stream`: the submitted task right away,
+    status updates for every tool call, the answer text as it is produced, and
+    the final answer artifact followed by the completed status. The run fails when
+    the `deadline` passes, and is cancelled when the client disconnects.
+    """
+    task_id = str(uuid.uuid4())
+    context_id = request.params.message.contextId or str(uuid.uuid4())
+
+    def status_update(state: str, text: str | None = None, final: bool = False) -> bytes:
+        status: dict[str, Any] = {"state": state}
+        if text:
+            status["message"] = agent_message(text)
+        return _sse_event(
+            request.id,
+            {
+                "kind": "status-update",
+                "taskId": task_id,
+                "contextId": context_id,
+                "status": status,
+                "final": final,
+            },
+        )
+
+    def artifact_update(artifact_id: str, text: str, append: bool, last_chunk: bool) -> bytes:
+        return _sse_event(
+            request.id,
+            {
+                "kind": "artifact-update",
+                "taskId": task_id,
+                "contextId": context_id,
+                "artifact": {"artifactId": artifact_id, "parts": [{"kind": "text", "text": text}]},
+                "append": append,
+                "lastChunk": last_chunk,
+            },
+        )
+
+    yield _sse_event(
+        request.id,
+        {"kind": "task", "id": task_id, "contextId": context_id, "status": {"state": "submitted"}},
+    )
+    yield status_update("working")
+
+    try:
+        streamed_text = False
+        async with use_conversation(
+            conversations, request.params.message.contextId
+        ) as conversation:
+            updates = stream_answer(question, subject, cache, conversation)
+            async for update in iterate_until(deadline, updates):
+                if update.kind == "tool_call":
+                    yield status_update(
+                        "working", f"Calling {update.tool_name}({update.arguments})"
+                    )
+                elif update.kind == "tool_result":
+                    yield status_update("working", f"Tool returned {update.result}")
+                elif update.kind == "text" and update.text:
+                    yield artifact_update(
+                        "answer-text", update.text, append=streamed_text, last_chunk=False
+                    )
+                    streamed_text = True
+                elif update.kind == "final":
+                    if streamed_text:
+                        yield artifact_update("answer-text", "", append=True, last_chunk=True)
+                    yield artifact_update(
+                        "answer", format_answer_text(update.response), append=False, last_chunk=True
+                    )
+                    yield status_update("completed", final=True)
+    except (AdmissionRejectedError, UpstreamUnavailableError) as e:
+        yield status_update("failed", str(e), final=True)
+    except TimeoutError as e:
+        if asyncio.get_running_loop().time() < deadline:
+            # Not our deadline: a timeout within the run, the stream still has to end.
+            logger.error("Streaming agent run timed out: %s", e, exc_info=True)
+            yield status_update("failed", "Agent run timed out", final=True)
+            return
+        record_cancelled(DEADLINE, A2A_ROUTE)
+        yield status_update("failed", "Deadline exceeded", final=True)
+    except asyncio.CancelledError:
+        # Starlette cancels the response when the client disconnects.
+        record_cancelled(DISCONNECT, A2A_ROUTE)
+        raise
+    except Exception as e:
+        logger.error("Streaming agent run failed: %s", e, exc_info=True)
+        yield status_update("failed", f"Internal error: {e}", final=True)
+
+
 @router.get("/hello-world")
 async def hello_world():
     """
@@ -145,44 +381,58 @@ async def hello_world():
     return {"message": response_message}
 
 
-@router.post("/count-letters")
-async def count_letters(request: CountLettersRequest) -> count_letters_response:
-    """
-    Regular REST API endpoint for counting letters.
-    Accepts: {"question": "..."}
-    Returns: count_letters_response
-    """
-    logger.info(f"Received count-letters request: {request.model_dump()}")
-    logger.debug(f"Request question field: '{request.question}' (type: {type(request.question)})")
-
-    subject = calculator()
-    results = await subject.run(request.question)
-
+def _to_count_letters_response(results: calculator_response | None) -> count_letters_response:
     if results is None:
         logger.warning("Calculator returned None results")
         return count_letters_response(answer="", finalNumber=0, reasoning="", chainOfThought="")
-
-    responseValue = count_letters_response(
+    return count_letters_response(
         answer=results.answer,
         chainOfThought=results.chain_of_thought,
         reasoning=results.reasoning,
         finalNumber=results.final_number,
     )
 
-    logger.info(f"Returning response: finalNumber={responseValue.finalNumber}")
-    return responseValue
 
-
-@router.post("/count-letters-a2a")
-async def count_letters_a2a(request: A2AJsonRpcRequest) -> JSONResponse:
+def _task_outcome(rpc_request: JsonRpcRequest, task_manager: TaskManager) -> _RpcOutcome:
+    """Handle `tasks/get` and `tasks/cancel`."""
+    params = A2ATaskIdParams.model_validate(rpc_request.params)
+    try:
+        if rpc_request.method == "tasks/cancel":
+            record = task_manager.cancel(params.id)
+        else:
+            record = task_manager.get(params.id)
+    except TaskNotFoundError:
+        return _jsonrpc_error(rpc_request.id, -32001, "Task not found", status_code=404)
+    except TaskNotCancelableError:
+        return _jsonrpc_error(rpc_request.id, -32002, "Task cannot be canceled", status_code=400)
+    return _RpcOutcome(_jsonrpc_result(record.to_a2a(), rpc_request.id))
+
+
+async def _handle_rpc(
+    body: Any,
+    subject: calculator,
+    cache: ResultCache | None,
+    conversations: ConversationStore | None,
+    task_manager: TaskManager,
+    deadlines: DeadlinePolicy,
+    deadline: float,
+    allow_streaming: bool = True,
+) -> _RpcOutcome | StreamingResponse:
     """
-    A2A JSON-RPC 2.0 endpoint for counting letters.
-    Accepts A2A-compliant JSON-RPC request with typed message structure.
-    Returns: JSON-RPC 2.0 response with A2A Message object
+    Handle a single JSON-RPC request object. Messages have to be answered by the
+    request's `deadline`, or earlier when their metadata asks for a shorter timeout.
     """
+    request_id = body.get("id") if isinstance(body, dict) else None
     try:
+        rpc_request = JsonRpcRequest.model_validate(body)
+        if rpc_request.method in ("tasks/get", "tasks/cancel"):
+            return _task_outcome(rpc_request, task_manager)
+
+        request = A2AJsonRpcRequest.model_validate(body)
         logger.info(
-            f"A2A endpoint - Method: {request.method}, Message ID: {request.params.message.messageId}"
+            "A2A endpoint - Method: %s, Message ID: %s",
+            request.method,
+            request.params.message.messageId,
         )
 
         # Extract question from the first text part
@@ -193,83 +443,234 @@ async def count_letters_a2a(request: A2AJsonRpcRequest) -> JSONResponse:
                 break
 
         if not question:
-            error_response = JsonRpcErrorResponse(
-                error=JsonRpcError(
-                    code=-32602,
-                    message="Invalid A2A message - no text part found in message.parts",
-                ),
-                id=request.id,
+            return _jsonrpc_error(
+                request.id,
+                -32602,
+                "Invalid A2A message - no text part found in message.parts",
+                status_code=400,
             )
-            return JSONResponse(content=error_response.model_dump(), status_code=400)
-
-        logger.info(f"Extracted question: {question}")
-
-        # Run the calculator
-        subject = calculator()
-        results = await subject.run(question)
 
-        if results is None:
-            logger.warning("Calculator returned None results")
-            answer_text = "I couldn't process the question."
-        else:
-            # Format the answer as a text response combining all information
-            answer_text = (
-                f"Answer: {results.answer}\n"
-                f"Final Number: {results.final_number}\n"
-                f"Reasoning: {results.reasoning}\n"
-                f"Chain of Thought: {results.chain_of_thought}"
+        logger.info("Extracted question: %s", question)
+        metadata = request.params.metadata or {}
+        if TIMEOUT_METADATA_KEY in metadata:
+            deadline = deadlines.deadline(metadata[TIMEOUT_METADATA_KEY], not_after=deadline)
+
+        if request.method == "message/stream":
+            if not A2A_STREAMING_ENABLED:
+                return _jsonrpc_error(
+                    request.id, -32004, "Streaming is not supported", status_code=400
+                )
+            if not allow_streaming:
+                return _jsonrpc_error(
+                    request.id,
+                    -32600,
+                    "Invalid Request - message/stream cannot be part of a batch",
+                    status_code=400,
+                )
+            return StreamingResponse(
+                _stream_a2a_events(request, question, subject, cache, conversations, deadline),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
             )
 
-        # Generate UUID for response message
-        import uuid
+        configuration = request.params.configuration
+        if configuration is not None and (
+            configuration.blocking is False or configuration.pushNotificationConfig is not None
+        ):
+            # According to A2A spec section 3.1.1, SendMessage may return a Task object
+            # for async processing. The run continues on a background worker.
+            push_config = configuration.pushNotificationConfig
+            try:
+                record = task_manager.submit(
+                    question,
+                    context_id=request.params.message.contextId,
+                    push_url=push_config.url if push_config else None,
+                    push_token=push_config.token if push_config else None,
+                )
+            except InvalidPushUrlError as e:
+                return _jsonrpc_error(request.id, -32602, str(e), status_code=400)
+            except TaskQueueFullError:
+                return _jsonrpc_error(
+                    request.id,
+                    -32000,
+                    "Task queue is full",
+                    status_code=503,
+                    headers={"Retry-After": "1"},
+                )
+            logger.info("Submitted A2A task %s", record.id)
+            return _RpcOutcome(_jsonrpc_result(record.to_a2a(), request.id))
 
-        message_id = str(uuid.uuid4())
+        # Run the calculator
+        timeout = asyncio.timeout_at(deadline)
+        try:
+            async with (
+                timeout,
+                use_conversation(conversations, request.params.message.contextId) as conversation,
+            ):
+                answer = await answer_question(question, subject, cache, conversation)
+        except TimeoutError:
+            if not timeout.expired():
+                raise
+            record_cancelled(DEADLINE, A2A_ROUTE)
+            return _jsonrpc_error(
+                request.id,
+                -32000,
+                "Deadline exceeded",
+                status_code=504,
+                data={"reason": DEADLINE},
+            )
+        answer_text = format_answer_text(answer.response)
 
         # According to A2A spec section 3.1.1, SendMessage can return either:
         # - A Task object (for async processing)
         # - A Message object (for simple synchronous interactions)
         #
-        # Since we're doing synchronous processing, return a Message directly
-        a2a_message = {
-            "kind": "message",
-            "messageId": message_id,
-            "role": "Agent",  # .NET expects PascalCase role
-            "parts": [{"kind": "text", "text": answer_text}],
-        }
+        # Blocking requests are processed synchronously, so return a Message directly
+        a2a_message = agent_message(answer_text, {"servedBy": answer.served_by})
 
         # Return JSON-RPC response with A2A Message object
-        jsonrpc_response = JsonRpcResponse(result=a2a_message, id=request.id)
-        response_data = jsonrpc_response.model_dump()
-        logger.info(
-            f"Returning A2A-compliant JSON-RPC response with Message object: {json.dumps(response_data)}"
+        jsonrpc_response = _jsonrpc_result(a2a_message, request.id)
+        logger.debug(
+            "Returning A2A-compliant JSON-RPC response with Message object: %s", jsonrpc_response
+        )
+        return _RpcOutcome(jsonrpc_response, headers={SERVED_BY_HEADER: answer.served_by})
+
+    except AdmissionRejectedError as e:
+        return _jsonrpc_error(
+            request_id,
+            -32000,
+            "Server is busy",
+            status_code=429,
+            data={"retryAfter": e.retry_after},
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
+    except UpstreamUnavailableError as e:
+        logger.warning("Upstream unavailable: %s", e)
+        return _jsonrpc_error(
+            request_id,
+            -32000,
+            "Upstream service unavailable",
+            status_code=503,
+            data={"retryAfter": e.retry_after},
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
         )
-        return JSONResponse(content=response_data)
-
     except ValidationError as e:
-        logger.error(f"Validation error: {e}")
-        error_response = JsonRpcErrorResponse(
-            error=JsonRpcError(code=-32600, message="Invalid Request", data=e.errors()),
-            id=getattr(request, "id", None),
+        logger.error("Validation error: %s", e)
+        return _jsonrpc_error(
+            request_id,
+            -32600,
+            "Invalid Request",
+            status_code=400,
+            data=e.errors(include_url=False, include_context=False),
         )
-        return JSONResponse(content=error_response.model_dump(), status_code=400)
     except Exception as e:
-        logger.error(f"Unexpected error: {e}", exc_info=True)
-        error_response = JsonRpcErrorResponse(
-            error=JsonRpcError(code=-32603, message="Internal error", data=str(e)),
-            id=getattr(request, "id", None),
-        )
-        return JSONResponse(content=error_response.model_dump(), status_code=500)
+        logger.error("Unexpected error: %s", e, exc_info=True)
+        return _jsonrpc_error(request_id, -32603, "Internal error", status_code=500, data=str(e))
+
+
+async def _handle_batch(
+    batch: list[Any],
+    subject: calculator,
+    cache: ResultCache | None,
+    conversations: ConversationStore | None,
+    task_manager: TaskManager,
+    deadlines: DeadlinePolicy,
+    deadline: float,
+) -> FastJSONResponse:
+    """
+    Handle a JSON-RPC 2.0 batch: the requests run concurrently, at most
+    A2A_BATCH_CONCURRENCY at a time, and their responses come back in request order.
+    """
+    if not batch:
+        return _jsonrpc_error(
+            None, -32600, "Invalid Request - empty batch", status_code=400
+        ).to_response()
+    if len(batch) > A2A_BATCH_MAX_SIZE:
+        return _jsonrpc_error(
+            None,
+            -32600,
+            f"Invalid Request - batch exceeds {A2A_BATCH_MAX_SIZE} requests",
+            status_code=400,
+        ).to_response()
+
+    semaphore = asyncio.Semaphore(A2A_BATCH_CONCURRENCY)
+
+    async def run(item: Any) -> dict[str, Any]:
+        async with semaphore:
+            outcome = await _handle_rpc(
+                item,
+                subject,
+                cache,
+                conversations,
+                task_manager,
+                deadlines,
+                deadline,
+                allow_streaming=False,
+            )
+        if not isinstance(outcome, _RpcOutcome):
+            raise TypeError("A batched request must not be answered with a stream")
+        return outcome.payload
+
+    logger.info("A2A endpoint - batch of %d requests", len(batch))
+    return FastJSONResponse(content=await asyncio.gather(*(run(item) for item in batch)))
 
 
-@router.get("/count-letters/.well-known/agent-card.json")
-async def get_count_letters_agent_card(request: Request):
+A2A_ROUTE = "/agents/count-letters-a2a"
+
+
+@router.post("/count-letters-a2a")
+async def count_letters_a2a(
+    http_request: Request,
+    subject: calculator = Depends(get_calculator),
+    cache: ResultCache | None = Depends(get_result_cache),
+    conversations: ConversationStore | None = Depends(get_conversations),
+    task_manager: TaskManager = Depends(get_task_manager),
+    deadlines: DeadlinePolicy = Depends(get_deadline_policy),
+) -> Response:
     """
-    Returns the A2A protocol agent card for the count-letters agent.
-    This endpoint provides agent discovery information following the A2A specification.
+    A2A JSON-RPC 2.0 endpoint for counting letters.
+    Accepts A2A-compliant JSON-RPC request with typed message structure.
+    Returns: JSON-RPC 2.0 response with A2A Message object, or for `message/stream`
+    a Server-Sent Events stream of A2A task, status and artifact events.
+    Non-blocking `message/send` requests return a Task, which can be polled with
+    `tasks/get` and canceled with `tasks/cancel`.
+    Also accepts JSON-RPC batch arrays, which are executed concurrently.
+    The `X-Request-Timeout` header (in seconds) bounds the time to answer, runs are
+    cancelled when it passes or when the client disconnects.
     """
+    try:
+        body = loads(await http_request.body())
+    except ValueError:
+        return _jsonrpc_error(None, -32700, "Parse error", status_code=400).to_response()
+
+    deadline = deadlines.deadline(http_request.headers.get(TIMEOUT_HEADER))
+    try:
+        if isinstance(body, list):
+            return await run_cancellable(
+                _handle_batch(
+                    body, subject, cache, conversations, task_manager, deadlines, deadline
+                ),
+                http_request,
+                A2A_ROUTE,
+            )
+        outcome = await run_cancellable(
+            _handle_rpc(body, subject, cache, conversations, task_manager, deadlines, deadline),
+            http_request,
+            A2A_ROUTE,
+        )
+    except RequestCancelledError as e:
+        # Nobody is listening anymore, the response only shows up in the logs.
+        return _jsonrpc_error(None, -32000, str(e), status_code=499).to_response()
+    if isinstance(outcome, StreamingResponse):
+        return outcome
+    return outcome.to_response()
+
+
+def _count_letters_card(base_url: str, push_notifications: bool) -> AgentCard:
+    """The A2A protocol agent card for the count-letters agent."""
     capabilities = AgentCapabilities(
-        streaming=False,
-        push_notifications=False,
+        streaming=A2A_STREAMING_ENABLED,
+        push_notifications=push_notifications,
     )
 
     count_letters_skill = AgentSkill(
@@ -284,11 +685,6 @@ async def get_count_letters_agent_card(request: Request):
         ],
     )
 
-    # Build the base URL from the request, respecting proxy headers
-    # Azure Container Apps and other cloud platforms use reverse proxies
-    scheme = request.headers.get("X-Forwarded-Proto", request.url.scheme)
-    host = request.headers.get("X-Forwarded-Host", request.url.netloc)
-    base_url = f"{scheme}://{host}"
     # Point to the A2A-specific endpoint that handles JSON-RPC
     agent_url = f"{base_url}/agents/count-letters-a2a"
 
@@ -301,7 +697,7 @@ async def get_count_letters_agent_card(request: Request):
         )
     ]
 
-    agent_card = AgentCard(
+    return AgentCard(
         name="CountLettersAgent",
         description="Analyzes text to count letters and provide detailed reasoning about letter counts in questions.",
         version="1.0.0",
@@ -316,5 +712,155 @@ async def get_count_letters_agent_card(request: Request):
         skills=[count_letters_skill],
     )
 
-    # Return with by_alias=False to use camelCase field names
-    return JSONResponse(content=agent_card.model_dump(mode="json", by_alias=False))
+
+def create_agent_cards(task_manager: TaskManager) -> AgentCardRegistry:
+    """The agents of this router published for discovery, by their path segment."""
+    registry = AgentCardRegistry.from_env()
+    registry.register(
+        "count-letters",
+        partial(_count_letters_card, push_notifications=task_manager.push_notifications),
+    )
+    return registry
+
+
+@router.get("/{agent_name}/.well-known/agent-card.json")
+async def get_agent_card(
+    agent_name: str,
+    request: Request,
+    registry: AgentCardRegistry = Depends(get_agent_cards),
+) -> Response:
+    """
+    Returns the A2A protocol agent card of a registered agent.
+    This endpoint provides agent discovery information following the A2A specification.
+    Cards are built once per base URL and answer `If-None-Match` with 304 Not Modified.
+    """
+    if agent_name not in registry:
+        raise HTTPException(status_code=404, detail=f"Unknown agent '{agent_name}'")
+    return registry.response(agent_name, request)
+
+
+@router.post("/count-letters")
+async def count_letters(
+    request: CountLettersRequest,
+    http_request: Request,
+    response: Response,
+    subject: calculator = Depends(get_calculator),
+    cache: ResultCache | None = Depends(get_result_cache),
+    deadlines: DeadlinePolicy = Depends(get_deadline_policy),
+) -> count_letters_response:
+    """
+    Regular REST API endpoint for counting letters.
+    Accepts: {"question": "..."}, and an optional `X-Request-Timeout` header in seconds
+    Returns: count_letters_response, or 504 when the agent run exceeded the deadline
+    """
+    logger.info("Received count-letters request: %s", request)
+    logger.debug("Request question field: '%s'", request.question)
+
+    answer = await run_cancellable(
+        answer_question(request.question, subject, cache),
+        http_request,
+        "/agents/count-letters",
+        deadlines.deadline(http_request.headers.get(TIMEOUT_HEADER)),
+    )
+    response.headers[SERVED_BY_HEADER] = answer.served_by
+    responseValue = _to_count_letters_response(answer.response)
+
+    logger.info("Returning response: finalNumber=%s", responseValue.finalNumber)
+    return responseValue
+
+
+async def _bulk_questions(
+    content_type: str, body: AsyncIterator[bytes]
+) -> AsyncIterator[str | ValueError]:
+    """
+    Questions from a bulk upload: NDJSON is read line by line as it arrives,
+    anything else is expected to be a JSON array of `CountLettersRequest`.
+    """
+    if content_type.startswith("application/x-ndjson"):
+        async for line in iter_ndjson_lines(body, BULK_MAX_LINE_BYTES):
+            if isinstance(line, ValueError):
+                yield line
+                continue
+            try:
+                yield CountLettersRequest.model_validate_json(line).question
+            except ValidationError as e:
+                yield ValueError(f"Invalid request line: {e.errors(include_url=False)}")
+        return
+
+    # A JSON array is only parsed once it is complete, so it has to fit in memory.
+    chunks: list[bytes] = []
+    size = 0
+    async for chunk in body:
+        size += len(chunk)
+        if size > BULK_MAX_JSON_BYTES:
+            yield ValueError(
+                f"Request body exceeds {BULK_MAX_JSON_BYTES} bytes, "
+                "send larger runs as NDJSON (Content-Type: application/x-ndjson)"
+            )
+            return
+        chunks.append(chunk)
+    try:
+        items = loads(b"".join(chunks))
+    except ValueError:
+        yield ValueError("Request body is not valid JSON")
+        return
+    if not isinstance(items, list):
+        yield ValueError("Request body must be a JSON array of count-letters requests")
+        return
+    for item in items:
+        try:
+            yield CountLettersRequest.model_validate(item).question
+        except ValidationError as e:
+            yield ValueError(f"Invalid request: {e.errors(include_url=False)}")
+
+
+def _bulk_line(result: BulkResult) -> bytes:
+    line: dict[str, Any] = {"index": result.index}
+    if result.answer is not None:
+        line["result"] = _to_count_letters_response(result.answer.response).model_dump()
+        line["servedBy"] = result.answer.served_by
+    else:
+        line["error"] = result.error
+    line["durationMs"] = round(result.duration * 1000, 1)
+    return dumps(line) + b"\n"
+
+
+@router.post("/count-letters/bulk")
+async def count_letters_bulk(
+    http_request: Request,
+    concurrency: int | None = Query(default=None, ge=1),
+    timeout: float | None = Query(default=None, gt=0),
+    subject: calculator = Depends(get_calculator),
+    cache: ResultCache | None = Depends(get_result_cache),
+    bulk_runner: BulkRunner = Depends(get_bulk_runner),
+) -> DuplexNdjsonResponse:
+    """
+    Bulk variant of /count-letters.
+    Accepts: a JSON array of {"question": "..."}, or an NDJSON upload
+    (Content-Type: application/x-ndjson) with one request per line.
+    Returns: an NDJSON stream with one line per question as soon as it finishes,
+    {"index", "result" | "error", "servedBy", "durationMs"}, followed by a
+    {"summary": ...} line with throughput and latency percentiles.
+    `concurrency` and `timeout` (per question, in seconds) can lower, but not raise,
+    the configured BULK_CONCURRENCY and BULK_ITEM_TIMEOUT_SECONDS.
+    JSON arrays are limited to BULK_MAX_JSON_BYTES, NDJSON lines to BULK_MAX_LINE_BYTES.
+    """
+    runner = BulkRunner(
+        concurrency=min(concurrency or bulk_runner.concurrency, bulk_runner.concurrency),
+        item_timeout=min(timeout or bulk_runner.item_timeout, bulk_runner.item_timeout),
+    )
+
+    content_type = http_request.headers.get("content-type", "")
+
+    async def lines(body: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        summary = BulkSummary()
+        async for result in runner.run(
+            _bulk_questions(content_type, body),
+            lambda question: answer_question(question, subject, cache),
+            summary,
+        ):
+            yield _bulk_line(result)
+        logger.info("Bulk run finished: %s", summary.to_dict())
+        yield dumps({"summary": summary.to_dict()}) + b"\n"
+
+    return DuplexNdjsonResponse(lines)
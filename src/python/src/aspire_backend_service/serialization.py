@@ -0,0 +1,43 @@
+from typing import Any
+
+import pydantic_core
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode to compact JSON bytes. Models are encoded by pydantic's serializer without
+    a dict in between; everything else with orjson when it is installed, and with
+    pydantic-core otherwise. Both write NaN and infinity as null.
+    """
+    if isinstance(content, BaseModel):
+        return content.__pydantic_serializer__.to_json(content)
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return pydantic_core.to_json(content)
+
+
+def loads(data: bytes | str) -> Any:
+    """Decode JSON, raising a ValueError for invalid input."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return pydantic_core.from_json(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that encodes its content with `dumps`."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
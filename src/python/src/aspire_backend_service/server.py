@@ -0,0 +1,122 @@
+import importlib.util
+import logging
+import os
+import signal
+import time
+from dataclasses import dataclass, field
+from types import FrameType
+
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+
+logger = logging.getLogger(__name__)
+
+APP = "aspire_backend_service.main:app"
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on, which respects container CPU sets."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+@dataclass
+class ServerSettings:
+    """
+    How the production server runs. Every worker is a process of its own, with its own
+    lifespan: its own agent pool, caches, A2A tasks and conversations.
+
+    `keep_alive` should outlast the idle timeout of the proxy in front of the service,
+    so the proxy closes idle connections and never reuses one the server just closed.
+    On SIGTERM a worker first reports not ready for `drain_delay` seconds, while it keeps
+    serving, so the load balancer stops routing to it. Then it stops accepting connections
+    and waits up to `graceful_timeout` seconds for the requests in flight.
+    """
+
+    host: str = "0.0.0.0"
+    port: int = 8000
+    workers: int = field(default_factory=available_cpus)
+    keep_alive: int = 75
+    backlog: int = 2048
+    drain_delay: float = 5.0
+    graceful_timeout: int = 30
+    log_level: str = "info"
+
+    @classmethod
+    def from_env(cls) -> "ServerSettings":
+        return cls(
+            host=os.getenv("HOST", "0.0.0.0"),
+            port=int(os.getenv("PORT", "8000")),
+            workers=int(os.getenv("WEB_CONCURRENCY", "0")) or available_cpus(),
+            keep_alive=int(os.getenv("SERVER_KEEP_ALIVE_SECONDS", "75")),
+            backlog=int(os.getenv("SERVER_BACKLOG", "2048")),
+            drain_delay=float(os.getenv("SERVER_DRAIN_DELAY_SECONDS", "5")),
+            graceful_timeout=int(os.getenv("SERVER_GRACEFUL_SHUTDOWN_SECONDS", "30")),
+            log_level=os.getenv("LOG_LEVEL", "info").lower(),
+        )
+
+    def config(self) -> uvicorn.Config:
+        # uvloop and httptools come with `fastapi[standard]`, fall back when they are missing.
+        return uvicorn.Config(
+            APP,
+            host=self.host,
+            port=self.port,
+            workers=self.workers,
+            loop="uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+            http="httptools" if importlib.util.find_spec("httptools") else "h11",
+            timeout_keep_alive=self.keep_alive,
+            backlog=self.backlog,
+            timeout_graceful_shutdown=self.graceful_timeout,
+            log_level=self.log_level,
+        )
+
+
+class DrainingServer(uvicorn.Server):
+    """
+    uvicorn server that fails its readiness probe for `drain_delay` seconds before it
+    shuts down. A second signal shuts down right away.
+    """
+
+    def __init__(self, config: uvicorn.Config, drain_delay: float = 5.0):
+        super().__init__(config)
+        self.drain_delay = drain_delay
+        self.draining_since: float | None = None
+
+    def handle_exit(self, sig: int, frame: FrameType | None) -> None:
+        if self.draining_since is not None or self.drain_delay <= 0:
+            super().handle_exit(sig, frame)
+            return
+        from .main import app
+
+        app.state.draining = True
+        self.draining_since = time.monotonic()
+        logger.info(
+            "Received %s, not ready anymore, shutting down in %.1fs",
+            signal.Signals(sig).name,
+            self.drain_delay,
+        )
+
+    async def on_tick(self, counter: int) -> bool:
+        if (
+            self.draining_since is not None
+            and time.monotonic() - self.draining_since >= self.drain_delay
+        ):
+            self.should_exit = True
+        return await super().on_tick(counter)
+
+
+def main() -> None:
+    """Run the application with the settings from the environment."""
+    settings = ServerSettings.from_env()
+    config = settings.config()
+    server = DrainingServer(config, drain_delay=settings.drain_delay)
+    if config.workers > 1:
+        logger.info(
+            "Starting %d workers; A2A tasks and conversations live in the worker that "
+            "created them, route a client to the same worker to continue them",
+            config.workers,
+        )
+        Multiprocess(config, target=server.run, sockets=[config.bind_socket()]).run()
+    else:
+        server.run()
@@ -1,52 +1,308 @@
 import logging
 import os
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
 
 from opentelemetry import metrics, trace
 from opentelemetry._logs import set_logger_provider
-from opentelemetry.exporter.otlp.proto.grpc._log_exporter import OTLPLogExporter
-from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
-from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
-from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+from opentelemetry.context import Context
 from opentelemetry.sdk._logs import LoggerProvider, LoggingHandler
 from opentelemetry.sdk._logs.export import BatchLogRecordProcessor
-from opentelemetry.sdk.metrics import MeterProvider
-from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
+from opentelemetry.sdk.metrics import Histogram, MeterProvider
+from opentelemetry.sdk.metrics.export import MetricReader, PeriodicExportingMetricReader
+from opentelemetry.sdk.metrics.view import ExplicitBucketHistogramAggregation, View
 from opentelemetry.sdk.resources import Resource
-from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor, TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
+from opentelemetry.sdk.trace.sampling import (
+    ALWAYS_ON,
+    ParentBased,
+    Sampler,
+    TraceIdRatioBased,
+)
+from opentelemetry.trace import StatusCode
 
+logger = logging.getLogger(__name__)
 
-def configure_telemetry(app, service_name: str = "app"):
-    """Configure OpenTelemetry for FastAPI application."""
+# The SDK's default buckets are meant for milliseconds, all durations here are in seconds.
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
 
-    # Get OTLP endpoint from environment or use default for standalone dashboard
-    otlp_endpoint = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4317")
+meter = metrics.get_meter(__name__)
+dropped_counter = meter.create_counter(
+    "telemetry.dropped",
+    unit="{item}",
+    description="Spans and log records dropped before export, by signal and reason",
+)
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).lower() == "true"
+
+
+@dataclass
+class TelemetrySettings:
+    """
+    Which signals are exported and how. Without an OTLP endpoint nothing is installed
+    at all, so the OpenTelemetry API stays a no-op (apart from a local Prometheus endpoint).
+    """
+
+    endpoint: str | None = None
+    traces_enabled: bool = True
+    metrics_enabled: bool = True
+    logs_enabled: bool = True
+    sample_ratio: float = 1.0
+    tail_sampling: bool = False
+    slow_request_seconds: float = 2.0
+    export_queue_size: int = 2048
+    log_level: str = "INFO"
+    prometheus_enabled: bool = False
+
+    @classmethod
+    def from_env(cls) -> "TelemetrySettings":
+        endpoint = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT") or None
+        if _env_flag("OTEL_SDK_DISABLED", False):
+            endpoint = None
+        return cls(
+            endpoint=endpoint,
+            traces_enabled=_env_flag("TELEMETRY_TRACES_ENABLED", True),
+            metrics_enabled=_env_flag("TELEMETRY_METRICS_ENABLED", True),
+            logs_enabled=_env_flag("TELEMETRY_LOGS_ENABLED", True),
+            sample_ratio=float(os.getenv("TELEMETRY_TRACE_SAMPLE_RATIO", "1.0")),
+            tail_sampling=_env_flag("TELEMETRY_TAIL_SAMPLING_ENABLED", False),
+            slow_request_seconds=float(os.getenv("TELEMETRY_SLOW_REQUEST_SECONDS", "2.0")),
+            export_queue_size=int(os.getenv("TELEMETRY_EXPORT_QUEUE_SIZE", "2048")),
+            log_level=os.getenv("TELEMETRY_LOG_LEVEL", "INFO").upper(),
+            prometheus_enabled=_env_flag("PROMETHEUS_METRICS_ENABLED", False),
+        )
+
+    @property
+    def exports_traces(self) -> bool:
+        return self.endpoint is not None and self.traces_enabled
+
+    @property
+    def exports_metrics(self) -> bool:
+        return self.endpoint is not None and self.metrics_enabled
+
+    @property
+    def exports_logs(self) -> bool:
+        return self.endpoint is not None and self.logs_enabled
+
+
+def _export_queue(processor: object) -> deque | None:
+    """
+    The SDK drops silently from a bounded deque, which is private: find it to count the
+    drops, or return None when this SDK version keeps its queue elsewhere.
+    """
+    queue = getattr(getattr(processor, "_batch_processor", None), "_queue", None)
+    if not isinstance(queue, deque) or queue.maxlen is None:
+        logger.warning(
+            "%s cannot find the export queue, dropped items are not counted",
+            type(processor).__name__,
+        )
+        return None
+    return queue
+
+
+def _is_full(queue: deque | None) -> bool:
+    return queue is not None and len(queue) >= (queue.maxlen or 0)
+
+
+class CountingBatchSpanProcessor(BatchSpanProcessor):
+    """BatchSpanProcessor that counts the spans it drops because its queue is full."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._export_queue = _export_queue(self)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        if span.context.trace_flags.sampled and _is_full(self._export_queue):
+            dropped_counter.add(1, {"signal": "traces", "reason": "queue_full"})
+        super().on_end(span)
+
+
+class CountingBatchLogRecordProcessor(BatchLogRecordProcessor):
+    """BatchLogRecordProcessor that counts the records it drops because its queue is full."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._export_queue = _export_queue(self)
+
+    def on_emit(self, log_record) -> None:
+        if _is_full(self._export_queue):
+            dropped_counter.add(1, {"signal": "logs", "reason": "queue_full"})
+        super().on_emit(log_record)
+
+
+class TailSamplingSpanProcessor(SpanProcessor):
+    """
+    Keeps traces that the ratio would drop when they turn out to be interesting: any
+    span ended with an error, or the local root span took `slow_threshold` seconds or
+    more. Use it with a sampler that samples every span; this processor takes the
+    trace id ratio decision instead, so the same traces are kept as with head sampling.
+
+    Spans of traces that are not kept by the ratio are buffered until their local root
+    ends. At most `max_traces` traces are buffered, the oldest are dropped beyond that.
+    """
+
+    def __init__(
+        self,
+        delegate: SpanProcessor,
+        ratio: float,
+        slow_threshold: float,
+        max_traces: int = 1024,
+        max_spans_per_trace: int = 256,
+    ):
+        self.delegate = delegate
+        self.bound = TraceIdRatioBased.get_bound_for_rate(ratio)
+        self.slow_threshold_ns = int(slow_threshold * 1e9)
+        self.max_traces = max_traces
+        self.max_spans_per_trace = max_spans_per_trace
+        self._pending: OrderedDict[int, list[ReadableSpan]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def on_start(self, span: Span, parent_context: Context | None = None) -> None:
+        self.delegate.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        trace_id = span.context.trace_id
+        if trace_id & TraceIdRatioBased.TRACE_ID_LIMIT < self.bound:
+            self.delegate.on_end(span)
+            return
+
+        is_local_root = span.parent is None or span.parent.is_remote
+        with self._lock:
+            spans = self._pending.setdefault(trace_id, [])
+            if len(spans) < self.max_spans_per_trace:
+                spans.append(span)
+            if not is_local_root:
+                self._evict_oldest()
+                return
+            del self._pending[trace_id]
+
+        if self._is_interesting(span, spans):
+            for buffered in spans:
+                self.delegate.on_end(buffered)
+
+    def shutdown(self) -> None:
+        self.delegate.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.delegate.force_flush(timeout_millis)
+
+    def _is_interesting(self, root: ReadableSpan, spans: list[ReadableSpan]) -> bool:
+        if (
+            root.end_time is not None
+            and root.start_time is not None
+            and root.end_time - root.start_time >= self.slow_threshold_ns
+        ):
+            return True
+        return any(span.status.status_code == StatusCode.ERROR for span in spans)
+
+    def _evict_oldest(self) -> None:
+        while len(self._pending) > self.max_traces:
+            _, spans = self._pending.popitem(last=False)
+            dropped_counter.add(len(spans), {"signal": "traces", "reason": "tail_buffer_full"})
+
+
+def _sampler(settings: TelemetrySettings) -> Sampler:
+    if settings.tail_sampling:
+        # Every span is recorded, `TailSamplingSpanProcessor` decides what gets exported.
+        return ParentBased(ALWAYS_ON)
+    return ParentBased(TraceIdRatioBased(settings.sample_ratio))
+
+
+def _prometheus_reader(app) -> MetricReader | None:
+    """Expose metrics on a local `/metrics` endpoint, when the Prometheus exporter is installed."""
+    try:
+        from opentelemetry.exporter.prometheus import PrometheusMetricReader
+        from prometheus_client import make_asgi_app
+    except ImportError:
+        logger.warning(
+            "PROMETHEUS_METRICS_ENABLED is set, but opentelemetry-exporter-prometheus "
+            "is not installed (the 'prometheus' extra); /metrics is not available"
+        )
+        return None
+    app.mount("/metrics", make_asgi_app())
+    reader: MetricReader = PrometheusMetricReader()
+    return reader
+
+
+def configure_telemetry(app, service_name: str = "app", settings: TelemetrySettings | None = None):
+    """
+    Configure OpenTelemetry for FastAPI application. The exporters and the FastAPI
+    instrumentation are only imported for the signals that are enabled.
+    """
+    settings = settings or TelemetrySettings.from_env()
+    if settings.endpoint is None:
+        logger.info("OTEL_EXPORTER_OTLP_ENDPOINT is not set, OTLP export is disabled")
 
     # Create resource with service name
     resource = Resource.create({"service.name": service_name})
 
     # Configure Tracing
-    trace_provider = TracerProvider(resource=resource)
-    trace_provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=otlp_endpoint)))
-    trace.set_tracer_provider(trace_provider)
+    if settings.exports_traces:
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+
+        trace_provider = TracerProvider(resource=resource, sampler=_sampler(settings))
+        span_processor: SpanProcessor = CountingBatchSpanProcessor(
+            OTLPSpanExporter(endpoint=settings.endpoint),
+            max_queue_size=settings.export_queue_size,
+            max_export_batch_size=min(512, settings.export_queue_size),
+        )
+        if settings.tail_sampling:
+            span_processor = TailSamplingSpanProcessor(
+                span_processor, settings.sample_ratio, settings.slow_request_seconds
+            )
+        trace_provider.add_span_processor(span_processor)
+        trace.set_tracer_provider(trace_provider)
 
     # Configure Metrics
-    metric_reader = PeriodicExportingMetricReader(OTLPMetricExporter(endpoint=otlp_endpoint))
-    meter_provider = MeterProvider(resource=resource, metric_readers=[metric_reader])
-    metrics.set_meter_provider(meter_provider)
+    metric_readers: list[MetricReader] = []
+    if settings.exports_metrics:
+        from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
+
+        metric_readers.append(
+            PeriodicExportingMetricReader(OTLPMetricExporter(endpoint=settings.endpoint))
+        )
+    if settings.prometheus_enabled:
+        prometheus_reader = _prometheus_reader(app)
+        if prometheus_reader is not None:
+            metric_readers.append(prometheus_reader)
+    if metric_readers:
+        duration_view = View(
+            instrument_type=Histogram,
+            instrument_unit="s",
+            aggregation=ExplicitBucketHistogramAggregation(boundaries=DURATION_BUCKETS),
+        )
+        meter_provider = MeterProvider(
+            resource=resource, metric_readers=metric_readers, views=[duration_view]
+        )
+        metrics.set_meter_provider(meter_provider)
 
     # Configure Logging
-    logger_provider = LoggerProvider(resource=resource)
-    logger_provider.add_log_record_processor(
-        BatchLogRecordProcessor(OTLPLogExporter(endpoint=otlp_endpoint))
-    )
-    set_logger_provider(logger_provider)
+    if settings.exports_logs:
+        from opentelemetry.exporter.otlp.proto.grpc._log_exporter import OTLPLogExporter
 
-    # Add logging handler
-    handler = LoggingHandler(level=logging.NOTSET, logger_provider=logger_provider)
-    logging.getLogger().addHandler(handler)
+        logger_provider = LoggerProvider(resource=resource)
+        logger_provider.add_log_record_processor(
+            CountingBatchLogRecordProcessor(
+                OTLPLogExporter(endpoint=settings.endpoint),
+                max_queue_size=settings.export_queue_size,
+                max_export_batch_size=min(512, settings.export_queue_size),
+            )
+        )
+        set_logger_provider(logger_provider)
+
+        # Add logging handler
+        handler = LoggingHandler(logger_provider=logger_provider)
+        handler.setLevel(settings.log_level)
+        logging.getLogger().addHandler(handler)
 
     # Instrument FastAPI application
-    FastAPIInstrumentor.instrument_app(app)
+    if settings.exports_traces or metric_readers:
+        from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+
+        FastAPIInstrumentor.instrument_app(app)
 
     return trace.get_tracer(__name__)
@@ -0,0 +1,205 @@
+import asyncio
+import contextlib
+import importlib
+import logging
+import os
+import time
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from opentelemetry import metrics
+
+from .agents.agent_pool import AgentPool
+from .clients import AGENTS_CREDENTIAL_SCOPE, SDK_MODULES, AzureAgentsClients
+from .instrumentation import measure
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+OK = "ok"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+meter = metrics.get_meter(__name__)
+step_histogram = meter.create_histogram(
+    "warmup.step.duration", unit="s", description="Duration of a warm-up step attempt"
+)
+
+
+@dataclass
+class WarmupCheck:
+    """State of one warm-up step, as reported by the readiness probe."""
+
+    status: str = PENDING
+    detail: str | None = None
+    duration: float | None = None
+    attempts: int = 0
+
+    def to_dict(self) -> dict[str, Any]:
+        result: dict[str, Any] = {"status": self.status}
+        if self.detail is not None:
+            result["detail"] = self.detail
+        if self.duration is not None:
+            result["durationMs"] = round(self.duration * 1000, 1)
+        if self.attempts > 1:
+            result["attempts"] = self.attempts
+        return result
+
+
+class Warmup:
+    """
+    Brings the upstream dependencies to steady state in the background, so the port
+    opens right away while readiness reports not-ready until a request would no longer
+    pay for setup. The steps run in order:
+
+    - sdk: import the agent and Azure SDKs, on a worker thread
+    - credential: acquire the access token for the agents service
+    - upstream: make one request, leaving a keep-alive connection in the shared pool
+    - agents: pre-create the pool's agents, or validate an existing one
+    - canary: answer `canary` through the agent, when configured
+
+    A failed step is retried with exponential back-off up to `max_retry_interval`;
+    the steps that already succeeded are not repeated.
+    """
+
+    def __init__(
+        self,
+        clients: AzureAgentsClients,
+        agent_pool: AgentPool,
+        *,
+        canary: Callable[[], Awaitable[Any]] | None = None,
+        step_timeout: float = 60.0,
+        retry_interval: float = 5.0,
+        max_retry_interval: float = 60.0,
+        sdk_modules: Sequence[str] = SDK_MODULES,
+    ):
+        self.clients = clients
+        self.agent_pool = agent_pool
+        self.canary = canary
+        self.step_timeout = step_timeout
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        self.sdk_modules = list(sdk_modules)
+        self.steps: dict[str, Callable[[], Awaitable[None]]] = {
+            "sdk": self._import_sdks,
+            "credential": self._acquire_token,
+            "upstream": self._open_connection,
+            "agents": self._prepare_agents,
+            "canary": self._run_canary,
+        }
+        self.checks = {name: WarmupCheck() for name in self.steps}
+        self._task: asyncio.Task | None = None
+
+    @classmethod
+    def from_env(
+        cls,
+        clients: AzureAgentsClients,
+        agent_pool: AgentPool,
+        ask: Callable[[str], Awaitable[Any]],
+    ) -> "Warmup":
+        """`ask` answers the `WARMUP_CANARY_QUESTION` through the agent, if it is set."""
+        question = os.getenv("WARMUP_CANARY_QUESTION")
+        return cls(
+            clients,
+            agent_pool,
+            canary=(lambda: ask(question)) if question else None,
+            step_timeout=float(os.getenv("WARMUP_STEP_TIMEOUT_SECONDS", "60")),
+            retry_interval=float(os.getenv("WARMUP_RETRY_SECONDS", "5")),
+            max_retry_interval=float(os.getenv("WARMUP_MAX_RETRY_SECONDS", "60")),
+        )
+
+    @property
+    def ready(self) -> bool:
+        return all(check.status in (OK, SKIPPED) for check in self.checks.values())
+
+    def to_dict(self) -> dict[str, dict[str, Any]]:
+        return {name: check.to_dict() for name, check in self.checks.items()}
+
+    def start(self) -> None:
+        if self._skip_unconfigured():
+            return
+        self._task = asyncio.create_task(self.run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def run(self) -> None:
+        if self._skip_unconfigured():
+            return
+
+        started = time.perf_counter()
+        for name, step in self.steps.items():
+            if self.checks[name].status != SKIPPED:
+                await self._run_step(name, step)
+        logger.info("Warm-up finished in %.1f s", time.perf_counter() - started)
+
+    def _skip_unconfigured(self) -> bool:
+        """Mark the steps that cannot run as skipped, returns whether none are left."""
+        if not self.clients.endpoint:
+            # Only the fast path can answer, there is nothing to warm up.
+            for check in self.checks.values():
+                check.status = SKIPPED
+                check.detail = "AZURE_AI_PROJECT_ENDPOINT is not configured"
+            return True
+        if self.canary is None:
+            self.checks["canary"].status = SKIPPED
+            self.checks["canary"].detail = "WARMUP_CANARY_QUESTION is not set"
+        return False
+
+    async def _run_step(self, name: str, step: Callable[[], Awaitable[None]]) -> None:
+        check = self.checks[name]
+        delay = self.retry_interval
+        while True:
+            check.attempts += 1
+            started = time.perf_counter()
+            try:
+                with measure(f"warmup.{name}", step_histogram, {"warmup.step": name}):
+                    async with asyncio.timeout(self.step_timeout):
+                        await step()
+            except Exception as e:
+                check.status = FAILED
+                check.detail = f"{type(e).__name__}: {e}"
+                logger.warning(
+                    "Warm-up step %s failed (attempt %d), retrying in %.0f s: %s",
+                    name,
+                    check.attempts,
+                    delay,
+                    e,
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_retry_interval)
+                continue
+            check.status = OK
+            check.detail = None
+            check.duration = time.perf_counter() - started
+            return
+
+    async def _import_sdks(self) -> None:
+        # Imports hold the GIL for long stretches, but no longer block the event loop outright.
+        for module in self.sdk_modules:
+            await asyncio.to_thread(importlib.import_module, module)
+
+    async def _acquire_token(self) -> None:
+        clients = await self.clients.open()
+        await clients.credential.get_token(AGENTS_CREDENTIAL_SCOPE)
+
+    async def _open_connection(self) -> None:
+        clients = await self.clients.open()
+        async for _ in clients.agents_client.list_agents(limit=1):
+            break
+
+    async def _prepare_agents(self) -> None:
+        await self.agent_pool.start()
+        # The lease creates an agent if the pool has none yet, or health checks an idle one.
+        async with self.agent_pool.lease():
+            pass
+
+    async def _run_canary(self) -> None:
+        # Only run when configured, otherwise the step is skipped.
+        if self.canary is not None:
+            await self.canary()
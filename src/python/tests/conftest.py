@@ -0,0 +1,100 @@
+"""Fixtures and fakes shared by the test modules."""
+
+import asyncio
+from collections.abc import Iterator
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from aspire_backend_service.main import app
+from aspire_backend_service.routers.agents import get_calculator, get_result_cache
+
+
+class FakeAgentsClient:
+    """Records the calls made to the Azure AI Agents control plane."""
+
+    def __init__(self):
+        self.created: list[str] = []
+        self.deleted: list[str] = []
+        self.deleted_threads: list[str] = []
+        self.broken: set[str] = set()
+        self.latency = 0.0
+        self.listed = 0
+        self.threads = SimpleNamespace(delete=self._delete_thread)
+
+    async def create_agent(self, **kwargs):
+        agent_id = f"agent-{len(self.created)}"
+        self.created.append(agent_id)
+        return SimpleNamespace(id=agent_id, **kwargs)
+
+    async def get_agent(self, agent_id):
+        await asyncio.sleep(self.latency)
+        if agent_id in self.broken:
+            raise RuntimeError("agent not found")
+        return SimpleNamespace(id=agent_id)
+
+    async def delete_agent(self, agent_id):
+        self.deleted.append(agent_id)
+
+    async def list_agents(self, **_kwargs):
+        self.listed += 1
+        yield SimpleNamespace(id="agent-0")
+
+    async def _delete_thread(self, thread_id):
+        self.deleted_threads.append(thread_id)
+
+
+class FakeProvider:
+    def as_agent(self, agent, tools=None, middleware=None):
+        return SimpleNamespace(id=agent.id, tools=tools, middleware=middleware)
+
+
+class FakeClients:
+    """Stands in for `AzureAgentsClients` around a `FakeAgentsClient`."""
+
+    endpoint = "https://example.services.ai.azure.com/api/projects/test"
+
+    def __init__(self, agents_client: FakeAgentsClient, credential=None):
+        self.agents_client = agents_client
+        self.credential = credential
+        self.provider = FakeProvider()
+
+    async def open(self):
+        return self
+
+
+@pytest.fixture
+def agents_client(monkeypatch) -> FakeAgentsClient:
+    monkeypatch.setenv("AZURE_AI_MODEL_DEPLOYMENT_NAME", "test-model")
+    return FakeAgentsClient()
+
+
+@pytest.fixture
+def clients(agents_client: FakeAgentsClient) -> FakeClients:
+    return FakeClients(agents_client)
+
+
+@pytest.fixture
+def fake_calculator():
+    """
+    The calculator the endpoints of `client` run, None for the real one. Override it
+    in a module, or parametrize a test with it, to answer without Azure AI Agents.
+    """
+    return None
+
+
+@pytest.fixture
+def client(fake_calculator) -> Iterator[TestClient]:
+    """
+    Create a test client that runs the application lifespan. With a `fake_calculator`,
+    results are not cached either. Dependency overrides are cleared afterwards.
+    """
+    if fake_calculator is not None:
+        app.dependency_overrides[get_calculator] = fake_calculator
+        app.dependency_overrides[get_result_cache] = lambda: None
+    try:
+        with TestClient(app) as client:
+            yield client
+    finally:
+        app.dependency_overrides.clear()
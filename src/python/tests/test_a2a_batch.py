@@ -0,0 +1,90 @@
+"""Tests for JSON-RPC batch requests on the A2A endpoint."""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from aspire_backend_service.agents.calculator import calculator_response
+from aspire_backend_service.routers import agents as agents_router
+
+
+class SlowCalculator:
+    """Stands in for the calculator agent and records how many runs overlap."""
+
+    running = 0
+    peak = 0
+
+    async def run(self, question):
+        SlowCalculator.running += 1
+        SlowCalculator.peak = max(SlowCalculator.peak, SlowCalculator.running)
+        await asyncio.sleep(0.05)
+        SlowCalculator.running -= 1
+        return calculator_response(
+            final_number=len(question), reasoning="r", chain_of_thought="c", answer=question
+        )
+
+
+@pytest.fixture
+def fake_calculator():
+    """The calculator of `client` is slow, and its results are not cached."""
+    SlowCalculator.running = SlowCalculator.peak = 0
+    return SlowCalculator
+
+
+def send(request_id, question: str, method: str = "message/send") -> dict:
+    return {
+        "jsonrpc": "2.0",
+        "method": method,
+        "id": request_id,
+        "params": {
+            "message": {
+                "role": "user",
+                "messageId": f"m-{request_id}",
+                "parts": [{"kind": "text", "text": question}],
+            }
+        },
+    }
+
+
+def test_batch_runs_concurrently_and_keeps_order(client: TestClient, monkeypatch):
+    monkeypatch.setattr(agents_router, "A2A_BATCH_CONCURRENCY", 3)
+    batch = [send(index, f"question number {index}") for index in range(6)]
+
+    response = client.post("/agents/count-letters-a2a", json=batch)
+
+    assert response.status_code == 200
+    results = response.json()
+    assert [result["id"] for result in results] == list(range(6))
+    assert all(result["result"]["kind"] == "message" for result in results)
+    assert "question number 4" in results[4]["result"]["parts"][0]["text"]
+    assert SlowCalculator.peak == 3
+
+
+def test_batch_reports_errors_per_request(client: TestClient):
+    batch = [
+        send("ok", "How many s in mississippi?"),
+        {"jsonrpc": "2.0", "method": "message/send", "id": "bad", "params": {}},
+        send("stream", "How many s in mississippi?", method="message/stream"),
+        send("unknown-task", "", method="tasks/get") | {"params": {"id": "missing"}},
+    ]
+
+    results = client.post("/agents/count-letters-a2a", json=batch).json()
+
+    assert "Final Number: 4" in results[0]["result"]["parts"][0]["text"]
+    assert results[1]["error"]["code"] == -32600
+    assert results[2]["error"]["code"] == -32600
+    assert results[3]["error"]["code"] == -32001
+    assert [result["id"] for result in results] == ["ok", "bad", "stream", "unknown-task"]
+
+
+def test_empty_and_oversized_batches_are_rejected(client: TestClient, monkeypatch):
+    response = client.post("/agents/count-letters-a2a", json=[])
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == -32600
+
+    monkeypatch.setattr(agents_router, "A2A_BATCH_MAX_SIZE", 2)
+    batch = [send(index, "How many s in mississippi?") for index in range(3)]
+    response = client.post("/agents/count-letters-a2a", json=batch)
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == -32600
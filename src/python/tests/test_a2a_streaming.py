@@ -0,0 +1,118 @@
+"""Tests for A2A message/stream over Server-Sent Events."""
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from aspire_backend_service.agents.calculator import CalculatorUpdate, calculator_response
+
+
+class StreamingCalculator:
+    """Stands in for the calculator agent with a fixed sequence of updates."""
+
+    async def run_stream(self, question, _conversation=None):
+        yield CalculatorUpdate(
+            kind="tool_call",
+            tool_name="count_letters",
+            arguments={"character": "l", "phrase": question},
+        )
+        yield CalculatorUpdate(kind="tool_result", result=3)
+        yield CalculatorUpdate(kind="text", text='{"final_number": 3')
+        yield CalculatorUpdate(
+            kind="final",
+            response=calculator_response(
+                final_number=3, reasoning="r", chain_of_thought="c", answer="three"
+            ),
+        )
+
+
+class TimingOutCalculator:
+    """Stands in for a calculator whose run times out on its own, long before the deadline."""
+
+    async def run_stream(self, _question, _conversation=None):
+        yield CalculatorUpdate(kind="text", text='{"final_number"')
+        raise TimeoutError
+
+
+@pytest.fixture
+def fake_calculator():
+    """The calculator of `client` streams canned agent updates."""
+    return StreamingCalculator
+
+
+def stream_request(question: str) -> dict:
+    return {
+        "jsonrpc": "2.0",
+        "method": "message/stream",
+        "id": "req-1",
+        "params": {
+            "message": {
+                "role": "user",
+                "messageId": "m-1",
+                "contextId": "ctx-1",
+                "parts": [{"kind": "text", "text": question}],
+            }
+        },
+    }
+
+
+def read_events(response) -> list[dict]:
+    return [
+        json.loads(line.removeprefix("data: "))["result"]
+        for line in response.text.splitlines()
+        if line.startswith("data: ")
+    ]
+
+
+class TestMessageStream:
+    """Test the event sequence emitted for streamed requests."""
+
+    def test_agent_run_streams_status_text_and_final_artifact(self, client: TestClient):
+        response = client.post(
+            "/agents/count-letters-a2a", json=stream_request("hello world, twice")
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+
+        events = read_events(response)
+        assert events[0]["kind"] == "task"
+        assert events[0]["contextId"] == "ctx-1"
+        status_texts = [
+            event["status"].get("message", {}).get("parts", [{}])[0].get("text")
+            for event in events
+            if event["kind"] == "status-update"
+        ]
+        assert any(text and text.startswith("Calling count_letters") for text in status_texts)
+        artifacts = [event for event in events if event["kind"] == "artifact-update"]
+        assert artifacts[0]["artifact"]["artifactId"] == "answer-text"
+        assert artifacts[-1]["artifact"]["artifactId"] == "answer"
+        assert "Final Number: 3" in artifacts[-1]["artifact"]["parts"][0]["text"]
+        assert events[-1]["status"]["state"] == "completed"
+        assert events[-1]["final"] is True
+
+    def test_fast_path_streams_only_the_final_answer(self, client: TestClient):
+        response = client.post(
+            "/agents/count-letters-a2a", json=stream_request("How many s in mississippi?")
+        )
+        events = read_events(response)
+        assert [event["kind"] for event in events] == [
+            "task",
+            "status-update",
+            "artifact-update",
+            "status-update",
+        ]
+        assert "Final Number: 4" in events[2]["artifact"]["parts"][0]["text"]
+
+    def test_agent_card_advertises_streaming(self, client: TestClient):
+        response = client.get("/agents/count-letters/.well-known/agent-card.json")
+        assert response.json()["capabilities"]["streaming"] is True
+
+    @pytest.mark.parametrize("fake_calculator", [TimingOutCalculator])
+    def test_timeout_within_the_run_ends_the_stream_with_a_failed_status(self, client: TestClient):
+        response = client.post("/agents/count-letters-a2a", json=stream_request("hello world"))
+
+        events = read_events(response)
+        assert events[-1]["kind"] == "status-update"
+        assert events[-1]["status"]["state"] == "failed"
+        assert events[-1]["final"] is True
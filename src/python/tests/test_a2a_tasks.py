@@ -0,0 +1,293 @@
+"""Tests for asynchronous A2A Task execution."""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from aspire_backend_service import a2a_tasks
+from aspire_backend_service.a2a_tasks import (
+    CANCELED,
+    COMPLETED,
+    FAILED,
+    InvalidPushUrlError,
+    TaskManager,
+    TaskNotCancelableError,
+    TaskNotFoundError,
+    TaskQueueFullError,
+    TaskRecord,
+    TaskStore,
+)
+from aspire_backend_service.agents.answering import Answer
+from aspire_backend_service.agents.calculator import calculator_response
+from aspire_backend_service.main import app
+
+
+def make_answer(number: float) -> Answer:
+    response = calculator_response(
+        final_number=number, reasoning="r", chain_of_thought="c", answer=str(number)
+    )
+    return Answer(response=response, served_by="agent")
+
+
+async def wait_for(record: TaskRecord, timeout: float = 1.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not record.is_terminal and time.monotonic() < deadline:
+        await asyncio.sleep(0.005)
+
+
+class TestTaskManager:
+    """Test the worker pool, its bounded queue and cancellation."""
+
+    def test_submitted_task_completes_in_the_background(self):
+        async def scenario():
+            async def runner(question, _context_id):
+                await asyncio.sleep(0.01)
+                return make_answer(len(question))
+
+            manager = TaskManager(runner, workers=1)
+            await manager.start()
+            record = manager.submit("abc", context_id="ctx")
+            assert record.state == "submitted"
+            await wait_for(record)
+            await manager.close()
+            return record.to_a2a()
+
+        task = asyncio.run(scenario())
+        assert task["status"]["state"] == COMPLETED
+        assert "Final Number: 3" in task["artifacts"][0]["parts"][0]["text"]
+
+    def test_failed_run_marks_task_failed(self):
+        async def scenario():
+            async def runner(_question, _context_id):
+                raise RuntimeError("upstream failure")
+
+            manager = TaskManager(runner, workers=1)
+            await manager.start()
+            record = manager.submit("abc", context_id="ctx")
+            await wait_for(record)
+            await manager.close()
+            return record.state
+
+        assert asyncio.run(scenario()) == FAILED
+
+    def test_running_task_can_be_canceled(self):
+        async def scenario():
+            started = asyncio.Event()
+
+            async def runner(_question, _context_id):
+                started.set()
+                await asyncio.sleep(10)
+
+            manager = TaskManager(runner, workers=1)
+            await manager.start()
+            record = manager.submit("abc", context_id="ctx")
+            await started.wait()
+            manager.cancel(record.id)
+            await asyncio.sleep(0.01)
+            with pytest.raises(TaskNotCancelableError):
+                manager.cancel(record.id)
+            await manager.close()
+            return record.state
+
+        assert asyncio.run(scenario()) == CANCELED
+
+    def test_close_waits_for_tasks_and_fails_those_past_the_drain_timeout(self):
+        async def scenario():
+            async def runner(question, _context_id):
+                await asyncio.sleep(0.01 if question == "quick" else 10)
+                return make_answer(1)
+
+            manager = TaskManager(runner, workers=1, drain_timeout=0.2)
+            await manager.start()
+            quick = manager.submit("quick", context_id="ctx")
+            slow = manager.submit("slow", context_id="ctx")
+            queued = manager.submit("queued", context_id="ctx")
+            await manager.close()
+            with pytest.raises(TaskQueueFullError):
+                manager.submit("late", context_id="ctx")
+            return quick.state, slow.state, queued.state
+
+        assert asyncio.run(scenario()) == (COMPLETED, FAILED, FAILED)
+
+    def test_tasks_naming_a_context_continue_its_conversation(self):
+        async def scenario():
+            contexts = []
+
+            async def runner(question, context_id):
+                contexts.append(context_id)
+                return make_answer(len(question))
+
+            manager = TaskManager(runner, workers=1)
+            await manager.start()
+            named = manager.submit("abc", context_id="ctx")
+            new = manager.submit("abc", context_id=None)
+            await wait_for(new)
+            await manager.close()
+            return contexts, named.context_id, new.context_id
+
+        contexts, named, new = asyncio.run(scenario())
+        assert contexts == ["ctx", None]
+        assert named == "ctx"
+        assert new
+
+    def test_full_queue_rejects_submissions(self):
+        async def scenario():
+            manager = TaskManager(
+                lambda _question, _context_id: asyncio.sleep(1), workers=1, queue_size=1
+            )
+            manager.submit("a", context_id="ctx")
+            with pytest.raises(TaskQueueFullError):
+                manager.submit("b", context_id="ctx")
+
+        asyncio.run(scenario())
+
+    def test_push_urls_into_the_local_network_are_rejected(self):
+        manager = TaskManager(make_answer, push_notifications=True)
+        for url in (
+            "http://127.0.0.1:8080/hook",
+            "http://169.254.169.254/latest/meta-data",
+            "http://10.0.0.5/hook",
+            "http://[::1]/hook",
+            "http://localhost/hook",
+            "file:///etc/passwd",
+            "http://example.com:99999/hook",
+            "not a url",
+        ):
+            with pytest.raises(InvalidPushUrlError):
+                manager.submit("q", context_id="ctx", push_url=url)
+        record = manager.submit("q", context_id="ctx", push_url="https://hooks.example.com/a2a")
+        assert record.push_url == "https://hooks.example.com/a2a"
+
+        allow_listed = TaskManager(
+            make_answer, push_notifications=True, push_allowed_hosts=["Hooks.example.com"]
+        )
+        allow_listed.submit("q", context_id="ctx", push_url="http://hooks.example.com/a2a")
+        with pytest.raises(InvalidPushUrlError):
+            allow_listed.submit("q", context_id="ctx", push_url="https://other.example.com/a2a")
+
+    def test_push_host_names_resolving_into_the_local_network_are_skipped(
+        self, monkeypatch, caplog
+    ):
+        async def resolves_locally(_host, _port):
+            return None
+
+        monkeypatch.setattr(a2a_tasks, "_resolve_public_address", resolves_locally)
+
+        async def scenario():
+            manager = TaskManager(make_answer, push_notifications=True)
+            record = manager.submit("q", context_id="ctx", push_url="http://hooks.internal/a2a")
+            await manager._post_notification(record, record.push_url)
+            await manager.close()
+
+        asyncio.run(scenario())
+        assert "resolves to a local address" in caplog.text
+
+    def test_push_notifications_connect_to_the_checked_address(self, monkeypatch):
+        async def resolves_publicly(_host, _port):
+            return "93.184.215.14"
+
+        monkeypatch.setattr(a2a_tasks, "_resolve_public_address", resolves_publicly)
+        requests: list[httpx.Request] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(200)
+
+        async def scenario():
+            manager = TaskManager(make_answer, push_notifications=True)
+            manager._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            url = "https://hooks.example.com:8443/a2a?task=1"
+            record = manager.submit("q", context_id="ctx", push_url=url)
+            await manager._post_notification(record, url)
+            await manager.close()
+
+        asyncio.run(scenario())
+        # The task still queued is also failed, and notified of, on close.
+        assert len(requests) == 2
+        request = requests[0]
+        assert str(request.url) == "https://93.184.215.14:8443/a2a?task=1"
+        assert request.headers["Host"] == "hooks.example.com:8443"
+        assert request.extensions["sni_hostname"] == "hooks.example.com"
+
+    def test_store_evicts_terminal_tasks_first(self):
+        store = TaskStore(max_tasks=2)
+        active = TaskRecord(question="a", context_id="ctx")
+        done = TaskRecord(question="b", context_id="ctx", state=COMPLETED)
+        newest = TaskRecord(question="c", context_id="ctx")
+        for record in (active, done, newest):
+            store.add(record)
+
+        assert store.get(active.id) is active
+        assert store.get(newest.id) is newest
+        with pytest.raises(TaskNotFoundError):
+            store.get(done.id)
+
+
+def rpc(client: TestClient, method: str, params: dict) -> dict:
+    response = client.post(
+        "/agents/count-letters-a2a",
+        json={"jsonrpc": "2.0", "method": method, "id": 7, "params": params},
+    )
+    return response.json()
+
+
+class TestTaskEndpoints:
+    """Test the Task flow through the A2A JSON-RPC endpoint."""
+
+    def test_non_blocking_send_returns_task_that_can_be_polled(self, client: TestClient):
+        task = rpc(
+            client,
+            "message/send",
+            {
+                "message": {
+                    "role": "user",
+                    "messageId": "m-1",
+                    "parts": [{"kind": "text", "text": "How many s in mississippi?"}],
+                },
+                "configuration": {"blocking": False},
+            },
+        )["result"]
+        assert task["kind"] == "task"
+
+        deadline = time.monotonic() + 2
+        while task["status"]["state"] != COMPLETED and time.monotonic() < deadline:
+            time.sleep(0.01)
+            task = rpc(client, "tasks/get", {"id": task["id"]})["result"]
+        assert task["status"]["state"] == COMPLETED
+        assert "Final Number: 4" in task["artifacts"][0]["parts"][0]["text"]
+
+        error = rpc(client, "tasks/cancel", {"id": task["id"]})["error"]
+        assert error["code"] == -32002
+
+    def test_invalid_push_url_is_rejected_as_invalid_params(self, monkeypatch):
+        monkeypatch.setenv("A2A_PUSH_NOTIFICATIONS_ENABLED", "true")
+        with TestClient(app) as client:
+            error = rpc(
+                client,
+                "message/send",
+                {
+                    "message": {
+                        "role": "user",
+                        "messageId": "m-1",
+                        "parts": [{"kind": "text", "text": "How many s in mississippi?"}],
+                    },
+                    "configuration": {
+                        "pushNotificationConfig": {"url": "http://169.254.169.254/hook"}
+                    },
+                },
+            )["error"]
+        assert error["code"] == -32602
+
+    def test_unknown_task_is_reported(self, client: TestClient):
+        assert rpc(client, "tasks/get", {"id": "missing"})["error"]["code"] == -32001
+
+    def test_invalid_json_is_a_parse_error(self, client: TestClient):
+        response = client.post(
+            "/agents/count-letters-a2a",
+            content=b"{not json",
+            headers={"Content-Type": "application/json"},
+        )
+        assert response.json()["error"]["code"] == -32700
@@ -0,0 +1,139 @@
+"""Tests for admission control around agent runs."""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from aspire_backend_service.admission import AdmissionController, AdmissionRejectedError
+from aspire_backend_service.main import app
+
+
+class TestAdmissionController:
+    """Test the concurrency limit, the bounded wait queue and load shedding."""
+
+    def test_runs_beyond_the_limit_wait_for_a_slot(self):
+        async def scenario():
+            admission = AdmissionController(max_concurrency=2, max_queue=4)
+            running = peak = 0
+
+            async def run():
+                nonlocal running, peak
+                async with admission.admit():
+                    running += 1
+                    peak = max(peak, running)
+                    await asyncio.sleep(0.01)
+                    running -= 1
+
+            await asyncio.gather(*(run() for _ in range(6)))
+            admission.close()
+            return peak
+
+        assert asyncio.run(scenario()) == 2
+
+    def test_runs_are_shed_when_the_queue_is_full(self):
+        async def scenario():
+            admission = AdmissionController(max_concurrency=1, max_queue=1, retry_after=2)
+            release = asyncio.Event()
+
+            async def hold():
+                async with admission.admit():
+                    await release.wait()
+
+            holder = asyncio.create_task(hold())
+            waiter = asyncio.create_task(hold())
+            await asyncio.sleep(0)
+            assert admission.saturated
+
+            with pytest.raises(AdmissionRejectedError) as rejected:
+                async with admission.admit():
+                    pass
+            release.set()
+            await asyncio.gather(holder, waiter)
+            assert not admission.saturated
+            admission.close()
+            return rejected.value
+
+        rejected = asyncio.run(scenario())
+        assert rejected.reason == "queue_full"
+        assert rejected.retry_after == 2
+
+    def test_waiting_too_long_is_shed(self):
+        async def scenario():
+            admission = AdmissionController(max_concurrency=1, queue_timeout=0.01)
+            async with admission.admit():
+                with pytest.raises(AdmissionRejectedError) as rejected:
+                    async with admission.admit():
+                        pass
+            assert admission.waiting == 0
+            admission.close()
+            return rejected.value
+
+        assert asyncio.run(scenario()).reason == "timeout"
+
+    def test_limit_defaults_to_and_is_capped_by_the_pool_size(self, monkeypatch):
+        admission = AdmissionController.from_env(pool_size=4)
+        assert admission.max_concurrency == 4
+        admission.close()
+
+        monkeypatch.setenv("AGENT_MAX_CONCURRENCY", "16")
+        admission = AdmissionController.from_env(pool_size=4)
+        assert admission.max_concurrency == 4
+        admission.close()
+
+        monkeypatch.setenv("AGENT_MAX_CONCURRENCY", "2")
+        admission = AdmissionController.from_env(pool_size=4)
+        assert admission.max_concurrency == 2
+        admission.close()
+
+
+class SaturatedCalculator:
+    """Stands in for a calculator whose agent runs are all being shed."""
+
+    async def run(self, _question):
+        raise AdmissionRejectedError("queue_full", 1.5)
+
+
+@pytest.fixture
+def fake_calculator():
+    """The agent runs of `client` are rejected by admission control."""
+    return SaturatedCalculator
+
+
+def test_rest_endpoint_sheds_with_429(client: TestClient):
+    response = client.post("/agents/count-letters", json={"question": "What is 2 + 2?"})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "2"
+
+
+def test_a2a_endpoint_sheds_with_jsonrpc_error(client: TestClient):
+    response = client.post(
+        "/agents/count-letters-a2a",
+        json={
+            "jsonrpc": "2.0",
+            "method": "message/send",
+            "id": 1,
+            "params": {
+                "message": {
+                    "role": "user",
+                    "messageId": "m-1",
+                    "parts": [{"kind": "text", "text": "What is 2 + 2?"}],
+                }
+            },
+        },
+    )
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "2"
+    assert response.json()["error"]["code"] == -32000
+
+
+def test_readiness_reports_saturation(client: TestClient):
+    assert client.get("/health/ready").status_code == 200
+
+    admission = app.state.admission
+    admission.waiting = admission.max_queue
+    admission.in_flight = admission.max_concurrency
+    admission._semaphore = asyncio.Semaphore(0)
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "not ready"
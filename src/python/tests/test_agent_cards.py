@@ -0,0 +1,75 @@
+"""Tests for the cached agent cards and conditional GET on the discovery endpoint."""
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from aspire_backend_service.agent_cards import AgentCardRegistry, EncodedCard
+
+CARD_PATH = "/agents/count-letters/.well-known/agent-card.json"
+
+
+class Card(BaseModel):
+    url: str
+
+
+def test_cards_are_built_once_per_base_url():
+    built = []
+
+    def build(base_url: str) -> Card:
+        built.append(base_url)
+        return Card(url=base_url)
+
+    registry = AgentCardRegistry(max_entries=2)
+    registry.register("agent", build)
+
+    first = registry.card("agent", "https://a")
+    assert registry.card("agent", "https://a") is first
+    registry.card("agent", "https://b")
+    registry.card("agent", "https://c")
+
+    assert built == ["https://a", "https://b", "https://c"]
+    assert len(registry) == 2
+    assert "other" not in registry
+    with pytest.raises(KeyError):
+        registry.card("other", "https://a")
+
+
+def test_if_none_match():
+    card = EncodedCard.encode(Card(url="https://a"))
+
+    assert card.matches(card.etag)
+    assert card.matches(f'"other", W/{card.etag}')
+    assert card.matches("*")
+    assert not card.matches('"other"')
+    assert not card.matches(None)
+
+
+def test_conditional_get(client: TestClient):
+    response = client.get(CARD_PATH)
+    etag = response.headers["ETag"]
+
+    assert response.status_code == 200
+    assert response.json()["url"] == "http://testserver/agents/count-letters-a2a"
+    assert response.headers["Cache-Control"].startswith("public, max-age=")
+
+    not_modified = client.get(CARD_PATH, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["ETag"] == etag
+
+    proxied = client.get(
+        CARD_PATH,
+        headers={
+            "If-None-Match": etag,
+            "X-Forwarded-Proto": "https",
+            "X-Forwarded-Host": "calculator.example.com",
+        },
+    )
+    assert proxied.status_code == 200
+    assert proxied.headers["ETag"] != etag
+    assert proxied.json()["url"] == "https://calculator.example.com/agents/count-letters-a2a"
+
+
+def test_unknown_agent(client: TestClient):
+    assert client.get("/agents/unknown/.well-known/agent-card.json").status_code == 404
@@ -0,0 +1,113 @@
+"""Tests for the agent pool."""
+
+import asyncio
+
+import pytest
+
+from aspire_backend_service.admission import AdmissionRejectedError
+from aspire_backend_service.agents.agent_pool import AgentPool, AgentPoolClosedError
+
+
+def create_pool(clients, **kwargs) -> AgentPool:
+    return AgentPool(
+        "TestAgent",
+        "instructions",
+        tools=[],
+        clients=clients,
+        **kwargs,
+    )
+
+
+class TestAgentPool:
+    """Test leasing, health checking and cleanup of pooled agents."""
+
+    def test_agents_are_reused_across_leases(self, clients, agents_client):
+        async def scenario():
+            pool = create_pool(clients)
+            for _ in range(3):
+                async with pool.lease() as agent:
+                    assert agent.id == "agent-0"
+            await pool.close()
+
+        asyncio.run(scenario())
+        assert agents_client.created == ["agent-0"]
+        assert agents_client.deleted == ["agent-0"]
+
+    def test_pool_grows_lazily_up_to_max_size(self, clients, agents_client):
+        async def scenario():
+            pool = create_pool(clients, max_size=2, lease_timeout=0.05)
+
+            async def hold():
+                async with pool.lease():
+                    await asyncio.sleep(0.01)
+
+            await asyncio.gather(*(hold() for _ in range(5)))
+            assert pool.size == 2
+            await pool.close()
+
+        asyncio.run(scenario())
+        assert len(agents_client.created) == 2
+
+    def test_lease_is_shed_when_pool_is_exhausted(self, clients):
+        async def scenario():
+            pool = create_pool(clients, max_size=1, lease_timeout=0.01, retry_after=2)
+            async with pool.lease():
+                with pytest.raises(AdmissionRejectedError) as rejected:
+                    async with pool.lease():
+                        pass
+            return rejected.value
+
+        rejected = asyncio.run(scenario())
+        assert (rejected.reason, rejected.retry_after) == ("lease_timeout", 2)
+
+    def test_broken_agent_is_recreated(self, clients, agents_client):
+        async def scenario():
+            pool = create_pool(clients)
+            with pytest.raises(ValueError):
+                async with pool.lease():
+                    raise ValueError("upstream failure")
+
+            agents_client.broken.add("agent-0")
+            async with pool.lease() as agent:
+                assert agent.id == "agent-1"
+
+        asyncio.run(scenario())
+        assert agents_client.deleted == ["agent-0"]
+
+    def test_start_precreates_min_size_and_close_rejects_leases(self, clients, agents_client):
+        async def scenario():
+            pool = create_pool(clients, max_size=3, min_size=2)
+            await pool.start()
+            assert pool.idle == 2
+            await pool.close()
+            with pytest.raises(AgentPoolClosedError):
+                async with pool.lease():
+                    pass
+
+        asyncio.run(scenario())
+        assert sorted(agents_client.deleted) == ["agent-0", "agent-1"]
+
+    def test_agent_checked_while_the_lease_is_cancelled_stays_in_the_pool(
+        self, clients, agents_client
+    ):
+        async def scenario():
+            pool = create_pool(clients, max_size=1)
+            with pytest.raises(ValueError):
+                async with pool.lease():
+                    raise ValueError("upstream failure")
+
+            # The suspect agent is checked on its next lease, which is cancelled meanwhile.
+            agents_client.latency = 1.0
+            with pytest.raises(TimeoutError):
+                async with asyncio.timeout(0.01), pool.lease():
+                    pass
+            assert (pool.size, pool.idle) == (1, 1)
+
+            agents_client.latency = 0.0
+            async with pool.lease() as agent:
+                assert agent.id == "agent-0"
+            await pool.close()
+
+        asyncio.run(scenario())
+        assert agents_client.created == ["agent-0"]
+        assert agents_client.deleted == ["agent-0"]
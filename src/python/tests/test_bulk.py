@@ -0,0 +1,203 @@
+"""Tests for the bulk count-letters mode."""
+
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from aspire_backend_service.agents.answering import Answer
+from aspire_backend_service.agents.calculator import calculator_response
+from aspire_backend_service.bulk import (
+    BulkRunner,
+    BulkSummary,
+    LatencyReservoir,
+    iter_ndjson_lines,
+)
+from aspire_backend_service.main import app
+from aspire_backend_service.routers import agents
+from aspire_backend_service.routers.agents import (
+    get_bulk_runner,
+)
+
+
+async def collect(iterator) -> list:
+    return [item async for item in iterator]
+
+
+async def from_list(items):
+    for item in items:
+        yield item
+
+
+class TestBulkRunner:
+    """Test concurrency, timeouts and lazy reading of the input."""
+
+    def test_results_stream_with_bounded_concurrency(self):
+        running = peak = 0
+        read = 0
+
+        async def questions():
+            nonlocal read
+            for index in range(10):
+                read += 1
+                # Input is only pulled when a slot is free.
+                assert read - index <= 1
+                yield f"q{index}"
+
+        async def answer(question: str) -> Answer:
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01 if question != "q0" else 0.05)
+            running -= 1
+            response = calculator_response(
+                final_number=1, reasoning="r", chain_of_thought="c", answer=question
+            )
+            return Answer(response=response, served_by="agent")
+
+        summary = BulkSummary()
+        results = asyncio.run(collect(BulkRunner(concurrency=3).run(questions(), answer, summary)))
+
+        assert sorted(result.index for result in results) == list(range(10))
+        # The slow first question does not hold back the others.
+        assert results[0].index != 0
+        assert peak == 3
+        assert summary.succeeded == 10
+        assert summary.to_dict()["latencyMs"]["p99"] >= summary.to_dict()["latencyMs"]["p50"]
+
+    def test_timeouts_errors_and_invalid_inputs_are_reported(self):
+        async def answer(question: str) -> Answer:
+            if question == "slow":
+                await asyncio.sleep(1)
+            raise RuntimeError("agent failed")
+
+        summary = BulkSummary()
+        results = asyncio.run(
+            collect(
+                BulkRunner(item_timeout=0.05).run(
+                    from_list(["slow", "broken", ValueError("not a request")]), answer, summary
+                )
+            )
+        )
+
+        by_index = {result.index: result for result in results}
+        assert by_index[0].timed_out
+        assert by_index[1].error == "agent failed"
+        assert by_index[2].error == "not a request"
+        assert (summary.succeeded, summary.failed, summary.timed_out) == (0, 2, 1)
+
+
+def test_latency_reservoir_stays_bounded():
+    reservoir = LatencyReservoir(capacity=100)
+    for value in range(1, 1001):
+        reservoir.add(float(value))
+    assert len(reservoir._samples) == 100
+    assert reservoir.count == 1000
+    assert reservoir.maximum == 1000.0
+
+    exact = LatencyReservoir()
+    for value in range(1, 101):
+        exact.add(float(value))
+    assert exact.percentile(50) == 50.0
+    assert exact.percentile(99) == 99.0
+
+
+def test_ndjson_lines_span_chunks():
+    chunks = [b'{"question": "a"}\n{"quest', b'ion": "b"}\n\n', b'{"question": "c"}']
+    lines = asyncio.run(collect(iter_ndjson_lines(from_list(chunks))))
+    assert lines == ['{"question": "a"}', '{"question": "b"}', '{"question": "c"}']
+
+    invalid, valid = asyncio.run(collect(iter_ndjson_lines(from_list([b"\xff\n", b"ok\n"]))))
+    assert isinstance(invalid, ValueError)
+    assert valid == "ok"
+
+
+def test_ndjson_lines_longer_than_the_limit_are_skipped():
+    chunks = [b"short\n" + b"x" * 6, b"x" * 6, b"x\nnext\n", b"y" * 20]
+    lines = asyncio.run(collect(iter_ndjson_lines(from_list(chunks), max_line_bytes=10)))
+    assert [type(line) for line in lines] == [str, ValueError, str, ValueError]
+    assert lines[0] == "short"
+    assert lines[2] == "next"
+    assert "longer than 10 bytes" in str(lines[1])
+
+
+def read_lines(response) -> list[dict]:
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_bulk_endpoint_accepts_a_json_array(client: TestClient):
+    response = client.post(
+        "/agents/count-letters/bulk",
+        json=[
+            {"question": "How many s in mississippi?"},
+            {"question": "What is the square root of 16?"},
+        ],
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    *results, summary = read_lines(response)
+    by_index = {result["index"]: result for result in results}
+    assert by_index[0]["result"]["finalNumber"] == 4
+    assert by_index[0]["servedBy"] == "fast-path"
+    assert by_index[1]["result"]["finalNumber"] == 4
+    assert summary["summary"]["total"] == 2
+
+
+def test_bulk_endpoint_accepts_ndjson_uploads(client: TestClient):
+    body = '{"question": "How many s in mississippi?"}\nnot json\n'
+    response = client.post(
+        "/agents/count-letters/bulk",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    *results, summary = read_lines(response)
+    by_index = {result["index"]: result for result in results}
+    assert by_index[0]["result"]["finalNumber"] == 4
+    assert "Invalid request line" in by_index[1]["error"]
+    assert summary["summary"]["succeeded"] == 1
+    assert summary["summary"]["failed"] == 1
+
+
+def test_bulk_endpoint_reports_lines_that_are_not_utf8(client: TestClient):
+    body = b'{"question": "\xff"}\n{"question": "How many s in mississippi?"}\n'
+    response = client.post(
+        "/agents/count-letters/bulk",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    *results, summary = read_lines(response)
+    by_index = {result["index"]: result for result in results}
+    assert "not UTF-8" in by_index[0]["error"]
+    assert by_index[1]["result"]["finalNumber"] == 4
+    assert summary["summary"]["total"] == 2
+
+
+def test_bulk_endpoint_limits_json_arrays(client: TestClient, monkeypatch):
+    monkeypatch.setattr(agents, "BULK_MAX_JSON_BYTES", 64)
+    response = client.post(
+        "/agents/count-letters/bulk",
+        json=[{"question": "How many s in mississippi?"}] * 4,
+    )
+
+    error, summary = read_lines(response)
+    assert "send larger runs as NDJSON" in error["error"]
+    assert summary["summary"]["failed"] == 1
+
+
+class SlowCalculator:
+    async def run(self, _question):
+        await asyncio.sleep(1)
+
+
+@pytest.mark.parametrize("fake_calculator", [SlowCalculator])
+def test_bulk_timeout_cannot_exceed_the_configured_one(client: TestClient):
+    app.dependency_overrides[get_bulk_runner] = lambda: BulkRunner(item_timeout=0.01)
+    response = client.post("/agents/count-letters/bulk?timeout=60", json=[{"question": "Why?"}])
+
+    result, summary = read_lines(response)
+    assert result["error"] == "Timed out"
+    assert summary["summary"]["timedOut"] == 1
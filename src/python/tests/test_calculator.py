@@ -0,0 +1,30 @@
+"""Tests for the calculator agent's tools."""
+
+from aspire_backend_service.agents.calculator import (
+    agent_instructions,
+    calculate_square_roots,
+    count_characters,
+    count_letters_in_phrases,
+    create_agent_pool,
+    square_root_of_count,
+)
+
+
+def test_count_characters_counts_in_one_call():
+    assert count_characters("strawberry", ["r", "s", "z"]) == {"r": 3, "s": 1, "z": 0}
+    assert count_characters("Banana", ["a", "B"], case_sensitive=False) == {"a": 3, "B": 1}
+    assert count_characters("abba") == {"a": 2, "b": 2}
+    # Longer strings are counted as substrings, like `count_letters` does.
+    assert count_characters("banana", ["an"]) == {"an": 2}
+
+
+def test_composite_and_batch_tools():
+    assert square_root_of_count("s", "mississippi") == {"count": 4, "square_root": 2.0}
+    assert count_letters_in_phrases("r", ["strawberry", "raspberry", "kiwi"]) == [3, 3, 0]
+    assert calculate_square_roots([4, 9, 2.25]) == [2.0, 3.0, 1.5]
+
+
+def test_instructions_describe_every_tool():
+    pool = create_agent_pool(clients=None)
+    for tool in pool.tools:
+        assert f"{tool.__name__}(" in agent_instructions
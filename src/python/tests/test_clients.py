@@ -0,0 +1,71 @@
+"""Tests for the application-scoped Azure clients."""
+
+import asyncio
+import time
+
+import pytest
+from azure.core.credentials import AccessToken
+
+from aspire_backend_service.clients import AzureAgentsClients, CachedTokenCredential
+
+
+class CountingCredential:
+    """Hands out a new token on every call, valid for `lifetime` seconds."""
+
+    def __init__(self, lifetime: float = 3600):
+        self.lifetime = lifetime
+        self.calls = 0
+        self.closed = False
+
+    async def get_token(self, *_scopes, **_kwargs):
+        self.calls += 1
+        return AccessToken(f"token-{self.calls}", int(time.time() + self.lifetime))
+
+    async def close(self):
+        self.closed = True
+
+
+class TestCachedTokenCredential:
+    """Test in-process token caching."""
+
+    def test_token_is_reused_until_refresh_margin(self):
+        async def scenario():
+            inner = CountingCredential()
+            credential = CachedTokenCredential(inner, refresh_margin=300)
+            first = await credential.get_token("scope/.default")
+            second = await credential.get_token("scope/.default")
+            await credential.close()
+            return inner, first, second
+
+        inner, first, second = asyncio.run(scenario())
+        assert first.token == second.token == "token-1"
+        assert inner.calls == 1
+        assert inner.closed
+
+    def test_expiring_token_is_acquired_again(self):
+        async def scenario():
+            inner = CountingCredential(lifetime=60)
+            credential = CachedTokenCredential(inner, refresh_margin=300)
+            await credential.get_token("scope/.default")
+            token = await credential.get_token("scope/.default")
+            await credential.close()
+            return token
+
+        assert asyncio.run(scenario()).token == "token-2"
+
+    def test_concurrent_callers_share_one_acquisition(self):
+        async def scenario():
+            inner = CountingCredential()
+            credential = CachedTokenCredential(inner)
+            await asyncio.gather(*(credential.get_token("scope/.default") for _ in range(10)))
+            await credential.close()
+            return inner.calls
+
+        assert asyncio.run(scenario()) == 1
+
+
+def test_clients_are_not_available_before_they_are_opened():
+    clients = AzureAgentsClients(endpoint="https://example.services.ai.azure.com")
+    assert not clients.is_open
+    with pytest.raises(RuntimeError, match="not open"):
+        clients.agents_client  # noqa: B018
@@ -0,0 +1,100 @@
+"""Tests for A2A context reuse through the conversation store."""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from aspire_backend_service.agents.calculator import calculator_response
+from aspire_backend_service.conversations import ConversationStore
+
+
+class ThreadedCalculator:
+    """Stands in for the calculator agent, starting a thread for new conversations."""
+
+    threads: list[str | None] = []
+
+    async def run(self, question, conversation=None):
+        ThreadedCalculator.threads.append(conversation and conversation.thread_id)
+        if conversation is not None and conversation.thread_id is None:
+            conversation.thread_id = f"thread-{len(ThreadedCalculator.threads)}"
+        return calculator_response(
+            final_number=1, reasoning="r", chain_of_thought="c", answer=question
+        )
+
+
+async def use(store: ConversationStore, context_id: str, thread_id: str | None = None):
+    async with store.use(context_id) as conversation:
+        conversation.thread_id = conversation.thread_id or thread_id
+        return conversation
+
+
+def test_conversations_are_evicted_and_cleaned_up(clients):
+    async def scenario():
+        store = ConversationStore(clients, max_entries=2, idle_ttl=0.05, sweep_interval=0.01)
+        store.start()
+
+        first = await use(store, "a", "thread-a")
+        assert await use(store, "a") is first
+        await use(store, "b", "thread-b")
+        await use(store, "a")
+        await use(store, "c", "thread-c")
+        # "b" was the least recently used conversation.
+        assert await use(store, "a") is first
+        await asyncio.sleep(0)
+        assert clients.agents_client.deleted_threads == ["thread-b"]
+
+        with pytest.raises(RuntimeError):
+            async with store.use("a"):
+                raise RuntimeError("run failed")
+        await asyncio.sleep(0.1)
+        await store.close()
+        return clients.agents_client.deleted_threads, len(store), store.bytes
+
+    deleted, size, memory = asyncio.run(scenario())
+    # "a" was dropped by the failed run, "c" went idle.
+    assert deleted == ["thread-b", "thread-a", "thread-c"]
+    assert (size, memory) == (0, 0)
+
+
+def test_memory_cap_and_serialized_runs(clients):
+    async def scenario():
+        store = ConversationStore(clients, max_bytes=1500)
+        running = peak = 0
+
+        async def run(context_id: str):
+            nonlocal running, peak
+            async with store.use(context_id):
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*(run("a") for _ in range(3)))
+        for context_id in "bcd":
+            await use(store, context_id, f"thread-{context_id}")
+        return peak, len(store), store.bytes
+
+    peak, size, memory = asyncio.run(scenario())
+    assert peak == 1
+    assert size == 2
+    assert memory <= 1500
+
+
+@pytest.mark.parametrize("fake_calculator", [ThreadedCalculator])
+def test_messages_in_a_context_continue_its_thread(client: TestClient):
+    ThreadedCalculator.threads = []
+
+    def send(context_id: str | None, question: str) -> dict:
+        message = {"role": "user", "messageId": "m", "parts": [{"kind": "text", "text": question}]}
+        if context_id is not None:
+            message["contextId"] = context_id
+        body = {"jsonrpc": "2.0", "method": "message/send", "id": 1, "params": {"message": message}}
+        return client.post("/agents/count-letters-a2a", json=body).json()
+
+    send("ctx-1", "[1] How many r's are in strawberry?")
+    send("ctx-1", "[2] And in raspberry?")
+    send("ctx-2", "[3] How many r's are in cranberry?")
+    send(None, "[4] How many r's are in blueberry?")
+
+    assert ThreadedCalculator.threads == [None, "thread-1", None, None]
@@ -0,0 +1,96 @@
+"""Tests for request deadlines and cancellation on client disconnect."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from aspire_backend_service.deadlines import (
+    DEADLINE,
+    DISCONNECT,
+    DeadlinePolicy,
+    RequestCancelledError,
+    run_cancellable,
+)
+
+
+class HangingCalculator:
+    """Stands in for an agent run that never finishes, and records its cancellation."""
+
+    cancelled = 0
+
+    async def run(self, _question):
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            HangingCalculator.cancelled += 1
+            raise
+
+
+def fake_request(disconnect_after: float | None = None) -> SimpleNamespace:
+    async def receive():
+        if disconnect_after is None:
+            await asyncio.Event().wait()
+        await asyncio.sleep(disconnect_after)
+        return {"type": "http.disconnect"}
+
+    return SimpleNamespace(receive=receive)
+
+
+@pytest.mark.parametrize(
+    ("disconnect_after", "deadline", "reason"),
+    [(None, 0.05, DEADLINE), (0.05, None, DISCONNECT)],
+)
+def test_work_is_cancelled(disconnect_after, deadline, reason):
+    HangingCalculator.cancelled = 0
+
+    async def scenario():
+        loop_deadline = None if deadline is None else asyncio.get_running_loop().time() + deadline
+        with pytest.raises(RequestCancelledError) as raised:
+            await run_cancellable(
+                HangingCalculator().run("q"), fake_request(disconnect_after), "/", loop_deadline
+            )
+        # The work unwinds in the background.
+        await asyncio.sleep(0)
+        return raised.value.reason
+
+    assert asyncio.run(scenario()) == reason
+    assert HangingCalculator.cancelled == 1
+
+
+def test_requested_timeouts_are_capped():
+    policy = DeadlinePolicy(default_timeout=30, max_timeout=60)
+    assert [policy.timeout(value) for value in (None, "5", 120, "-1", "nan", "soon")] == [
+        30,
+        5,
+        60,
+        30,
+        30,
+        30,
+    ]
+
+
+@pytest.mark.parametrize("fake_calculator", [HangingCalculator])
+def test_endpoints_answer_when_the_deadline_passes(client: TestClient):
+    HangingCalculator.cancelled = 0
+    message = {"role": "user", "messageId": "m", "parts": [{"kind": "text", "text": "[1] slow"}]}
+    rest = client.post(
+        "/agents/count-letters",
+        json={"question": "[2] slow"},
+        headers={"X-Request-Timeout": "0.05"},
+    )
+    a2a = client.post(
+        "/agents/count-letters-a2a",
+        json={
+            "jsonrpc": "2.0",
+            "method": "message/send",
+            "id": 1,
+            "params": {"message": message, "metadata": {"timeoutSeconds": 0.05}},
+        },
+    )
+
+    assert rest.status_code == 504
+    assert a2a.status_code == 504
+    assert a2a.json()["error"]["message"] == "Deadline exceeded"
+    assert HangingCalculator.cancelled == 2
@@ -0,0 +1,90 @@
+"""Tests for the deterministic fast path in front of the calculator agent."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from aspire_backend_service.agents.fast_path import QuestionKind, classify_question, try_fast_path
+
+
+class TestClassifyQuestion:
+    """Test recognition of the question shapes the tools answer on their own."""
+
+    @pytest.mark.parametrize(
+        ("question", "character", "phrase"),
+        [
+            ("How many r's are in strawberry?", "r", "strawberry"),
+            ("How many times does the letter 'a' appear in 'banana'?", "a", "banana"),
+            ('Count the l in "hello world"', "l", "hello world"),
+        ],
+    )
+    def test_count_questions(self, question: str, character: str, phrase: str):
+        classified = classify_question(question)
+        assert classified is not None
+        assert classified.kind == QuestionKind.COUNT_LETTERS
+        assert (classified.character, classified.phrase) == (character, phrase)
+
+    @pytest.mark.parametrize(
+        "question",
+        [
+            "What is the square root of the number of r's in strawberry?",
+            "How many r's are in strawberry, and then take the square root?",
+        ],
+    )
+    def test_square_root_of_count_questions(self, question: str):
+        classified = classify_question(question)
+        assert classified is not None
+        assert classified.kind == QuestionKind.SQUARE_ROOT_OF_COUNT
+
+    @pytest.mark.parametrize(
+        "question",
+        [
+            "How many letters are in the word hello?",
+            "How many r in strawberry fields",
+            "What is the letter count of Python?",
+            # Ambiguous: the other case of the character occurs in the phrase.
+            "How many r's are in 'Rare'?",
+        ],
+    )
+    def test_unrecognized_questions_fall_back(self, question: str):
+        assert classify_question(question) is None
+
+    def test_square_root_of_count_is_solved_with_the_tools(self):
+        response = try_fast_path("What is the square root of the number of s in mississippi?")
+        assert response is not None
+        assert response.final_number == 2.0
+        assert "count_letters" in response.chain_of_thought
+        assert "calculate_square_root" in response.chain_of_thought
+
+
+class TestFastPathEndpoints:
+    """Test that recognized questions never reach the agent."""
+
+    def test_count_letters_reports_fast_path(self, client: TestClient):
+        response = client.post(
+            "/agents/count-letters", json={"question": "How many r's in strawberry?"}
+        )
+        assert response.status_code == 200
+        assert response.headers["X-Served-By"] == "fast-path"
+        assert response.json()["finalNumber"] == 3
+
+    def test_count_letters_a2a_reports_fast_path(self, client: TestClient):
+        response = client.post(
+            "/agents/count-letters-a2a",
+            json={
+                "jsonrpc": "2.0",
+                "method": "message/send",
+                "id": 1,
+                "params": {
+                    "message": {
+                        "role": "user",
+                        "messageId": "m-1",
+                        "parts": [{"kind": "text", "text": "How many a's are in banana?"}],
+                    }
+                },
+            },
+        )
+        assert response.status_code == 200
+        assert response.headers["X-Served-By"] == "fast-path"
+        message = response.json()["result"]
+        assert message["metadata"] == {"servedBy": "fast-path"}
+        assert "Final Number: 3" in message["parts"][0]["text"]
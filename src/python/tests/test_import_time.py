@@ -0,0 +1,50 @@
+"""Checks the cold-start budget recorded in benchmarks/import_budget.json."""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BUDGET = json.loads((Path(__file__).parents[1] / "benchmarks" / "import_budget.json").read_text())
+
+
+def import_in_new_interpreter() -> tuple[float, float, set[str]]:
+    """
+    Import times in milliseconds of FastAPI and then of the application module, in one
+    new interpreter, and the modules loaded.
+    """
+    module = BUDGET["module"]
+    script = (
+        "import sys, time\n"
+        "started = time.perf_counter()\n"
+        "import fastapi\n"
+        "imported = time.perf_counter()\n"
+        f"import {module}\n"
+        "print((imported - started) * 1000, (time.perf_counter() - imported) * 1000)\n"
+        "print(' '.join(sys.modules))\n"
+    )
+    env = {key: value for key, value in os.environ.items() if not key.startswith("OTEL_")}
+    env["PYTHONPATH"] = os.pathsep.join(sys.path)
+    result = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True, env=env
+    )
+    durations, modules = result.stdout.splitlines()[-2:]
+    fastapi_ms, module_ms = (float(duration) for duration in durations.split())
+    return fastapi_ms, module_ms, set(modules.split())
+
+
+def test_application_import_stays_within_budget():
+    """
+    Heavy dependencies must stay lazy. Wall-clock time depends on the machine, so the
+    test compares with importing FastAPI; bench_import_time.py checks `budget_ms`.
+    """
+    fastapi_ms, module_ms, modules = import_in_new_interpreter()
+
+    eager = [name for name in BUDGET["lazy_modules"] if name in modules]
+    assert eager == [], f"{eager} should only be imported on first use"
+    assert module_ms <= BUDGET["relative_budget"] * fastapi_ms, (
+        f"Importing {BUDGET['module']} took {module_ms:.0f} ms after FastAPI took "
+        f"{fastapi_ms:.0f} ms, the budget is {BUDGET['relative_budget']} times that "
+        "(see benchmarks/bench_import_time.py)"
+    )
@@ -0,0 +1,93 @@
+"""Tests for the agent-level spans and turn counting."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from aspire_backend_service.agents.middleware import LlmTurnMiddleware, ToolInvocationMiddleware
+from aspire_backend_service.instrumentation import RunUsage
+
+_exporter = InMemorySpanExporter()
+if not isinstance(trace.get_tracer_provider(), TracerProvider):
+    # Without an OTLP endpoint the application leaves the tracer provider unset.
+    trace.set_tracer_provider(TracerProvider())
+trace.get_tracer_provider().add_span_processor(SimpleSpanProcessor(_exporter))
+
+
+@pytest.fixture
+def spans():
+    _exporter.clear()
+    yield _exporter
+    _exporter.clear()
+
+
+def finished(exporter: InMemorySpanExporter, name: str) -> list:
+    return [span for span in exporter.get_finished_spans() if span.name == name]
+
+
+def test_llm_turns_are_counted_and_traced(spans: InMemorySpanExporter):
+    middleware = LlmTurnMiddleware()
+
+    async def respond(context):
+        context.result = "response"
+
+    async def scenario():
+        usage = RunUsage()
+        with usage.active():
+            for _ in range(2):
+                await middleware.process(SimpleNamespace(is_streaming=False), respond)
+        # Turns outside of an active run are not counted.
+        await middleware.process(SimpleNamespace(is_streaming=False), respond)
+        return usage
+
+    assert asyncio.run(scenario()).turns == 2
+    assert len(finished(spans, "calculator.llm_turn")) == 3
+
+
+def test_streamed_turn_lasts_until_consumed(spans: InMemorySpanExporter):
+    middleware = LlmTurnMiddleware()
+
+    async def stream():
+        yield "a"
+        yield "b"
+
+    async def respond(context):
+        context.result = stream()
+
+    async def run_stream():
+        # Stands in for an agent stream that makes one LLM turn.
+        context = SimpleNamespace(is_streaming=True)
+        await middleware.process(context, respond)
+        async for update in context.result:
+            yield update
+
+    async def scenario():
+        usage = RunUsage()
+        updates = []
+        async for update in usage.tracking(run_stream()):
+            assert finished(spans, "calculator.llm_turn") == []
+            updates.append(update)
+        return usage, updates
+
+    usage, updates = asyncio.run(scenario())
+    assert updates == ["a", "b"]
+    assert usage.turns == 1
+    assert len(finished(spans, "calculator.llm_turn")) == 1
+
+
+def test_tool_invocations_are_traced_with_their_name(spans: InMemorySpanExporter):
+    async def fail(_context):
+        raise ValueError("math domain error")
+
+    context = SimpleNamespace(function=SimpleNamespace(name="calculate_square_root"))
+    with pytest.raises(ValueError):
+        asyncio.run(ToolInvocationMiddleware().process(context, fail))
+
+    (span,) = finished(spans, "calculator.tool")
+    assert span.attributes["tool.name"] == "calculate_square_root"
+    assert span.attributes["error.type"] == "ValueError"
@@ -0,0 +1,110 @@
+"""Tests for the request logging middleware and the queued logging pipeline."""
+
+import logging
+import queue
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from opentelemetry.sdk._logs import LoggerProvider, LoggingHandler
+from opentelemetry.sdk._logs.export import InMemoryLogRecordExporter, SimpleLogRecordProcessor
+from opentelemetry.sdk.trace import TracerProvider
+
+from aspire_backend_service.logging_setup import (
+    ContextQueueListener,
+    DroppingQueueHandler,
+    RequestLoggingMiddleware,
+    parse_route_levels,
+)
+
+
+def create_app(**options) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/health/ready")
+    async def ready():
+        return {"status": "ok"}
+
+    @app.get("/agents/fail")
+    async def fail():
+        raise RuntimeError("boom")
+
+    app.add_middleware(RequestLoggingMiddleware, **options)
+    return app
+
+
+def request_lines(caplog) -> list[logging.LogRecord]:
+    return [
+        record
+        for record in caplog.records
+        if record.name == "aspire_backend_service.logging_setup" and "->" in record.getMessage()
+    ]
+
+
+def test_route_levels_and_errors(caplog: pytest.LogCaptureFixture):
+    app = create_app(route_levels=parse_route_levels("/health=DEBUG"))
+    client = TestClient(app, raise_server_exceptions=False)
+
+    with caplog.at_level(logging.INFO):
+        client.get("/health/ready")
+        client.get("/agents/fail")
+
+    records = request_lines(caplog)
+    assert len(records) == 1
+    assert records[0].levelno == logging.WARNING
+    assert records[0].getMessage().startswith("GET /agents/fail -> 500")
+
+
+def test_sampling_skips_successful_requests(caplog: pytest.LogCaptureFixture):
+    client = TestClient(create_app(sample_rate=0.0), raise_server_exceptions=False)
+
+    with caplog.at_level(logging.INFO):
+        client.get("/health/ready")
+        client.get("/agents/fail")
+
+    assert [record.getMessage()[:20] for record in request_lines(caplog)] == [
+        "GET /agents/fail -> "
+    ]
+
+
+def test_parse_route_levels():
+    assert parse_route_levels(" /health = debug , /agents=WARNING,") == {
+        "/health": logging.DEBUG,
+        "/agents": logging.WARNING,
+    }
+
+
+def test_queue_handler_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+    record = logging.makeLogRecord({"msg": "value %s", "args": ({"mutable": True},)})
+
+    handler.handle(record)
+    handler.handle(record)
+
+    queued = handler.queue.get_nowait()
+    # Formatting is left to the listener thread.
+    assert queued.args == ({"mutable": True},)
+    assert handler.dropped == 1
+
+
+def test_queued_records_keep_their_trace_context():
+    exporter = InMemoryLogRecordExporter()
+    logger_provider = LoggerProvider()
+    logger_provider.add_log_record_processor(SimpleLogRecordProcessor(exporter))
+    handler = DroppingQueueHandler(queue.Queue())
+    listener = ContextQueueListener(handler.queue, LoggingHandler(logger_provider=logger_provider))
+    record_logger = logging.getLogger("test.queued.trace")
+    record_logger.propagate = False
+    record_logger.addHandler(handler)
+
+    listener.start()
+    try:
+        with TracerProvider().get_tracer(__name__).start_as_current_span("request") as span:
+            record_logger.warning("inside the request")
+    finally:
+        listener.stop()
+        record_logger.removeHandler(handler)
+
+    (exported,) = exporter.get_finished_logs()
+    assert exported.log_record.trace_id == span.get_span_context().trace_id
+    assert exported.log_record.span_id == span.get_span_context().span_id
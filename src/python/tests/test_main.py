@@ -1,16 +1,7 @@
 """Tests for the main FastAPI application."""
 
-import pytest
 from fastapi.testclient import TestClient
 
-from aspire_backend_service.main import app
-
-
-@pytest.fixture
-def client():
-    """Create a test client for the FastAPI application."""
-    return TestClient(app)
-
 
 class TestHealthEndpoints:
     """Test health check endpoints."""
@@ -0,0 +1,78 @@
+"""Tests for the opt-in per-request profiling."""
+
+import asyncio
+import json
+import logging
+import pstats
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from aspire_backend_service import profiling
+from aspire_backend_service.profiling import (
+    PROFILE_FILE_HEADER,
+    PROFILE_HEADER,
+    PSTATS,
+    SPEEDSCOPE,
+    ProfilingMiddleware,
+    ProfilingPolicy,
+)
+
+
+def profiled_app(policy: ProfilingPolicy) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/agents/slow")
+    async def slow():
+        await asyncio.sleep(0.01)
+        return {"answer": sum(range(10_000))}
+
+    app.add_middleware(ProfilingMiddleware, policy=policy)
+    return app
+
+
+def test_profiling_is_off_unless_configured(monkeypatch):
+    monkeypatch.delenv("PROFILE_HEADER_ENABLED", raising=False)
+    monkeypatch.delenv("PROFILE_SAMPLE_RATE", raising=False)
+    assert ProfilingPolicy.from_env() is None
+
+    monkeypatch.setenv("PROFILE_SAMPLE_RATE", "0.01")
+    monkeypatch.setenv("PROFILE_FORMAT", "pstats")
+    policy = ProfilingPolicy.from_env()
+    assert (policy.sample_rate, policy.header_enabled, policy.format) == (0.01, False, PSTATS)
+
+
+def test_profiling_without_pyinstrument_warns_and_uses_cprofile(monkeypatch, caplog):
+    monkeypatch.setenv("PROFILE_HEADER_ENABLED", "true")
+    monkeypatch.delenv("PROFILE_FORMAT", raising=False)
+    monkeypatch.setattr(profiling, "_has_pyinstrument", lambda: False)
+    with caplog.at_level(logging.WARNING, logger=profiling.__name__):
+        policy = ProfilingPolicy.from_env()
+
+    assert policy.format == PSTATS
+    assert "pyinstrument is not installed" in caplog.text
+
+
+def test_requests_asking_for_a_profile_get_one(tmp_path):
+    pytest.importorskip("pyinstrument")
+    policy = ProfilingPolicy(directory=tmp_path, header_enabled=True, format=SPEEDSCOPE)
+    with TestClient(profiled_app(policy)) as client:
+        unprofiled = client.get("/agents/slow")
+        profiled = client.get("/agents/slow", headers={PROFILE_HEADER: "1"})
+
+    assert PROFILE_FILE_HEADER not in unprofiled.headers
+    profile = Path(profiled.headers[PROFILE_FILE_HEADER])
+    assert profile.parent == tmp_path
+    assert profile.name.endswith(".speedscope.json")
+    assert "speedscope" in json.loads(profile.read_text())["$schema"]
+
+
+def test_sampled_profiles_are_bounded(tmp_path):
+    policy = ProfilingPolicy(directory=tmp_path, sample_rate=1.0, max_files=2, format=PSTATS)
+    with TestClient(profiled_app(policy)) as client:
+        paths = [client.get("/agents/slow").headers[PROFILE_FILE_HEADER] for _ in range(3)]
+
+    assert sorted(tmp_path.iterdir()) == sorted(Path(path) for path in paths[1:])
+    assert pstats.Stats(paths[-1]).total_calls > 0
@@ -0,0 +1,292 @@
+"""Tests for retries, circuit breaking and hedging of upstream calls."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from azure.core.exceptions import HttpResponseError, ServiceRequestError
+from fastapi.testclient import TestClient
+
+from aspire_backend_service.admission import AdmissionController
+from aspire_backend_service.agents.agent_pool import AgentPool
+from aspire_backend_service.agents.calculator import calculator
+from aspire_backend_service.conversations import Conversation
+from aspire_backend_service.resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    RUN,
+    CircuitBreaker,
+    CircuitOpenError,
+    HedgePolicy,
+    RetryPolicy,
+    UpstreamResilience,
+    UpstreamUnavailableError,
+    is_transient,
+    retry_after,
+)
+
+
+def throttled(seconds: str) -> HttpResponseError:
+    error = HttpResponseError("Too Many Requests")
+    error.status_code = 429
+    error.response = SimpleNamespace(headers={"Retry-After": seconds})
+    return error
+
+
+class Flaky:
+    """An upstream call that fails with the given errors before it succeeds."""
+
+    def __init__(self, *errors: Exception, latency: float = 0.0):
+        self.errors = list(errors)
+        self.latency = latency
+        self.calls = 0
+
+    async def __call__(self) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if self.errors:
+            raise self.errors.pop(0)
+        return f"answer {self.calls}"
+
+
+def test_transient_errors_are_retried_as_long_as_asked():
+    resilience = UpstreamResilience(default_retry=RetryPolicy(attempts=3, base_delay=0.001))
+    assert is_transient(throttled("0.02"))
+    assert retry_after(throttled("0.02")) == 0.02
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        flaky = Flaky(throttled("0.02"), ServiceRequestError("connection reset"))
+        started = loop.time()
+        answer = await resilience.call("get_agent", flaky)
+        return answer, flaky.calls, loop.time() - started
+
+    answer, calls, elapsed = asyncio.run(scenario())
+    assert (answer, calls) == ("answer 3", 3)
+    assert elapsed >= 0.02
+
+    # Other errors, and waits longer than the policy allows, are not retried.
+    not_transient = Flaky(ValueError("bad request"))
+    with pytest.raises(ValueError):
+        asyncio.run(resilience.call("get_agent", not_transient))
+    assert not_transient.calls == 1
+    too_long = Flaky(throttled("60"))
+    with pytest.raises(UpstreamUnavailableError) as raised:
+        asyncio.run(resilience.call("get_agent", too_long))
+    assert too_long.calls == 1
+    assert raised.value.retry_after == 60
+
+
+def test_circuit_opens_fails_fast_and_recovers():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0.05)
+    resilience = UpstreamResilience(default_retry=RetryPolicy(attempts=1), breaker=breaker)
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(UpstreamUnavailableError):
+                await resilience.call("run", Flaky(ServiceRequestError("down")))
+        assert breaker.state == OPEN
+        untouched = Flaky()
+        with pytest.raises(CircuitOpenError):
+            await resilience.call("run", untouched)
+        assert untouched.calls == 0
+
+        await asyncio.sleep(0.05)
+        assert breaker.state == HALF_OPEN
+        # Only one probe is let through, it closes the circuit again.
+        probe = asyncio.create_task(resilience.call("run", Flaky(latency=0.01)))
+        await asyncio.sleep(0)
+        with pytest.raises(CircuitOpenError):
+            await resilience.call("run", Flaky())
+        await probe
+        assert breaker.state == CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_only_errors_from_the_service_close_a_half_open_circuit():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.01)
+    resilience = UpstreamResilience(default_retry=RetryPolicy(attempts=1), breaker=breaker)
+    bad_request = HttpResponseError("Bad Request")
+    bad_request.status_code = 400
+
+    async def scenario():
+        with pytest.raises(UpstreamUnavailableError):
+            await resilience.call("run", Flaky(ServiceRequestError("down")))
+        await asyncio.sleep(0.01)
+
+        # A local error gives the probe back, without closing the circuit.
+        with pytest.raises(ValueError):
+            await resilience.call("run", Flaky(ValueError("unparsable answer")))
+        assert breaker.state == HALF_OPEN
+
+        # The service answering, even with an error, closes it.
+        with pytest.raises(HttpResponseError):
+            await resilience.call("run", Flaky(bad_request))
+        assert breaker.state == CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_slow_calls_are_hedged():
+    resilience = UpstreamResilience(hedging=HedgePolicy(percentile=50, min_samples=3))
+
+    async def scenario():
+        for _ in range(3):
+            await resilience.call("run", Flaky(latency=0.01), hedge=True)
+        # The first attempt stalls, the hedge sent after the median latency answers.
+        slow_then_fast = iter([0.5, 0.01])
+        calls = Flaky()
+
+        async def attempt():
+            await asyncio.sleep(next(slow_then_fast))
+            return await calls()
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        answer = await resilience.call("run", attempt, hedge=True)
+        return answer, loop.time() - started
+
+    answer, elapsed = asyncio.run(scenario())
+    assert answer == "answer 1"
+    assert elapsed < 0.25
+
+
+def test_hedges_are_only_sent_with_a_free_admission_slot():
+    resilience = UpstreamResilience(hedging=HedgePolicy(percentile=50, min_samples=3))
+    admission = AdmissionController(max_concurrency=1)
+
+    async def scenario():
+        for _ in range(3):
+            await resilience.call("run", Flaky(latency=0.01), hedge=True)
+        hedges = Flaky()
+
+        async def hedge():
+            async with admission.admit(wait=False):
+                return await hedges()
+
+        async with admission.admit():
+            answer = await resilience.call(
+                "run", Flaky(latency=0.05), hedge=True, hedge_attempt=hedge
+            )
+            # The first attempt's error is raised, not the skipped hedge's.
+            with pytest.raises(ValueError):
+                await resilience.call(
+                    "run", Flaky(ValueError("bad"), latency=0.05), hedge=True, hedge_attempt=hedge
+                )
+        admission.close()
+        return answer, hedges.calls
+
+    assert asyncio.run(scenario()) == ("answer 1", 0)
+
+
+class FlakyAgentsService:
+    """Agent control plane and runs that fail with `errors` before they succeed."""
+
+    def __init__(self, *errors: Exception):
+        self.errors = list(errors)
+        self.calls = 0
+        self.agents_client = self
+        self.provider = self
+
+    async def open(self):
+        return self
+
+    async def _call(self) -> None:
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+
+    async def create_agent(self, **kwargs):
+        await self._call()
+        return SimpleNamespace(id="agent", **kwargs)
+
+    async def get_agent(self, agent_id):
+        await self._call()
+        return SimpleNamespace(id=agent_id)
+
+    def as_agent(self, agent, **_kwargs):
+        async def run(question, **_options):
+            await self._call()
+            return SimpleNamespace(value=question, usage_details=None)
+
+        def get_new_thread(service_thread_id=None):
+            return SimpleNamespace(service_thread_id=service_thread_id)
+
+        return SimpleNamespace(id=agent.id, run=run, get_new_thread=get_new_thread)
+
+
+def test_half_open_circuit_probes_once_through_a_run(monkeypatch):
+    monkeypatch.setenv("AZURE_AI_MODEL_DEPLOYMENT_NAME", "test-model")
+    breaker = CircuitBreaker("runs", failure_threshold=1, reset_timeout=0.05)
+    resilience = UpstreamResilience(
+        default_retry=RetryPolicy(attempts=2, base_delay=0), breaker=breaker
+    )
+    service = FlakyAgentsService(ServiceRequestError("down"), ServiceRequestError("still down"))
+    subject = calculator(AgentPool("Test", "", [], service, resilience=resilience))
+
+    async def scenario():
+        # Creating the agent fails, the run gives up without retrying what the pool gave up on.
+        with pytest.raises(UpstreamUnavailableError):
+            await subject.run("q")
+        assert (breaker.state, service.calls) == (OPEN, 1)
+        with pytest.raises(CircuitOpenError):
+            await subject.run("q")
+        assert service.calls == 1
+
+        # The probe reaches the service, and its failure opens the circuit again.
+        await asyncio.sleep(0.05)
+        with pytest.raises(UpstreamUnavailableError):
+            await subject.run("q")
+        assert (breaker.state, service.calls) == (OPEN, 2)
+
+        # The next probe creates the agent and runs it, which closes the circuit.
+        await asyncio.sleep(0.05)
+        assert await subject.run("q") == "q"
+        assert (breaker.state, service.calls) == (CLOSED, 4)
+
+    asyncio.run(scenario())
+
+
+def test_runs_on_a_conversation_are_not_retried(monkeypatch):
+    monkeypatch.setenv("AZURE_AI_MODEL_DEPLOYMENT_NAME", "test-model")
+    resilience = UpstreamResilience(retries={RUN: RetryPolicy(attempts=3, base_delay=0)})
+    service = FlakyAgentsService()
+    subject = calculator(AgentPool("Test", "", [], service, resilience=resilience))
+
+    async def scenario():
+        assert await subject.run("warm") == "warm"
+        service.errors = [ServiceRequestError("connection reset")]
+        assert await subject.run("q") == "q"
+
+        # Running again would add the question to the conversation's thread twice.
+        service.errors = [ServiceRequestError("connection reset")]
+        before = service.calls
+        with pytest.raises(UpstreamUnavailableError):
+            await subject.run("q", Conversation("ctx", thread_id="thread"))
+        assert service.calls - before == 1
+
+    asyncio.run(scenario())
+
+
+class UnavailableCalculator:
+    async def run(self, _question):
+        raise CircuitOpenError("Upstream 'azure-ai-agents' is unavailable", 12.5)
+
+
+@pytest.mark.parametrize("fake_calculator", [UnavailableCalculator])
+def test_endpoints_answer_503_while_the_upstream_is_unavailable(client: TestClient):
+    message = {"role": "user", "messageId": "m", "parts": [{"kind": "text", "text": "[1] hi"}]}
+    rest = client.post("/agents/count-letters", json={"question": "[2] hi"})
+    a2a = client.post(
+        "/agents/count-letters-a2a",
+        json={"jsonrpc": "2.0", "method": "message/send", "id": 1, "params": {"message": message}},
+    )
+
+    assert rest.status_code == 503
+    assert rest.headers["Retry-After"] == "13"
+    assert a2a.status_code == 503
+    assert a2a.headers["Retry-After"] == "13"
+    assert a2a.json()["error"]["code"] == -32000
+    assert a2a.json()["error"]["data"] == {"retryAfter": 12.5}
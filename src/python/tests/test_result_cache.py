@@ -0,0 +1,160 @@
+"""Tests for the calculator result cache."""
+
+import asyncio
+
+import pytest
+
+from aspire_backend_service.agents.calculator import calculator_response
+from aspire_backend_service.result_cache import (
+    COALESCED,
+    HIT,
+    MISS,
+    ResultCache,
+    SqliteCacheBackend,
+    normalize_key,
+)
+
+
+def make_response(number: float) -> calculator_response:
+    return calculator_response(
+        final_number=number, reasoning="r", chain_of_thought="c", answer=str(number)
+    )
+
+
+class TestResultCache:
+    """Test LRU/TTL bounds, single-flight deduplication and the SQLite backend."""
+
+    def test_normalize_key_collapses_whitespace_but_keeps_case(self):
+        assert normalize_key("  How many  R in\tRare ") == "How many R in Rare"
+
+    def test_second_lookup_is_a_hit(self):
+        async def scenario():
+            cache = ResultCache(calculator_response)
+            calls = 0
+
+            async def compute():
+                nonlocal calls
+                calls += 1
+                return make_response(3)
+
+            first = await cache.get_or_compute("q", compute)
+            second = await cache.get_or_compute("q", compute)
+            return calls, first[1], second[1]
+
+        assert asyncio.run(scenario()) == (1, MISS, HIT)
+
+    def test_concurrent_identical_lookups_are_coalesced(self):
+        async def scenario():
+            cache = ResultCache(calculator_response)
+            calls = 0
+
+            async def compute():
+                nonlocal calls
+                calls += 1
+                await asyncio.sleep(0.01)
+                return make_response(3)
+
+            results = await asyncio.gather(*(cache.get_or_compute("q", compute) for _ in range(5)))
+            return calls, sorted(outcome for _, outcome in results)
+
+        calls, outcomes = asyncio.run(scenario())
+        assert calls == 1
+        assert outcomes == [COALESCED] * 4 + [MISS]
+
+    def test_failures_reach_all_waiters_and_are_not_cached(self):
+        async def scenario():
+            cache = ResultCache(calculator_response)
+
+            async def compute():
+                await asyncio.sleep(0.01)
+                raise RuntimeError("upstream failure")
+
+            results = await asyncio.gather(
+                *(cache.get_or_compute("q", compute) for _ in range(3)), return_exceptions=True
+            )
+            assert all(isinstance(result, RuntimeError) for result in results)
+            assert await cache.get("q") is None
+
+        asyncio.run(scenario())
+
+    def test_a_cancelled_lookup_leaves_the_shared_computation_to_the_others(self):
+        async def scenario():
+            cache = ResultCache(calculator_response)
+            started = 0
+
+            async def compute():
+                nonlocal started
+                started += 1
+                await asyncio.sleep(0.05)
+                return make_response(3)
+
+            # Only the first of two identical questions runs into its deadline.
+            first = asyncio.wait_for(cache.get_or_compute("q", compute), timeout=0.01)
+            results = await asyncio.gather(
+                first, cache.get_or_compute("q", compute), return_exceptions=True
+            )
+            assert isinstance(results[0], TimeoutError)
+            assert results[1] == (make_response(3), COALESCED)
+            assert await cache.get("q") == make_response(3)
+
+            # When every lookup gives up, so does the computation.
+            with pytest.raises(TimeoutError):
+                await asyncio.wait_for(cache.get_or_compute("r", compute), timeout=0.01)
+            await asyncio.sleep(0.06)
+            assert await cache.get("r") is None
+            return started
+
+        assert asyncio.run(scenario()) == 2
+
+    def test_least_recently_used_entry_is_evicted(self):
+        async def scenario():
+            cache = ResultCache(calculator_response, max_entries=2)
+            await cache.set("a", make_response(1))
+            await cache.set("b", make_response(2))
+            await cache.get("a")
+            await cache.set("c", make_response(3))
+            return [await cache.get(key) is not None for key in ("a", "b", "c")]
+
+        assert asyncio.run(scenario()) == [True, False, True]
+
+    def test_expired_entries_are_not_returned(self):
+        async def scenario():
+            cache = ResultCache(calculator_response, ttl=0)
+            await cache.set("q", make_response(1))
+            return await cache.get("q")
+
+        assert asyncio.run(scenario()) is None
+
+    def test_sqlite_backend_survives_restarts(self, tmp_path):
+        path = str(tmp_path / "cache.db")
+
+        async def write():
+            cache = ResultCache(calculator_response, backend=SqliteCacheBackend(path))
+            await cache.set("q", make_response(4))
+            cache.close()
+
+        async def read():
+            cache = ResultCache(calculator_response, backend=SqliteCacheBackend(path))
+            value = await cache.get("q")
+            cache.close()
+            return value
+
+        asyncio.run(write())
+        assert asyncio.run(read()) == make_response(4)
+
+    def test_entries_loaded_from_sqlite_keep_their_expiry(self, tmp_path):
+        path = str(tmp_path / "cache.db")
+
+        async def scenario():
+            writer = ResultCache(calculator_response, ttl=0.05, backend=SqliteCacheBackend(path))
+            await writer.set("q", make_response(4))
+            writer.close()
+
+            reader = ResultCache(calculator_response, ttl=3600, backend=SqliteCacheBackend(path))
+            loaded = await reader.get("q")
+            await asyncio.sleep(0.05)
+            expired = await reader.get("q")
+            reader.close()
+            return loaded, expired
+
+        assert asyncio.run(scenario()) == (make_response(4), None)
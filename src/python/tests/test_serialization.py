@@ -0,0 +1,42 @@
+"""Tests for the JSON encoding layer, with and without orjson installed."""
+
+import pytest
+
+from aspire_backend_service import serialization
+from aspire_backend_service.agents.calculator import calculator_response
+from aspire_backend_service.routers.agents import AgentCapabilities
+
+
+@pytest.fixture(params=["orjson", "pydantic-core"])
+def encoder(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> str:
+    if request.param == "orjson" and serialization.orjson is None:
+        pytest.skip("orjson is not installed")
+    if request.param == "pydantic-core":
+        monkeypatch.setattr(serialization, "orjson", None)
+    return request.param
+
+
+def test_round_trip(encoder: str):
+    response = calculator_response(
+        final_number=2.0, reasoning="r", chain_of_thought="c", answer="Ünïcode"
+    )
+    envelope = {"jsonrpc": "2.0", "result": {"response": response, "parts": [1, None]}, "id": 7}
+
+    encoded = serialization.dumps(envelope)
+
+    assert b" " not in encoded.replace(b"\xc3\x9cn\xc3\xafcode", b"")
+    assert serialization.loads(encoded) == {
+        "jsonrpc": "2.0",
+        "result": {"response": response.model_dump(), "parts": [1, None]},
+        "id": 7,
+    }
+    with pytest.raises(ValueError):
+        serialization.loads(b'{"jsonrpc": ')
+
+
+def test_models_are_encoded_with_field_names(encoder: str):
+    capabilities = AgentCapabilities(streaming=True, push_notifications=True)
+    assert serialization.loads(serialization.dumps(capabilities)) == {
+        "streaming": True,
+        "pushNotifications": True,
+    }
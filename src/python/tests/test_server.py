@@ -0,0 +1,37 @@
+"""Tests for the production server settings and its graceful drain."""
+
+import asyncio
+import signal
+
+from fastapi.testclient import TestClient
+
+from aspire_backend_service.main import app
+from aspire_backend_service.server import DrainingServer, ServerSettings, available_cpus
+
+
+def test_settings_size_workers_from_the_cpus(monkeypatch):
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    monkeypatch.setenv("SERVER_KEEP_ALIVE_SECONDS", "120")
+    settings = ServerSettings.from_env()
+    assert settings.workers == available_cpus() >= 1
+    assert settings.config().timeout_keep_alive == 120
+
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    assert ServerSettings.from_env().config().workers == 3
+
+
+def test_readiness_fails_before_the_server_shuts_down():
+    server = DrainingServer(ServerSettings(workers=1).config(), drain_delay=0.05)
+    client = TestClient(app)
+    try:
+        server.handle_exit(signal.SIGTERM, None)
+        # Still serving, but no longer ready.
+        assert not server.should_exit
+        ready = client.get("/health/ready")
+        assert (ready.status_code, ready.json()["reason"]) == (503, "draining")
+        assert asyncio.run(server.on_tick(1)) is False
+
+        asyncio.run(asyncio.sleep(0.05))
+        assert asyncio.run(server.on_tick(1)) is True
+    finally:
+        app.state.draining = False
@@ -0,0 +1,87 @@
+"""Tests for the telemetry settings and tail sampling."""
+
+import logging
+from types import SimpleNamespace
+
+import pytest
+from opentelemetry.sdk._logs.export import InMemoryLogRecordExporter
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import Status, StatusCode
+
+from aspire_backend_service.telemetry import (
+    CountingBatchLogRecordProcessor,
+    CountingBatchSpanProcessor,
+    TailSamplingSpanProcessor,
+    TelemetrySettings,
+    _export_queue,
+)
+
+
+def traced(ratio: float, slow_threshold: float = 60.0):
+    exporter = InMemorySpanExporter()
+    processor = TailSamplingSpanProcessor(
+        SimpleSpanProcessor(exporter), ratio=ratio, slow_threshold=slow_threshold
+    )
+    provider = TracerProvider()
+    provider.add_span_processor(processor)
+    return provider.get_tracer(__name__), exporter
+
+
+def test_tail_sampling_keeps_failed_and_slow_traces():
+    tracer, exporter = traced(ratio=0.0)
+
+    with tracer.start_as_current_span("fast"), tracer.start_as_current_span("child"):
+        pass
+    with tracer.start_as_current_span("failed"), tracer.start_as_current_span("child") as child:
+        child.set_status(Status(StatusCode.ERROR))
+
+    assert [span.name for span in exporter.get_finished_spans()] == ["child", "failed"]
+
+    tracer, exporter = traced(ratio=0.0, slow_threshold=0.0)
+    with tracer.start_as_current_span("slow"):
+        pass
+
+    assert [span.name for span in exporter.get_finished_spans()] == ["slow"]
+
+
+def test_tail_sampling_passes_ratio_sampled_traces_through():
+    tracer, exporter = traced(ratio=1.0)
+
+    with tracer.start_as_current_span("fast"):
+        with tracer.start_as_current_span("child"):
+            # Spans of kept traces are not held back until the root ends.
+            pass
+        assert [span.name for span in exporter.get_finished_spans()] == ["child"]
+
+
+def test_settings_without_endpoint_export_nothing(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.delenv("OTEL_EXPORTER_OTLP_ENDPOINT", raising=False)
+    settings = TelemetrySettings.from_env()
+    assert not (settings.exports_traces or settings.exports_metrics or settings.exports_logs)
+
+    monkeypatch.setenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://collector:4317")
+    monkeypatch.setenv("TELEMETRY_LOGS_ENABLED", "false")
+    settings = TelemetrySettings.from_env()
+    assert settings.exports_traces and settings.exports_metrics
+    assert not settings.exports_logs
+
+
+def test_counting_processors_find_the_export_queue(caplog: pytest.LogCaptureFixture):
+    spans = CountingBatchSpanProcessor(
+        InMemorySpanExporter(), max_queue_size=8, max_export_batch_size=8
+    )
+    logs = CountingBatchLogRecordProcessor(
+        InMemoryLogRecordExporter(), max_queue_size=8, max_export_batch_size=8
+    )
+    try:
+        assert spans._export_queue.maxlen == logs._export_queue.maxlen == 8
+    finally:
+        spans.shutdown()
+        logs.shutdown()
+
+    # An SDK that keeps its queue elsewhere still exports, only without counting drops.
+    with caplog.at_level(logging.WARNING):
+        assert _export_queue(SimpleNamespace(_batch_processor=SimpleNamespace())) is None
+    assert "dropped items are not counted" in caplog.text
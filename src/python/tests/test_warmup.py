@@ -0,0 +1,85 @@
+"""Tests for the startup warm-up and the readiness probe that reports it."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from aspire_backend_service.main import app
+from aspire_backend_service.warmup import Warmup
+
+
+class FakeCredential:
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.scopes: list[tuple[str, ...]] = []
+
+    async def get_token(self, *scopes):
+        self.scopes.append(scopes)
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("az login required")
+        return SimpleNamespace(token="token", expires_on=0)
+
+
+class FakePool:
+    def __init__(self):
+        self.started = False
+        self.leases = 0
+
+    async def start(self):
+        self.started = True
+
+    @asynccontextmanager
+    async def lease(self):
+        self.leases += 1
+        yield SimpleNamespace(id="agent-0")
+
+
+def test_warmup_retries_failed_steps_until_ready(clients):
+    credential = clients.credential = FakeCredential(failures=2)
+    pool = FakePool()
+    questions = []
+
+    async def ask(question):
+        questions.append(question)
+
+    warmup = Warmup(
+        clients,
+        pool,
+        canary=lambda: ask("What is the square root of 2?"),
+        retry_interval=0,
+        sdk_modules=["json"],
+    )
+    assert not warmup.ready
+
+    asyncio.run(warmup.run())
+
+    assert warmup.ready
+    assert credential.scopes == [("https://ai.azure.com/.default",)] * 3
+    assert clients.agents_client.listed == 1
+    assert pool.started and pool.leases == 1
+    assert questions == ["What is the square root of 2?"]
+    checks = warmup.to_dict()
+    assert {name: check["status"] for name, check in checks.items()} == dict.fromkeys(
+        ["sdk", "credential", "upstream", "agents", "canary"], "ok"
+    )
+    assert checks["credential"]["attempts"] == 3
+
+
+def test_readiness_reports_warmup_progress(client: TestClient, clients):
+    # Without an agents endpoint every step is skipped.
+    assert client.get("/health/ready").json() == {"status": "ok"}
+    assert app.state.warmup.checks["agents"].status == "skipped"
+
+    warmup = app.state.warmup
+    clients.credential = FakeCredential()
+    app.state.warmup = Warmup(clients, FakePool(), sdk_modules=[])
+    try:
+        response = client.get("/health/ready")
+    finally:
+        app.state.warmup = warmup
+    assert response.status_code == 503
+    assert response.json()["reason"] == "warming up"
+    assert response.json()["checks"]["credential"] == {"status": "pending"}